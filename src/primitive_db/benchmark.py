@@ -0,0 +1,391 @@
+"""Микробенчмарки операций core, utils и парсеров.
+
+Для таблиц products, customers и books генерируются синтетические данные
+нужного размера, после чего замеряются insert, select (с WHERE и без),
+update, delete, format_as_table, load_table_data/save_table_data и разбор
+команд. Результаты пишутся в JSON и сравниваются с сохраненной базовой
+линией: замедление больше порога считается регрессией.
+
+Запуск: python -m src.primitive_db.benchmark [--sizes 1000,100000]
+    [--baseline bench_baseline.json] [--save-baseline]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from . import core, parser, utils
+from .constants import (
+    BENCH_BASELINE_FILE,
+    BENCH_FORMAT_ROWS,
+    BENCH_OPERATIONS,
+    BENCH_REPEAT,
+    BENCH_RESULTS_FILE,
+    BENCH_SIZES,
+    BENCH_THRESHOLD,
+)
+from .decorators import set_auto_confirm
+from .statements import parse_statement
+
+# Схемы таблиц (как в db_meta.json) и генераторы значений строки по номеру
+SCHEMAS: Dict[str, List[str]] = {
+    "products": ["ID:int", "name:str", "price:int", "in_stock:bool"],
+    "customers": ["ID:int", "name:str", "email:str", "age:int"],
+    "books": ["ID:int", "title:str", "pages:int", "available:bool"],
+}
+
+_WORDS = ["alpha", "bravo", "delta", "gamma", "omega", "sigma", "tango", "zulu"]
+
+
+def _product(rng: random.Random, i: int) -> List[Any]:
+    return [f"{rng.choice(_WORDS)} {i}", rng.randint(1, 100000), rng.random() < 0.5]
+
+
+def _customer(rng: random.Random, i: int) -> List[Any]:
+    name = f"{rng.choice(_WORDS).title()} {i}"
+    return [name, f"user{i}@example.com", rng.randint(18, 90)]
+
+
+def _book(rng: random.Random, i: int) -> List[Any]:
+    return [f"{rng.choice(_WORDS).title()} vol. {i}", rng.randint(50, 1500),
+            rng.random() < 0.5]
+
+
+GENERATORS: Dict[str, Callable[[random.Random, int], List[Any]]] = {
+    "products": _product,
+    "customers": _customer,
+    "books": _book,
+}
+
+# Условия WHERE (примерно 10% строк) и SET для каждой таблицы
+WHERE_CLAUSES: Dict[str, List[Any]] = {
+    "products": [("price", ">", 90000)],
+    "customers": [("age", "<", 25)],
+    "books": [("pages", ">", 1355)],
+}
+SET_CLAUSES: Dict[str, Dict[str, Any]] = {
+    "products": {"in_stock": False},
+    "customers": {"email": "updated@example.com"},
+    "books": {"available": True},
+}
+
+
+def generate_table(table_name: str, rows: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Генерирует записи таблицы со случайными, но воспроизводимыми значениями.
+
+    Args:
+        table_name: Имя таблицы из SCHEMAS
+        rows: Количество записей
+        seed: Зерно генератора случайных чисел
+
+    Returns:
+        Список записей с ID от 1 до rows
+    """
+    rng = random.Random(seed)
+    generate = GENERATORS[table_name]
+    names = [column.split(":", 1)[0] for column in SCHEMAS[table_name]]
+    return [
+        dict(zip(names, [i, *generate(rng, i)])) for i in range(1, rows + 1)
+    ]
+
+
+def measure(
+    func: Callable[..., Any],
+    repeat: int = BENCH_REPEAT,
+    setup: Optional[Callable[[], Any]] = None,
+) -> Dict[str, float]:
+    """Замеряет время вызова функции несколько раз.
+
+    Вывод функции (например, сообщения команд) подавляется.
+
+    Args:
+        func: Функция без аргументов или от результата setup
+        repeat: Количество замеров
+        setup: Подготовка данных перед каждым замером (не входит во время)
+
+    Returns:
+        Словарь с минимальным и медианным временем в секундах
+    """
+    timings = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            args = () if setup is None else (setup(),)
+            start = time.perf_counter()
+            func(*args)
+            timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings)}
+
+
+def _result(
+    table: str, rows: int, op: str, timing: Dict[str, float], ops: int = 1
+) -> Dict[str, Any]:
+    return {
+        "name": f"{table}/{rows}/{op}",
+        "table": table,
+        "rows": rows,
+        "op": op,
+        "ops": ops,
+        "seconds": timing["min"],
+        "median_seconds": timing["median"],
+        "per_op_us": timing["min"] / ops * 1e6,
+    }
+
+
+def bench_table(
+    table_name: str, rows: int, data_dir: str, repeat: int = BENCH_REPEAT
+) -> List[Dict[str, Any]]:
+    """Замеряет операции над одной синтетической таблицей.
+
+    Args:
+        table_name: Имя таблицы из SCHEMAS
+        rows: Размер таблицы
+        data_dir: Временная директория для файлов таблицы
+        repeat: Количество замеров каждой операции
+
+    Returns:
+        Список результатов
+    """
+    columns = SCHEMAS[table_name]
+    data = generate_table(table_name, rows)
+    where = WHERE_CLAUSES[table_name]
+    results = []
+
+    # Значения для insert готовятся заранее, чтобы замерять только вставку
+    rng = random.Random(7)
+    generate = GENERATORS[table_name]
+    new_values = [generate(rng, rows + i) for i in range(BENCH_OPERATIONS)]
+
+    def insert_batch(table_data: List[Dict[str, Any]]) -> None:
+        metadata = {table_name: {"columns": columns, "next_id": rows + 1}}
+        for values in new_values:
+            core.insert(metadata, table_data, table_name, values)
+
+    results.append(_result(
+        table_name, rows, "insert",
+        measure(insert_batch, repeat, setup=data.copy), BENCH_OPERATIONS,
+    ))
+    results.append(
+        _result(table_name, rows, "select_all",
+                measure(lambda: core.select(data), repeat))
+    )
+    results.append(
+        _result(table_name, rows, "select_where",
+                measure(lambda: core.select(data, where), repeat))
+    )
+
+    # update меняет записи, поэтому каждый замер работает с копией
+    set_clause = SET_CLAUSES[table_name]
+    results.append(_result(table_name, rows, "update", measure(
+        lambda table_data: core.update(table_data, set_clause, where),
+        repeat,
+        setup=lambda: [dict(record) for record in data],
+    )))
+    results.append(
+        _result(table_name, rows, "delete",
+                measure(lambda: core.delete(data, where), repeat))
+    )
+
+    sample = data[:BENCH_FORMAT_ROWS]
+    results.append(
+        _result(table_name, rows, "format_as_table",
+                measure(lambda: core.format_as_table(sample, columns), repeat),
+                len(sample))
+    )
+
+    results.append(
+        _result(table_name, rows, "save_table_data", measure(
+            lambda: utils.save_table_data(table_name, data, data_dir), repeat
+        ))
+    )
+    results.append(
+        _result(table_name, rows, "load_table_data", measure(
+            lambda: utils.load_table_data(table_name, data_dir), repeat
+        ))
+    )
+    return results
+
+
+def bench_parser(repeat: int = BENCH_REPEAT) -> List[Dict[str, Any]]:
+    """Замеряет функции разбора команд (размер таблицы не важен).
+
+    Args:
+        repeat: Количество замеров
+
+    Returns:
+        Список результатов
+    """
+    cases = {
+        "parse_values": (parser.parse_values, '("Dune", 412, true)'),
+        "parse_where_clause": (
+            parser.parse_where_clause,
+            'pages > 300 and (title = "Dune" or not available = true)',
+        ),
+        "parse_set_clause": (parser.parse_set_clause, "pages = 500"),
+        "parse_statement": (
+            parse_statement,
+            'select from books where pages > 300 and title = "Dune" limit 10',
+        ),
+    }
+    results = []
+    for op, (func, text) in cases.items():
+
+        def run_parser(func=func, text=text) -> None:
+            for _ in range(BENCH_OPERATIONS):
+                func(text)
+
+        results.append(
+            _result("parser", 0, op, measure(run_parser, repeat), BENCH_OPERATIONS)
+        )
+    return results
+
+
+def run_benchmarks(
+    sizes: List[int], tables: List[str], repeat: int = BENCH_REPEAT
+) -> Dict[str, Any]:
+    """Запускает все бенчмарки.
+
+    Args:
+        sizes: Размеры таблиц
+        tables: Имена таблиц из SCHEMAS
+        repeat: Количество замеров каждой операции
+
+    Returns:
+        Словарь {"meta": {...}, "results": [...]}
+    """
+    results = bench_parser(repeat)
+    set_auto_confirm(True)
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            for rows in sizes:
+                for table_name in tables:
+                    print(f"Таблица {table_name}, строк: {rows}...", flush=True)
+                    results.extend(bench_table(table_name, rows, data_dir, repeat))
+    finally:
+        set_auto_confirm(False)
+
+    meta = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sizes": sizes,
+        "repeat": repeat,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare_with_baseline(
+    report: Dict[str, Any], baseline: Dict[str, Any], threshold: float = BENCH_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """Сравнивает результаты с базовой линией.
+
+    Args:
+        report: Текущие результаты run_benchmarks
+        baseline: Результаты, сохраненные ранее
+        threshold: Допустимое замедление (0.2 - на 20%)
+
+    Returns:
+        Список сравнений {"name", "baseline", "current", "ratio", "regression"}
+        для замеров, которые есть в обоих отчетах
+    """
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    comparisons = []
+    for result in report["results"]:
+        old = previous.get(result["name"])
+        if old is None or not old["seconds"]:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        comparisons.append({
+            "name": result["name"],
+            "baseline": old["seconds"],
+            "current": result["seconds"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold,
+        })
+    return comparisons
+
+
+def print_report(
+    report: Dict[str, Any], comparisons: Optional[List[Dict[str, Any]]] = None
+) -> None:
+    """Выводит результаты (и сравнение с базовой линией) таблицей."""
+    ratios = {c["name"]: c for c in comparisons or []}
+    for result in report["results"]:
+        line = f"{result['name']:<40} {result['seconds'] * 1000:>11.3f} мс"
+        line += f" {result['per_op_us']:>13.2f} мкс/оп"
+        comparison = ratios.get(result["name"])
+        if comparison is not None:
+            mark = "  РЕГРЕССИЯ" if comparison["regression"] else ""
+            line += f"  x{comparison['ratio']:.2f}{mark}"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Точка входа бенчмарков.
+
+    Args:
+        argv: Аргументы командной строки
+
+    Returns:
+        Код возврата: 1, если найдены регрессии, иначе 0
+    """
+    arg_parser = argparse.ArgumentParser(description="Бенчмарки primitive_db")
+    arg_parser.add_argument(
+        "--sizes", default=",".join(map(str, BENCH_SIZES)),
+        help="размеры таблиц через запятую",
+    )
+    arg_parser.add_argument(
+        "--tables", default=",".join(SCHEMAS), help="таблицы через запятую"
+    )
+    arg_parser.add_argument("--repeat", type=int, default=BENCH_REPEAT)
+    arg_parser.add_argument("--output", default=BENCH_RESULTS_FILE)
+    arg_parser.add_argument("--baseline", default=BENCH_BASELINE_FILE)
+    arg_parser.add_argument("--threshold", type=float, default=BENCH_THRESHOLD)
+    arg_parser.add_argument(
+        "--save-baseline", action="store_true",
+        help="сохранить результаты как новую базовую линию",
+    )
+    args = arg_parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    tables = [table for table in args.tables.split(",") if table]
+    unknown = [table for table in tables if table not in SCHEMAS]
+    if unknown:
+        print(f"Ошибка: Неизвестные таблицы: {', '.join(unknown)}")
+        return 2
+
+    report = run_benchmarks(sizes, tables, args.repeat)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    comparisons = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparisons = compare_with_baseline(report, baseline, args.threshold)
+
+    print_report(report, comparisons)
+    print(f"Результаты сохранены в {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Базовая линия сохранена в {args.baseline}")
+        return 0
+
+    regressions = [c for c in comparisons or [] if c["regression"]]
+    if regressions:
+        print(f"Найдено регрессий: {len(regressions)} (порог {args.threshold:.0%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,628 @@
+"""Бинарный формат таблицы с фиксированной шириной строк и доступом через mmap.
+
+Таблица хранится в двух файлах:
+- <таблица>.bin: заголовок, коды типов столбцов и строки фиксированной ширины.
+  Строка - битовая карта None, затем поля: int - 8 байт, bool - 1 байт,
+  str - смещение и длина строки в куче;
+- <таблица>.heap: куча строк в UTF-8, на которую ссылаются поля str.
+
+Файлы открываются через mmap, поэтому select, info и поиск по ID читают
+только затронутые страницы, а таблица может быть больше оперативной памяти.
+Новые строки дописываются в конец файлов, измененные перезаписываются
+на месте; удаление переписывает таблицу целиком.
+"""
+
+import mmap
+import os
+import struct
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Set
+
+from .predicate import compile_position_predicate, is_comparison
+
+MAGIC = b"PDBT"
+FORMAT_VERSION = 1
+
+# Заголовок: сигнатура, версия формата, число столбцов, число строк, флаги
+HEADER = struct.Struct("<4sHHQB3x")
+
+# Флаг: ID строк файла строго возрастают, поиск по ID - двоичный
+FLAG_IDS_SORTED = 1
+
+TYPE_CODES = {"int": b"i", "bool": b"b", "str": b"s"}
+FIELD_FORMATS = {"int": "q", "bool": "?", "str": "QI"}
+EMPTY_FIELDS = {"int": (0,), "bool": (False,), "str": (0, 0)}
+
+# Операторы, по которым можно сузить диапазон строк по возрастающему ID
+ID_RANGE_OPERATORS = {"=", ">", "<", ">=", "<="}
+
+
+class RowLayout:
+    """Раскладка строки фиксированной ширины для схемы таблицы."""
+
+    def __init__(self, columns: List[str]) -> None:
+        self.names = [col.split(":", 1)[0] for col in columns]
+        self.types = [col.split(":", 1)[1] for col in columns]
+        self.type_codes = b"".join(TYPE_CODES[t] for t in self.types)
+        self.mask_size = (len(self.names) + 7) // 8
+
+        row_format = f"<{self.mask_size}s"
+        # Имя столбца -> (номер, тип, структура поля, смещение поля в строке)
+        self.fields: Dict[str, tuple] = {}
+        for i, (name, col_type) in enumerate(zip(self.names, self.types)):
+            field = struct.Struct("<" + FIELD_FORMATS[col_type])
+            offset = struct.calcsize(row_format)
+            self.fields[name] = (i, col_type, field, offset)
+            row_format += FIELD_FORMATS[col_type]
+
+        self.row = struct.Struct(row_format)
+        self.size = self.row.size
+        # Строки начинаются после заголовка и кодов типов, выровненных по 8 байт
+        self.data_offset = (HEADER.size + len(self.names) + 7) // 8 * 8
+
+    def pack(self, record: Mapping[str, Any], heap: bytearray, heap_base: int) -> bytes:
+        """Упаковывает запись в строку, дописывая ее строки в кучу.
+
+        Args:
+            record: Запись таблицы
+            heap: Буфер новых байтов кучи
+            heap_base: Смещение начала буфера в файле кучи
+
+        Returns:
+            Байты строки
+
+        Raises:
+            ValueError: Если значение не соответствует типу столбца
+        """
+        mask = bytearray(self.mask_size)
+        values: List[Any] = []
+        for i, (name, col_type) in enumerate(zip(self.names, self.types)):
+            value = record.get(name)
+            if value is None:
+                mask[i >> 3] |= 1 << (i & 7)
+                values.extend(EMPTY_FIELDS[col_type])
+            elif col_type == "str":
+                if not isinstance(value, str):
+                    msg = f"Столбец {name}: ожидается str, получено {value!r}"
+                    raise ValueError(msg)
+                data = value.encode("utf-8")
+                values.append(heap_base + len(heap))
+                values.append(len(data))
+                heap += data
+            else:
+                values.append(value)
+
+        try:
+            return self.row.pack(bytes(mask), *values)
+        except struct.error as e:
+            raise ValueError(f"Запись {dict(record)} не помещается в строку: {e}")
+
+    def unpack(self, buffer: Any, offset: int, heap: Any) -> Dict[str, Any]:
+        """Распаковывает строку в словарь.
+
+        Args:
+            buffer: Буфер с файлом строк
+            offset: Смещение строки
+            heap: Буфер с кучей строк
+
+        Returns:
+            Запись таблицы
+        """
+        unpacked = self.row.unpack_from(buffer, offset)
+        mask = unpacked[0]
+        record: Dict[str, Any] = {}
+        j = 1
+        for i, (name, col_type) in enumerate(zip(self.names, self.types)):
+            is_null = mask[i >> 3] & (1 << (i & 7))
+            if col_type == "str":
+                start, length = unpacked[j], unpacked[j + 1]
+                j += 2
+                record[name] = (
+                    None if is_null else heap[start : start + length].decode("utf-8")
+                )
+            else:
+                record[name] = None if is_null else unpacked[j]
+                j += 1
+        return record
+
+
+class BinaryRowView(MutableMapping):
+    """Строка бинарной таблицы, видимая как словарь.
+
+    Значения читаются из файла по одному полю, а запись по ключу отмечает
+    строку измененной, поэтому core.update работает так же, как со списком.
+    """
+
+    __slots__ = ("_table", "_position")
+
+    def __init__(self, table: "BinaryTable", position: int) -> None:
+        self._table = table
+        self._position = position
+
+    def __getitem__(self, column: str) -> Any:
+        if column not in self._table.layout.fields:
+            raise KeyError(column)
+        return self._table.get_value(self._position, column)
+
+    def __setitem__(self, column: str, value: Any) -> None:
+        self._table.set_value(self._position, column, value)
+
+    def __delitem__(self, column: str) -> None:
+        raise TypeError("Столбцы бинарной таблицы нельзя удалять из записи")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.layout.names)
+
+    def __len__(self) -> int:
+        return len(self._table.layout.names)
+
+    def copy(self) -> Dict[str, Any]:
+        """Возвращает запись в виде обычного словаря."""
+        return self._table.read_row(self._position)
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+
+class _FieldSequence:
+    """Значения одного столбца сохраненных строк как последовательность для bisect."""
+
+    def __init__(self, table: "BinaryTable", column: str) -> None:
+        self._read = table.field_reader(column)
+        self._length = table.stored_count
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, position: int) -> Any:
+        return self._read(position)
+
+
+class BinaryTable:
+    """Таблица в бинарном формате, открытая через mmap.
+
+    Несохраненные изменения (добавленные и измененные строки) держатся
+    в памяти до вызова flush.
+    """
+
+    def __init__(self, columns: List[str], bin_path: str, heap_path: str) -> None:
+        self.columns = list(columns)
+        self.layout = RowLayout(self.columns)
+        self.bin_path = bin_path
+        self.heap_path = heap_path
+        self._rows: Any = b""
+        self._heap: Any = b""
+        self.stored_count = 0
+        self.ids_sorted = True
+        self._appended: List[Dict[str, Any]] = []
+        self._updated: Dict[int, Dict[str, Any]] = {}
+        # Позиции удаленных записей (см. tombstones.py)
+        self.deleted: Set[int] = set()
+        self._open()
+
+    def _open(self) -> None:
+        """Отображает файлы таблицы в память и читает заголовок.
+
+        Raises:
+            ValueError: Если файл поврежден или не соответствует схеме
+        """
+        self.close()
+        if not os.path.exists(self.bin_path):
+            self.stored_count = 0
+            self.ids_sorted = True
+            return
+
+        self._rows = _map_file(self.bin_path)
+        self._heap = _map_file(self.heap_path)
+        if len(self._rows) < self.layout.data_offset:
+            raise ValueError(f"Файл {self.bin_path} поврежден: нет заголовка")
+
+        magic, version, column_count, row_count, flags = HEADER.unpack_from(
+            self._rows, 0
+        )
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Файл {self.bin_path} не является бинарной таблицей")
+        codes = bytes(self._rows[HEADER.size : HEADER.size + column_count])
+        if codes != self.layout.type_codes:
+            raise ValueError(f"Схема файла {self.bin_path} не совпадает с метаданными")
+
+        expected_size = self.layout.data_offset + row_count * self.layout.size
+        if len(self._rows) < expected_size:
+            raise ValueError(f"Файл {self.bin_path} поврежден: не хватает строк")
+
+        self.stored_count = row_count
+        self.ids_sorted = bool(flags & FLAG_IDS_SORTED)
+
+    def close(self) -> None:
+        """Закрывает отображения файлов."""
+        for mapped in (self._rows, self._heap):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self._rows = b""
+        self._heap = b""
+
+    def __len__(self) -> int:
+        return self.stored_count + len(self._appended)
+
+    def __getitem__(self, position: int) -> BinaryRowView:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("Позиция записи вне таблицы")
+        return BinaryRowView(self, position)
+
+    def __iter__(self) -> Iterator[BinaryRowView]:
+        for position in range(len(self)):
+            yield BinaryRowView(self, position)
+
+    @property
+    def has_changes(self) -> bool:
+        """Есть ли несохраненные изменения."""
+        return bool(self._appended or self._updated)
+
+    def _row_offset(self, position: int) -> int:
+        return self.layout.data_offset + position * self.layout.size
+
+    def field_reader(self, column: str) -> Callable[[int], Any]:
+        """Возвращает функцию чтения одного поля сохраненной строки из файла.
+
+        Args:
+            column: Имя столбца
+
+        Returns:
+            Функция позиция -> значение (None для неизвестного столбца)
+        """
+        field = self.layout.fields.get(column)
+        if field is None:
+            return lambda _: None
+
+        index, col_type, field_struct, field_offset = field
+        rows, heap = self._rows, self._heap
+        data_offset, row_size = self.layout.data_offset, self.layout.size
+        mask_byte, mask_bit = index >> 3, 1 << (index & 7)
+
+        if col_type == "str":
+
+            def read(position: int) -> Any:
+                base = data_offset + position * row_size
+                if rows[base + mask_byte] & mask_bit:
+                    return None
+                start, length = field_struct.unpack_from(rows, base + field_offset)
+                return heap[start : start + length].decode("utf-8")
+
+        else:
+
+            def read(position: int) -> Any:
+                base = data_offset + position * row_size
+                if rows[base + mask_byte] & mask_bit:
+                    return None
+                return field_struct.unpack_from(rows, base + field_offset)[0]
+
+        return read
+
+    def get_value(self, position: int, column: str) -> Any:
+        """Возвращает значение столбца записи с учетом несохраненных изменений."""
+        if position >= self.stored_count:
+            return self._appended[position - self.stored_count].get(column)
+        updated = self._updated.get(position)
+        if updated is not None:
+            return updated.get(column)
+        return self.field_reader(column)(position)
+
+    def set_value(self, position: int, column: str, value: Any) -> None:
+        """Изменяет значение столбца записи до следующего flush."""
+        if column not in self.layout.fields:
+            raise KeyError(column)
+        if column == "ID":
+            self.ids_sorted = False
+        if position >= self.stored_count:
+            self._appended[position - self.stored_count][column] = value
+            return
+        if position not in self._updated:
+            self._updated[position] = self.read_row(position)
+        self._updated[position][column] = value
+
+    def read_row(self, position: int) -> Dict[str, Any]:
+        """Читает запись целиком в словарь."""
+        if position >= self.stored_count:
+            return dict(self._appended[position - self.stored_count])
+        updated = self._updated.get(position)
+        if updated is not None:
+            return dict(updated)
+        return self.layout.unpack(self._rows, self._row_offset(position), self._heap)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Лениво отдает все записи в виде словарей."""
+        for position in range(len(self)):
+            yield self.read_row(position)
+
+    def append(self, record: Mapping[str, Any]) -> None:
+        """Добавляет запись до следующего flush."""
+        self._appended.append({name: record.get(name) for name in self.layout.names})
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Возвращает все записи списком словарей."""
+        return list(self.iter_records())
+
+    def copy(self) -> List[Dict[str, Any]]:
+        """Возвращает копию записей списком словарей."""
+        return self.to_records()
+
+    def rewrite(self, positions: Iterable[int]) -> "BinaryTable":
+        """Переписывает файлы таблицы, оставляя только записи на позициях.
+
+        Записи читаются по одной и пишутся потоком (см. write_binary_table),
+        поэтому таблица в память не загружается; несохраненные изменения
+        попадают в новые файлы. Эта таблица после вызова закрыта.
+
+        Args:
+            positions: Позиции оставляемых записей по возрастанию
+
+        Returns:
+            Таблица, заново открытая по переписанным файлам
+        """
+        write_binary_table(
+            self.columns, map(self.read_row, positions), self.bin_path, self.heap_path
+        )
+        self.close()
+        return BinaryTable(self.columns, self.bin_path, self.heap_path)
+
+    def _narrow_by_id(
+        self, conditions: List[tuple], candidates: Iterable[int]
+    ) -> Iterable[int]:
+        """Сужает полный перебор до диапазона строк по условиям на ID.
+
+        ID сохраненных строк возрастают, поэтому диапазон находится двоичным
+        поиском с чтением нескольких полей; новые строки проверяются все.
+        """
+        full_scan = isinstance(candidates, range) and len(candidates) == len(self)
+        if not full_scan or not self.ids_sorted or self._updated:
+            return candidates
+
+        ids = None
+        lo, hi = 0, self.stored_count
+        for node in conditions:
+            # OR/NOT не сужают диапазон: используются только сравнения под AND
+            if not is_comparison(node):
+                continue
+            column, op, value = node
+            if column != "ID" or op not in ID_RANGE_OPERATORS:
+                continue
+            if not isinstance(value, int) or isinstance(value, bool):
+                continue
+            ids = ids or _FieldSequence(self, "ID")
+            if op in ("=", ">="):
+                lo = max(lo, bisect_left(ids, value))
+            if op == ">":
+                lo = max(lo, bisect_right(ids, value))
+            if op in ("=", "<="):
+                hi = min(hi, bisect_right(ids, value))
+            if op == "<":
+                hi = min(hi, bisect_left(ids, value))
+
+        if ids is None:
+            return candidates
+        return chain(range(lo, max(lo, hi)), range(self.stored_count, len(self)))
+
+    def iter_match_positions(
+        self, conditions: List[tuple], candidates: Iterable[int]
+    ) -> Iterator[int]:
+        """Лениво отдает позиции, удовлетворяющие условиям WHERE.
+
+        Для каждой позиции скомпилированный предикат читает только поля
+        из условия.
+
+        Args:
+            conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+            candidates: Позиции-кандидаты в порядке возрастания
+
+        Returns:
+            Итератор подходящих позиций
+        """
+        candidates = self._narrow_by_id(conditions, candidates)
+        getters = self._change_reader if self.has_changes else self.field_reader
+        return filter(compile_position_predicate(conditions, getters), candidates)
+
+    def _change_reader(self, column: str) -> Callable[[int], Any]:
+        # С несохраненными изменениями поле читается с их учетом
+        return lambda position: self.get_value(position, column)
+
+    def match_positions(
+        self, conditions: List[tuple], candidates: Iterable[int]
+    ) -> List[int]:
+        """Фильтрует позиции по условиям, читая только нужные поля.
+
+        Args:
+            conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+            candidates: Позиции-кандидаты в порядке возрастания
+
+        Returns:
+            Позиции записей, удовлетворяющих условиям
+        """
+        return list(self.iter_match_positions(conditions, candidates))
+
+    def flush(self) -> int:
+        """Сохраняет изменения: измененные строки перезаписываются на месте,
+        новые дописываются в конец файла строк, их строки - в конец кучи.
+
+        Returns:
+            Количество записанных байтов
+        """
+        if not self.has_changes:
+            return 0
+        if not os.path.exists(self.bin_path):
+            write_binary_table(
+                self.columns, self.iter_records(), self.bin_path, self.heap_path
+            )
+            self._appended = []
+            self._updated = {}
+            self._open()
+            return os.path.getsize(self.bin_path) + os.path.getsize(self.heap_path)
+
+        heap = bytearray()
+        heap_base = len(self._heap)
+        updated_rows = [
+            (position, self.layout.pack(record, heap, heap_base))
+            for position, record in sorted(self._updated.items())
+        ]
+        appended_rows = b"".join(
+            self.layout.pack(record, heap, heap_base) for record in self._appended
+        )
+
+        ids_sorted = self.ids_sorted and _ids_increasing(
+            chain(
+                [self.get_value(self.stored_count - 1, "ID")]
+                if self.stored_count
+                else [],
+                (record.get("ID") for record in self._appended),
+            )
+        )
+        row_count = len(self)
+
+        # Сначала куча: строки файла никогда не ссылаются на недописанные байты
+        with open(self.heap_path, "ab") as f:
+            f.write(heap)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.bin_path, "r+b") as f:
+            for position, row in updated_rows:
+                f.seek(self._row_offset(position))
+                f.write(row)
+            f.seek(self._row_offset(self.stored_count))
+            f.write(appended_rows)
+            f.seek(0)
+            f.write(_pack_header(self.layout, row_count, ids_sorted))
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._appended = []
+        self._updated = {}
+        self._open()
+        written = len(heap) + len(appended_rows) + self.layout.data_offset
+        return written + sum(len(row) for _, row in updated_rows)
+
+
+def _map_file(path: str) -> Any:
+    """Отображает файл в память только для чтения (пустой файл - пустые байты)."""
+    try:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return b""
+
+
+def _pack_header(layout: RowLayout, row_count: int, ids_sorted: bool) -> bytes:
+    flags = FLAG_IDS_SORTED if ids_sorted else 0
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(layout.names), row_count, flags)
+    return (header + layout.type_codes).ljust(layout.data_offset, b"\0")
+
+
+def _ids_increasing(ids: Iterable[Any]) -> bool:
+    """Проверяет, что ID целые и строго возрастают."""
+    previous = None
+    for record_id in ids:
+        if not isinstance(record_id, int):
+            return False
+        if previous is not None and record_id <= previous:
+            return False
+        previous = record_id
+    return True
+
+
+def write_binary_table(
+    columns: List[str],
+    records: Iterable[Mapping[str, Any]],
+    bin_path: str,
+    heap_path: str,
+    chunk_size: int = 10000,
+) -> int:
+    """Записывает таблицу в бинарном формате целиком.
+
+    Записи читаются потоково и пишутся пачками во временные файлы, которые
+    затем подменяют старые, поэтому исходная таблица может быть открыта
+    через mmap во время записи.
+
+    Args:
+        columns: Столбцы таблицы в формате "имя:тип"
+        records: Записи таблицы
+        bin_path: Путь к файлу строк
+        heap_path: Путь к куче строк
+        chunk_size: Количество строк в пачке записи
+
+    Returns:
+        Количество записанных строк
+
+    Raises:
+        ValueError: Если запись не соответствует схеме
+    """
+    layout = RowLayout(columns)
+    bin_tmp, heap_tmp = f"{bin_path}.tmp", f"{heap_path}.tmp"
+    row_count = 0
+    heap_size = 0
+    previous_id = None
+    ids_sorted = True
+
+    with open(bin_tmp, "wb") as rows_file, open(heap_tmp, "wb") as heap_file:
+        rows_file.write(_pack_header(layout, 0, True))
+        chunk: List[bytes] = []
+        heap = bytearray()
+        for record in records:
+            record_id = record.get("ID")
+            if ids_sorted and (
+                not isinstance(record_id, int)
+                or (previous_id is not None and record_id <= previous_id)
+            ):
+                ids_sorted = False
+            previous_id = record_id
+
+            chunk.append(layout.pack(record, heap, heap_size))
+            row_count += 1
+            if len(chunk) >= chunk_size:
+                rows_file.write(b"".join(chunk))
+                heap_file.write(heap)
+                heap_size += len(heap)
+                chunk, heap = [], bytearray()
+
+        rows_file.write(b"".join(chunk))
+        heap_file.write(heap)
+        rows_file.seek(0)
+        rows_file.write(_pack_header(layout, row_count, ids_sorted))
+        for f in (rows_file, heap_file):
+            f.flush()
+            os.fsync(f.fileno())
+
+    os.replace(heap_tmp, heap_path)
+    os.replace(bin_tmp, bin_path)
+    return row_count
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Тестируем запись, чтение, изменение и поиск по ID
+    schema = ["ID:int", "name:str", "age:int", "active:bool"]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        bin_file = os.path.join(tmp_dir, "users.bin")
+        heap_file = os.path.join(tmp_dir, "users.heap")
+
+        rows = [
+            {"ID": i, "name": f"user{i}", "age": 20 + i % 30, "active": i % 2 == 0}
+            for i in range(1, 1001)
+        ]
+        rows[4]["name"] = None
+        write_binary_table(schema, rows, bin_file, heap_file)
+
+        table = BinaryTable(schema, bin_file, heap_file)
+        print(f"Строк: {len(table)}, запись 5: {table[4].copy()}")
+        found = table.match_positions([("ID", "=", 500)], range(len(table)))
+        print(f"Позиции записи с ID = 500: {found}")
+
+        table[0]["name"] = "Сергей"
+        table.append({"ID": 1001, "name": "new", "age": 1, "active": True})
+        table.flush()
+        print(f"После flush: {table[0].copy()}, {table[-1].copy()}")
+        table.close()
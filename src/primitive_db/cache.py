@@ -0,0 +1,177 @@
+"""Кэш результатов запросов select."""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .columnar import ColumnarTable
+from .constants import QUERY_CACHE_MAX_BYTES, QUERY_CACHE_MAX_ENTRIES
+from .predicate import normalize
+
+
+def estimate_size(result: Any) -> int:
+    """Оценивает объем памяти, занимаемый результатом запроса.
+
+    Размер записи оценивается по первой записи, поэтому оценка
+    не зависит от количества строк по времени.
+
+    Args:
+        result: Список записей или колоночная таблица
+
+    Returns:
+        Примерный размер в байтах
+    """
+    if isinstance(result, ColumnarTable):
+        return result.nbytes()
+
+    size = sys.getsizeof(result)
+    if result:
+        sample = result[0]
+        row_size = sys.getsizeof(sample)
+        row_size += sum(sys.getsizeof(value) for value in sample.values())
+        size += row_size * len(result)
+    return size
+
+
+class QueryCache:
+    """LRU-кэш результатов select с ограничением по числу записей и объему.
+
+    Ключ включает версию таблицы, поэтому после insert/update/delete
+    (которые увеличивают версию) старые результаты больше не находятся.
+    Методы защищены блокировкой: кэш общий для потоков сервера.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+        max_bytes: int = QUERY_CACHE_MAX_BYTES,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self.current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        table_name: str,
+        version: int,
+        conditions: List[Any],
+        limit: Optional[int] = None,
+        offset: int = 0,
+        aggregation: Hashable = None,
+    ) -> Hashable:
+        """Строит ключ кэша из имени таблицы, ее версии, условия и LIMIT/OFFSET.
+
+        Условия (и ветви AND/OR) сортируются, поэтому порядок их записи
+        на ключ не влияет. Тип значения входит в ключ, чтобы 1 и True
+        не считались одним условием.
+
+        Args:
+            table_name: Имя таблицы
+            version: Версия таблицы из метаданных
+            conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+            limit: Ограничение количества записей
+            offset: Количество пропущенных записей
+            aggregation: Выражения и столбцы группировки агрегатного select
+
+        Returns:
+            Хэшируемый ключ
+        """
+        normalized = [normalize(node) for node in conditions]
+        predicate = tuple(sorted(normalized, key=repr))
+        return table_name, version, predicate, limit, offset, aggregation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Возвращает результат из кэша или None.
+
+        Результат не копируется, поэтому вызывающий код не должен его изменять.
+
+        Args:
+            key: Ключ запроса
+
+        Returns:
+            Результат запроса или None при промахе
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, result: Any) -> None:
+        """Сохраняет результат в кэш, вытесняя давно не использованные.
+
+        Результаты больше всего бюджета по объему не кэшируются.
+
+        Args:
+            key: Ключ запроса
+            result: Список записей или колоночная таблица
+        """
+        size = estimate_size(result)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (result, size)
+            self.current_bytes += size
+
+            while (
+                len(self._entries) > self.max_entries
+                or self.current_bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, table_name: str) -> None:
+        """Удаляет из кэша все результаты по таблице.
+
+        Args:
+            table_name: Имя таблицы
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == table_name]:
+                self._discard(key)
+
+    def clear(self) -> None:
+        """Очищает кэш (счетчики сохраняются)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает счетчики кэша.
+
+        Returns:
+            Словарь с числом попаданий, промахов, вытеснений и размерами
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+
+# Общий кэш результатов select для текущей сессии
+query_cache = QueryCache()
@@ -0,0 +1,251 @@
+"""Форматы (кодеки) файлов данных таблиц.
+
+Кодек превращает список записей в байты файла data/<имя>.json и обратно.
+Кодек таблицы задается параметром codec в db_meta.json и используется при
+записи, а при чтении формат определяется по содержимому файла. Поэтому
+файл в старом формате читается как прежде и переходит в формат таблицы
+при следующей записи.
+
+Кодеки:
+- json - список объектов с отступами (исходный формат);
+- compact - имена столбцов один раз, строки - массивы значений;
+- jsonl - JSON Lines, одна запись-объект на строку;
+- zlib - строки compact, сжатые блоками по CODEC_BLOCK_ROWS строк.
+
+Новые кодеки подключаются через register_codec.
+"""
+
+import json
+import struct
+import zlib
+from itertools import chain
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Mapping, Sequence, Tuple
+
+from .constants import (
+    CODEC_BLOCK_ROWS,
+    CODEC_COMPACT,
+    CODEC_JSON,
+    CODEC_JSONL,
+    CODEC_ZLIB,
+    CODEC_ZLIB_LEVEL,
+)
+
+# Заголовок файла кодека zlib
+ZLIB_MAGIC = b"PDBZ\x01"
+
+# Длина блока кодека zlib: 4 байта big-endian
+_BLOCK_LENGTH = struct.Struct(">I")
+
+
+def split_records(
+    records: Sequence[Mapping[str, Any]],
+) -> Tuple[List[str], List[Sequence[Any]]]:
+    """Раскладывает записи на имена столбцов и строки значений.
+
+    Столбцы берутся из первой записи. Если у записей разные наборы полей,
+    столбцы объединяются, а отсутствующие поля записываются как null.
+
+    Args:
+        records: Записи таблицы
+
+    Returns:
+        Кортеж (столбцы, строки)
+    """
+    if not records:
+        return [], []
+    columns = list(records[0])
+    if sum(map(len, records)) == len(columns) * len(records):
+        try:
+            if len(columns) == 1:
+                return columns, [(record[columns[0]],) for record in records]
+            getter = itemgetter(*columns)
+            return columns, [getter(record) for record in records]
+        except KeyError:
+            pass
+    columns = list(dict.fromkeys(chain.from_iterable(records)))
+    return columns, [[record.get(column) for column in columns] for record in records]
+
+
+def join_records(
+    columns: List[str], rows: Sequence[Sequence[Any]]
+) -> List[Dict[str, Any]]:
+    """Собирает записи из имен столбцов и строк значений."""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class JsonCodec:
+    """Список объектов с отступами - исходный формат файлов таблиц."""
+
+    name = CODEC_JSON
+
+    def encode(self, records: Sequence[Mapping[str, Any]]) -> bytes:
+        # json.dumps кодирует весь список за один вызов C-кодировщика, тогда
+        # как json.dump передает в файл каждый токен отдельно
+        return json.dumps(list(records), ensure_ascii=False, indent=2).encode("utf-8")
+
+    def decode(self, data: bytes) -> List[Dict[str, Any]]:
+        return json.loads(data)
+
+    def detect(self, data: bytes) -> bool:
+        return data.lstrip()[:1] == b"["
+
+
+class CompactCodec:
+    """Объект {"columns": [...], "rows": [[...], ...]} в одну строку."""
+
+    name = CODEC_COMPACT
+
+    def encode(self, records: Sequence[Mapping[str, Any]]) -> bytes:
+        columns, rows = split_records(records)
+        return _dumps({"columns": columns, "rows": rows})
+
+    def decode(self, data: bytes) -> List[Dict[str, Any]]:
+        table = json.loads(data)
+        return join_records(table["columns"], table["rows"])
+
+    def detect(self, data: bytes) -> bool:
+        return data.startswith(b'{"columns"')
+
+
+class JsonLinesCodec:
+    """JSON Lines: одна запись-объект на строку, как в файлах импорта."""
+
+    name = CODEC_JSONL
+
+    def encode(self, records: Sequence[Mapping[str, Any]]) -> bytes:
+        return b"".join(_dumps(dict(record)) + b"\n" for record in records)
+
+    def decode(self, data: bytes) -> List[Dict[str, Any]]:
+        return [json.loads(line) for line in data.splitlines() if line.strip()]
+
+    def detect(self, data: bytes) -> bool:
+        return data.startswith(b"{")
+
+
+class ZlibCodec:
+    """Строки compact, сжатые zlib блоками по CODEC_BLOCK_ROWS строк.
+
+    Файл: ZLIB_MAGIC, затем блоки "длина (4 байта) + данные zlib". Первый
+    блок - список столбцов, остальные - массивы строк.
+    """
+
+    name = CODEC_ZLIB
+
+    def __init__(
+        self, block_rows: int = CODEC_BLOCK_ROWS, level: int = CODEC_ZLIB_LEVEL
+    ) -> None:
+        self.block_rows = block_rows
+        self.level = level
+
+    def _block(self, value: Any) -> bytes:
+        packed = zlib.compress(_dumps(value), self.level)
+        return _BLOCK_LENGTH.pack(len(packed)) + packed
+
+    def encode(self, records: Sequence[Mapping[str, Any]]) -> bytes:
+        columns, rows = split_records(records)
+        parts = [ZLIB_MAGIC, self._block(columns)]
+        for start in range(0, len(rows), self.block_rows):
+            parts.append(self._block(rows[start : start + self.block_rows]))
+        return b"".join(parts)
+
+    def iter_blocks(self, data: bytes) -> Iterator[Any]:
+        """Перебирает распакованные блоки файла.
+
+        Raises:
+            ValueError: Если файл обрезан или блок поврежден
+        """
+        offset = len(ZLIB_MAGIC)
+        while offset < len(data):
+            if offset + _BLOCK_LENGTH.size > len(data):
+                raise ValueError("Файл обрезан посреди блока")
+            (length,) = _BLOCK_LENGTH.unpack_from(data, offset)
+            offset += _BLOCK_LENGTH.size
+            block = data[offset : offset + length]
+            if len(block) != length:
+                raise ValueError("Файл обрезан посреди блока")
+            offset += length
+            try:
+                yield json.loads(zlib.decompress(block))
+            except zlib.error as e:
+                raise ValueError(f"Поврежденный блок: {e}") from None
+
+    def decode(self, data: bytes) -> List[Dict[str, Any]]:
+        blocks = self.iter_blocks(data)
+        columns = next(blocks, [])
+        records: List[Dict[str, Any]] = []
+        for rows in blocks:
+            records.extend(join_records(columns, rows))
+        return records
+
+    def detect(self, data: bytes) -> bool:
+        return data.startswith(ZLIB_MAGIC)
+
+
+# Кодеки по именам; порядок важен для определения формата по содержимому:
+# признак jsonl ("{") подходит и для compact
+CODECS: Dict[str, Any] = {}
+
+
+def register_codec(codec: Any) -> None:
+    """Подключает кодек (объект с name, encode, decode и detect).
+
+    Args:
+        codec: Кодек; detect проверяет, записан ли файл этим кодеком
+    """
+    CODECS[codec.name] = codec
+
+
+def get_codec(name: str) -> Any:
+    """Возвращает кодек по имени.
+
+    Args:
+        name: Имя кодека
+
+    Returns:
+        Кодек
+
+    Raises:
+        ValueError: Если кодек неизвестен
+    """
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError(f"Неизвестный формат файла таблицы: {name}")
+    return codec
+
+
+def detect_codec(data: bytes) -> Any:
+    """Определяет кодек файла по его содержимому.
+
+    Args:
+        data: Содержимое непустого файла
+
+    Returns:
+        Кодек
+
+    Raises:
+        ValueError: Если формат не распознан
+    """
+    for codec in CODECS.values():
+        if codec.detect(data):
+            return codec
+    raise ValueError("Формат файла таблицы не распознан")
+
+
+for _codec in (ZlibCodec(), CompactCodec(), JsonLinesCodec(), JsonCodec()):
+    register_codec(_codec)
+
+
+if __name__ == "__main__":
+    records = [
+        {"ID": i, "name": f"user{i}", "age": 20 + i % 50, "active": i % 3 == 0}
+        for i in range(1, 10001)
+    ]
+    for name, codec in CODECS.items():
+        data = codec.encode(records)
+        assert detect_codec(data) is codec and codec.decode(data) == records
+        print(f"{name}: {len(data)} байт")
@@ -0,0 +1,496 @@
+"""Колоночное представление таблицы в памяти.
+
+Каждый столбец схемы хранится отдельным типизированным массивом:
+int - array('q'), bool - упакованная битовая карта, str - буфер байтов
+со смещениями и длинами. Записи не хранятся как словари, поэтому имена
+столбцов не повторяются в каждой строке.
+"""
+
+from array import array
+from collections.abc import MutableMapping
+from itertools import accumulate
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Set, Tuple
+
+from .parser import COMPARISON_OPERATORS
+from .predicate import compile_position_predicate, filter_positions
+
+
+def _safe_compare(compare, left: Any, right: Any) -> bool:
+    """Сравнивает значения; несравнимые типы условию не удовлетворяют."""
+    try:
+        return compare(left, right)
+    except TypeError:
+        return False
+
+
+class IntColumn:
+    """Столбец целых чисел в array('q') с множеством позиций None."""
+
+    type_name = "int"
+
+    def __init__(self) -> None:
+        self.values = array("q")
+        self.nulls: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _check(self, value: Any) -> int:
+        if value is None:
+            return 0
+        if not isinstance(value, int):
+            raise ValueError(f"Ожидается int, получено: {value!r}")
+        if not -(2**63) <= value < 2**63:
+            raise ValueError(f"Число не помещается в 64 бита: {value}")
+        return value
+
+    def append(self, value: Any) -> None:
+        self.values.append(self._check(value))
+        if value is None:
+            self.nulls.add(len(self.values) - 1)
+
+    def extend(self, values: List[Any]) -> None:
+        if any(type(value) is not int for value in values):
+            for value in values:
+                self.append(value)
+            return
+        try:
+            self.values.extend(values)
+        except OverflowError:
+            raise ValueError("Число не помещается в 64 бита")
+
+    def get(self, position: int) -> Any:
+        if self.nulls and position in self.nulls:
+            return None
+        return self.values[position]
+
+    def set(self, position: int, value: Any) -> None:
+        self.values[position] = self._check(value)
+        if value is None:
+            self.nulls.add(position)
+        else:
+            self.nulls.discard(position)
+
+    def fork(self) -> "IntColumn":
+        """Возвращает копию столбца (массив копируется целиком)."""
+        column = IntColumn()
+        column.values = self.values[:]
+        column.nulls = set(self.nulls)
+        return column
+
+    def scan(self) -> Any:
+        """Возвращает значения для сравнения при полном просмотре."""
+        if not self.nulls:
+            return self.values
+        return [self.get(position) for position in range(len(self.values))]
+
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values)
+
+
+class BoolColumn:
+    """Столбец логических значений, упакованных по 8 в байт."""
+
+    type_name = "bool"
+
+    def __init__(self) -> None:
+        self.bits = bytearray()
+        self.length = 0
+        self.nulls: Set[int] = set()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _check(self, value: Any) -> None:
+        if value is not None and not isinstance(value, bool):
+            raise ValueError(f"Ожидается bool, получено: {value!r}")
+
+    def append(self, value: Any) -> None:
+        self._check(value)
+        if self.length % 8 == 0:
+            self.bits.append(0)
+        self.length += 1
+        self.set(self.length - 1, value)
+
+    def extend(self, values: List[Any]) -> None:
+        for value in values:
+            self.append(value)
+
+    def get(self, position: int) -> Any:
+        if self.nulls and position in self.nulls:
+            return None
+        return bool(self.bits[position >> 3] >> (position & 7) & 1)
+
+    def set(self, position: int, value: Any) -> None:
+        self._check(value)
+        mask = 1 << (position & 7)
+        if value:
+            self.bits[position >> 3] |= mask
+        else:
+            self.bits[position >> 3] &= ~mask & 0xFF
+        if value is None:
+            self.nulls.add(position)
+        else:
+            self.nulls.discard(position)
+
+    def fork(self) -> "BoolColumn":
+        column = BoolColumn()
+        column.bits = bytearray(self.bits)
+        column.length = self.length
+        column.nulls = set(self.nulls)
+        return column
+
+    def scan(self) -> List[Any]:
+        return [self.get(position) for position in range(self.length)]
+
+    def count_true(self) -> int:
+        """Возвращает количество значений True."""
+        return sum(bin(byte).count("1") for byte in self.bits)
+
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+
+class StrColumn:
+    """Столбец строк: общий буфер UTF-8 плюс смещения и длины.
+
+    При обновлении новое значение дописывается в конец буфера, а старые
+    байты освобождаются при копировании столбца (copy/take).
+    """
+
+    type_name = "str"
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+        self.offsets = array("q")
+        self.lengths = array("q")
+        self.nulls: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def _encode(self, value: Any) -> bytes:
+        if value is None:
+            return b""
+        if not isinstance(value, str):
+            raise ValueError(f"Ожидается str, получено: {value!r}")
+        return value.encode("utf-8")
+
+    def append(self, value: Any) -> None:
+        data = self._encode(value)
+        self.offsets.append(len(self.buffer))
+        self.lengths.append(len(data))
+        self.buffer += data
+        if value is None:
+            self.nulls.add(len(self.offsets) - 1)
+
+    def extend(self, values: List[Any]) -> None:
+        if any(type(value) is not str for value in values):
+            for value in values:
+                self.append(value)
+            return
+        if not values:
+            return
+        encoded = [value.encode("utf-8") for value in values]
+        lengths = array("q", map(len, encoded))
+        start = len(self.buffer)
+        self.offsets.extend(accumulate(lengths[:-1], initial=start))
+        self.lengths.extend(lengths)
+        self.buffer += b"".join(encoded)
+
+    def get(self, position: int) -> Any:
+        if self.nulls and position in self.nulls:
+            return None
+        start = self.offsets[position]
+        return self.buffer[start : start + self.lengths[position]].decode("utf-8")
+
+    def get_bytes(self, position: int) -> bytes:
+        start = self.offsets[position]
+        return self.buffer[start : start + self.lengths[position]]
+
+    def set(self, position: int, value: Any) -> None:
+        data = self._encode(value)
+        self.offsets[position] = len(self.buffer)
+        self.lengths[position] = len(data)
+        self.buffer += data
+        if value is None:
+            self.nulls.add(position)
+        else:
+            self.nulls.discard(position)
+
+    def fork(self) -> "StrColumn":
+        """Возвращает копию столбца вместе с освобожденными байтами буфера."""
+        column = StrColumn()
+        column.buffer = bytearray(self.buffer)
+        column.offsets = self.offsets[:]
+        column.lengths = self.lengths[:]
+        column.nulls = set(self.nulls)
+        return column
+
+    def scan(self) -> List[Any]:
+        return [self.get(position) for position in range(len(self.offsets))]
+
+    def nbytes(self) -> int:
+        return len(self.buffer) + 2 * self.offsets.itemsize * len(self.offsets)
+
+
+COLUMN_TYPES = {"int": IntColumn, "bool": BoolColumn, "str": StrColumn}
+
+
+class RowView(MutableMapping):
+    """Запись колоночной таблицы, видимая как словарь.
+
+    Чтение и запись по ключу обращаются напрямую к массивам столбцов,
+    поэтому core.update изменяет таблицу так же, как список словарей.
+    """
+
+    __slots__ = ("_table", "_position")
+
+    def __init__(self, table: "ColumnarTable", position: int) -> None:
+        self._table = table
+        self._position = position
+
+    def __getitem__(self, column: str) -> Any:
+        return self._table.columns[column].get(self._position)
+
+    def __setitem__(self, column: str, value: Any) -> None:
+        self._table.columns[column].set(self._position, value)
+
+    def __delitem__(self, column: str) -> None:
+        raise TypeError("Столбцы колоночной таблицы нельзя удалять из записи")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.columns)
+
+    def __len__(self) -> int:
+        return len(self._table.columns)
+
+    def copy(self) -> Dict[str, Any]:
+        """Возвращает запись в виде обычного словаря."""
+        return dict(self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ColumnarTable:
+    """Таблица, хранящая данные по столбцам.
+
+    Поддерживает операции списка записей, которыми пользуется core
+    (len, индексация, итерация, append, copy), и дополнительно умеет
+    фильтровать записи и отдавать строки для вывода прямо из столбцов.
+    """
+
+    def __init__(self, columns: List[str]) -> None:
+        """Создает пустую таблицу по схеме.
+
+        Args:
+            columns: Список столбцов в формате "имя:тип"
+        """
+        self.column_specs = list(columns)
+        self.columns: Dict[str, Any] = {}
+        for col in columns:
+            col_name, col_type = col.split(":", 1)
+            self.columns[col_name] = COLUMN_TYPES[col_type]()
+        self._length = 0
+        # Позиции удаленных записей (см. tombstones.py)
+        self.deleted: Set[int] = set()
+
+    @classmethod
+    def from_records(
+        cls, columns: List[str], records: Iterable[Mapping[str, Any]]
+    ) -> "ColumnarTable":
+        """Строит колоночную таблицу из записей-словарей.
+
+        Args:
+            columns: Список столбцов в формате "имя:тип"
+            records: Записи таблицы
+
+        Returns:
+            Новая колоночная таблица
+        """
+        table = cls(columns)
+        for record in records:
+            table.append(record)
+        return table
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, position: int) -> RowView:
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("Позиция записи вне таблицы")
+        return RowView(self, position)
+
+    def __iter__(self) -> Iterator[RowView]:
+        for position in range(self._length):
+            yield RowView(self, position)
+
+    def append(self, record: Mapping[str, Any]) -> None:
+        """Добавляет запись в конец таблицы.
+
+        Args:
+            record: Запись (столбец -> значение)
+        """
+        for col_name, column in self.columns.items():
+            column.append(record.get(col_name))
+        self._length += 1
+
+    def extend_columns(self, columns: Dict[str, List[Any]], count: int) -> None:
+        """Добавляет пачку записей, заданную значениями по столбцам.
+
+        Args:
+            columns: Имя столбца -> список значений
+            count: Количество добавляемых записей
+        """
+        for col_name, column in self.columns.items():
+            column.extend(columns.get(col_name, [None] * count))
+        self._length += count
+
+    def take(self, positions: Iterable[int]) -> "ColumnarTable":
+        """Возвращает новую таблицу из записей на заданных позициях.
+
+        Args:
+            positions: Позиции записей в порядке следования
+
+        Returns:
+            Новая колоночная таблица
+        """
+        table = ColumnarTable(self.column_specs)
+        positions = list(positions)
+        for col_name, column in self.columns.items():
+            target = table.columns[col_name]
+            for position in positions:
+                target.append(column.get(position))
+        table._length = len(positions)
+        return table
+
+    def copy(self) -> "ColumnarTable":
+        """Возвращает независимую копию таблицы."""
+        return self.take(range(self._length))
+
+    def fork(self) -> "ColumnarTable":
+        """Возвращает копию таблицы вместе с удаленными записями.
+
+        В отличие от copy, массивы столбцов копируются целиком, без
+        перебора записей, а позиции записей не меняются.
+        """
+        table = ColumnarTable.__new__(ColumnarTable)
+        table.column_specs = self.column_specs
+        table.columns = {name: column.fork() for name, column in self.columns.items()}
+        table._length = self._length
+        table.deleted = set(self.deleted)
+        return table
+
+    def without_positions(self, positions: Set[int]) -> "ColumnarTable":
+        """Возвращает копию таблицы без записей на заданных позициях."""
+        return self.take(p for p in range(self._length) if p not in positions)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Возвращает записи таблицы в виде списка словарей."""
+        names = list(self.columns)
+        columns = [column.scan() for column in self.columns.values()]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def iter_rows(self, column_names: List[str]) -> Iterator[Tuple[Any, ...]]:
+        """Возвращает строки таблицы в виде кортежей значений.
+
+        Args:
+            column_names: Имена столбцов в нужном порядке
+
+        Returns:
+            Итератор кортежей; отсутствующие столбцы дают пустую строку
+        """
+        getters = []
+        for col_name in column_names:
+            column = self.columns.get(col_name)
+            getters.append(column.get if column is not None else lambda _: "")
+        for position in range(self._length):
+            yield tuple(getter(position) for getter in getters)
+
+    def _getter(self, column_name: str) -> Any:
+        column = self.columns.get(column_name)
+        # Как и для словаря, отсутствующий столбец дает None
+        return column.get if column is not None else lambda _: None
+
+    def iter_match_positions(
+        self,
+        conditions: List[Any],
+        candidates: Iterable[int],
+    ) -> Iterator[int]:
+        """Лениво отдает позиции, удовлетворяющие условиям WHERE.
+
+        В отличие от match_positions, столбцы не читаются целиком: каждая
+        позиция проверяется скомпилированным предикатом, поэтому перебор
+        можно прервать.
+
+        Args:
+            conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+            candidates: Позиции-кандидаты в порядке возрастания
+
+        Returns:
+            Итератор подходящих позиций
+        """
+        predicate = compile_position_predicate(conditions, self._getter)
+        return filter(predicate, candidates)
+
+    def match_positions(
+        self,
+        conditions: List[Any],
+        candidates: Iterable[int],
+    ) -> List[int]:
+        """Фильтрует позиции по условиям, сравнивая значения прямо в столбцах.
+
+        Каждое сравнение применяется ко всему списку позиций сразу,
+        а AND/OR/NOT объединяют получившиеся списки.
+
+        Args:
+            conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+            candidates: Позиции-кандидаты в порядке возрастания
+
+        Returns:
+            Позиции записей, удовлетворяющих условиям
+        """
+        return filter_positions(
+            conditions, list(candidates), self._filter_comparison
+        )
+
+    def _filter_comparison(
+        self, condition: Tuple[str, str, Any], positions: List[int]
+    ) -> List[int]:
+        col_name, op, value = condition
+        compare = COMPARISON_OPERATORS[op]
+        column = self.columns.get(col_name)
+
+        if column is None:
+            # Как и для словаря, отсутствующий столбец дает None
+            return positions if _safe_compare(compare, None, value) else []
+
+        is_str_equality = op in ("=", "!=") and isinstance(value, str)
+        if isinstance(column, StrColumn) and is_str_equality:
+            # Строки на равенство сравниваются по байтам без декодирования
+            target = value.encode("utf-8")
+            equal = op == "="
+            nulls = column.nulls
+            return [
+                p
+                for p in positions
+                if (p not in nulls and column.get_bytes(p) == target) == equal
+            ]
+
+        # При широкой выборке столбец читается целиком одним проходом,
+        # при узкой (например, после индекса) - только нужные позиции
+        if 4 * len(positions) >= self._length:
+            get = column.scan().__getitem__
+        else:
+            get = column.get
+        try:
+            return [p for p in positions if compare(get(p), value)]
+        except TypeError:
+            return [p for p in positions if _safe_compare(compare, get(p), value)]
+
+    def nbytes(self) -> int:
+        """Возвращает объем данных столбцов в байтах."""
+        return sum(column.nbytes() for column in self.columns.values())
@@ -7,6 +7,131 @@ DATA_DIR = "data"
 # Типы данных
 VALID_TYPES = {"int", "str", "bool"}
 
+# Режимы хранения таблиц
+STORAGE_JSON = "json"
+STORAGE_LOG = "log"
+STORAGE_BINARY = "binary"
+STORAGE_SEGMENTED = "segmented"
+VALID_STORAGES = {STORAGE_JSON, STORAGE_LOG, STORAGE_BINARY, STORAGE_SEGMENTED}
+
+# Наибольшее количество строк в сегменте таблицы с storage=segmented
+SEGMENT_ROWS = 65536
+# Доля удаленных строк (отмеченных в карте удалений) в сегменте, при
+# которой сегмент переписывается без них при следующей записи таблицы;
+# в памяти таблица с такой долей удаленных записей сжимается сразу
+TOMBSTONE_COMPACT_RATIO = 0.3
+# Если одна команда удаляет больше записей, таблица в памяти сжимается
+# сразу: перестроить индексы один раз дешевле, чем убирать записи по одной
+TOMBSTONE_INDEX_ROWS = 256
+
+# Форматы (кодеки) файлов данных таблиц
+CODEC_JSON = "json"
+CODEC_COMPACT = "compact"
+CODEC_JSONL = "jsonl"
+CODEC_ZLIB = "zlib"
+# Кодек новых таблиц и таблиц, созданных до появления кодеков
+TABLE_CODEC = CODEC_COMPACT
+# Строк в сжатом блоке и уровень сжатия кодека zlib
+CODEC_BLOCK_ROWS = 10000
+CODEC_ZLIB_LEVEL = 6
+
+# Представление таблиц в памяти
+ENGINE_ROWS = "rows"
+ENGINE_COLUMNAR = "columnar"
+VALID_ENGINES = {ENGINE_ROWS, ENGINE_COLUMNAR}
+
+# Размер журнала (в байтах), после которого он сворачивается в базовый файл
+LOG_COMPACT_THRESHOLD = 1024 * 1024
+
+# Количество строк в пачке при импорте из файла
+IMPORT_BATCH_SIZE = 10000
+
+# Количество строк на странице при потоковом выводе select
+SELECT_PAGE_SIZE = 100
+
+# Параллельный просмотр: минимум строк-кандидатов и число частей
+# (0 - по числу ядер)
+PARALLEL_SCAN_MIN_ROWS = 500_000
+PARALLEL_SCAN_WORKERS = 0
+
+# Количество строк в блоке карты зон (статистика min/max по блокам
+# для пропуска при просмотре)
+ZONE_BLOCK_ROWS = 4096
+
+# Статистика таблиц для планировщика: наибольшая выборка строк, число
+# корзин гистограммы, доля изменения количества строк и число версий
+# таблицы, после которых статистика собирается заново при записи
+STATS_SAMPLE_ROWS = 100_000
+STATS_HISTOGRAM_BUCKETS = 16
+STATS_REFRESH_RATIO = 0.1
+STATS_REFRESH_VERSIONS = 100
+# Стоимость для планировщика: проверка строки по условию при просмотре,
+# дополнительная стоимость строки, найденной по индексу (сортировка
+# позиций и обращение не по порядку), и обращение к индексу
+PLANNER_ROW_COST = 1.0
+PLANNER_INDEX_ROW_COST = 2.0
+PLANNER_INDEX_COST = 10.0
+
+# Количество строк в пачке агрегатного select (строки пачки раскладываются
+# по группам и сворачиваются встроенными функциями)
+AGGREGATE_BATCH_ROWS = 4096
+
+# Бюджет кэша результатов select
+QUERY_CACHE_MAX_ENTRIES = 128
+QUERY_CACHE_MAX_BYTES = 16 * 1024 * 1024
+# Результаты select длиннее этого числа строк не кэшируются
+QUERY_CACHE_MAX_ROWS = 10000
+
+# Количество шаблонов в кэше разобранных команд
+STATEMENT_CACHE_MAX_ENTRIES = 256
+
+# Политики сброса измененных таблиц на диск: сразу после каждой операции,
+# только при выходе или каждые N операций (задается числом). Изменения
+# между сбросами сохраняются в журнале предзаписи
+FLUSH_IMMEDIATE = "immediate"
+FLUSH_ON_EXIT = "exit"
+FLUSH_EVERY_OPS = 100
+FLUSH_POLICY = FLUSH_EVERY_OPS
+
+# Журнал предзаписи и его размер (в байтах), после которого таблицы
+# записываются на диск (контрольная точка) и журнал очищается
+WAL_FILE = "db_wal.log"
+WAL_CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+# Каталог файлов блокировок таблиц, журнала, метаданных и присутствия процессов
+LOCK_DIR = ".locks"
+
+# Метрики: включены ли при запуске и префикс имен в формате Prometheus
+METRICS_ENABLED = True
+METRICS_PREFIX = "primitive_db"
+
+# Сервер: адрес по умолчанию, очередь подключений, потоки чтения для
+# select, предельный размер кадра протокола (в байтах) и число команд
+# изменения в одной групповой фиксации журнала предзаписи
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 7433
+SERVER_BACKLOG = 1024
+SERVER_READ_WORKERS = 4
+SERVER_MAX_FRAME = 64 * 1024 * 1024
+SERVER_WRITE_BATCH = 256
+
+# Нагрузочный тест сервера: число соединений, команд на соединение
+# и доля команд изменения
+LOAD_TEST_CONNECTIONS = 200
+LOAD_TEST_REQUESTS = 50
+LOAD_TEST_WRITE_RATIO = 0.1
+
+# Бенчмарки: размеры таблиц, число операций в пакетных замерах (insert,
+# парсеры), строк для format_as_table, повторов замера, файлы результатов
+# и допустимое замедление относительно базовой линии
+BENCH_SIZES = (1000, 100000, 1000000)
+BENCH_OPERATIONS = 1000
+BENCH_FORMAT_ROWS = 1000
+BENCH_REPEAT = 3
+BENCH_RESULTS_FILE = "bench_results.json"
+BENCH_BASELINE_FILE = "bench_baseline.json"
+BENCH_THRESHOLD = 0.2
+
 # Сообщения
 WELCOME_MESSAGE = "***База данных***"
 EXIT_MESSAGE = "Выход из программы..."
@@ -17,11 +142,38 @@ COMMAND_HELP = "help"
 COMMAND_CREATE_TABLE = "create_table"
 COMMAND_LIST_TABLES = "list_tables"
 COMMAND_DROP_TABLE = "drop_table"
+COMMAND_CREATE_INDEX = "create_index"
 COMMAND_INFO = "info"
 COMMAND_INSERT = "insert"
 COMMAND_SELECT = "select"
 COMMAND_UPDATE = "update"
 COMMAND_DELETE = "delete"
+COMMAND_IMPORT = "import"
+COMMAND_FLUSH = "flush"
+COMMAND_STATS = "stats"
+COMMAND_VACUUM = "vacuum"
+COMMAND_ANALYZE = "analyze"
+COMMAND_EXPLAIN = "explain"
+COMMANDS = {
+    COMMAND_EXIT, COMMAND_HELP, COMMAND_CREATE_TABLE, COMMAND_LIST_TABLES,
+    COMMAND_DROP_TABLE, COMMAND_CREATE_INDEX, COMMAND_INFO, COMMAND_INSERT,
+    COMMAND_SELECT, COMMAND_UPDATE, COMMAND_DELETE, COMMAND_IMPORT,
+    COMMAND_FLUSH, COMMAND_STATS, COMMAND_VACUUM, COMMAND_ANALYZE,
+    COMMAND_EXPLAIN,
+}
+# Команды, которые читают или изменяют таблицу из своего первого аргумента
+# (берут на нее разделяемую или исключительную блокировку)
+READ_COMMANDS = {COMMAND_SELECT, COMMAND_INFO, COMMAND_ANALYZE, COMMAND_EXPLAIN}
+WRITE_COMMANDS = {
+    COMMAND_CREATE_TABLE, COMMAND_DROP_TABLE, COMMAND_CREATE_INDEX,
+    COMMAND_INSERT, COMMAND_UPDATE, COMMAND_DELETE, COMMAND_IMPORT,
+    COMMAND_VACUUM,
+}
+# Команды, у которых первый аргумент - имя таблицы
+TABLE_COMMANDS = {
+    COMMAND_CREATE_TABLE, COMMAND_DROP_TABLE, COMMAND_CREATE_INDEX,
+    COMMAND_INFO, COMMAND_IMPORT, COMMAND_VACUUM, COMMAND_ANALYZE,
+}
 
 # Ошибки
 ERROR_TABLE_EXISTS = 'Ошибка: Таблица "{table_name}" уже существует.'
@@ -1,11 +1,69 @@
 ﻿"""Основная логика работы с таблицами и данными."""
 
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from bisect import bisect_right
+from itertools import islice
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from prettytable import PrettyTable
 
-from .constants import VALID_TYPES
-from .decorators import confirm_action, handle_db_errors, log_time, memoize
+from .binary import BinaryTable
+from .codec import CODECS
+from .columnar import ColumnarTable
+from .constants import (
+    ENGINE_ROWS,
+    SELECT_PAGE_SIZE,
+    STORAGE_BINARY,
+    STORAGE_JSON,
+    TABLE_CODEC,
+    VALID_ENGINES,
+    VALID_STORAGES,
+    VALID_TYPES,
+)
+from .decorators import confirm_action, handle_db_errors, log_time
+from .index import (
+    INDEX_HASH,
+    INDEX_SORTED,
+    VALID_INDEX_TYPES,
+    Condition,
+    Index,
+    candidate_positions,
+)
+from .metrics import metrics
+from .parallel import parallel_match_positions, scan_positions
+from .predicate import compile_predicate
+from .tombstones import (
+    deleted_positions,
+    iter_live,
+    live_positions,
+    mark_deleted,
+    skip_deleted,
+)
+
+# Условие WHERE: словарь равенств {столбец: значение}
+# или список условий [(столбец, оператор, значение)]
+WhereClause = Union[Dict[str, Any], List[Condition]]
+
+# Данные таблицы: список записей, колоночная или бинарная таблица
+TableData = Union[List[Dict[str, Any]], ColumnarTable, BinaryTable]
+
+# Параметры таблицы: имя -> (значение по умолчанию, допустимые значения)
+TABLE_OPTIONS = {
+    "storage": (STORAGE_JSON, VALID_STORAGES),
+    "engine": (ENGINE_ROWS, VALID_ENGINES),
+    # Формат файла данных; допустимы все подключенные кодеки
+    "codec": (TABLE_CODEC, CODECS),
+}
 
 
 @handle_db_errors
@@ -13,6 +71,7 @@ def create_table(
     metadata: Dict[str, Any],
     table_name: str,
     columns: List[str],
+    options: Optional[Dict[str, str]] = None,
 ) -> Tuple[Dict[str, Any], str]:
     """Создает новую таблицу в метаданных.
 
@@ -20,6 +79,8 @@ def create_table(
         metadata: Текущие метаданные базы данных
         table_name: Имя создаваемой таблицы
         columns: Список столбцов в формате "имя:тип"
+        options: Параметры таблицы, например {"storage": "log", "engine": "columnar",
+            "codec": "zlib"}
 
     Returns:
         Кортеж (обновленные_метаданные, сообщение_о_результате)
@@ -52,10 +113,39 @@ def create_table(
 
         processed_columns.append(f"{col_name}:{col_type}")
 
+    # Обрабатываем параметры таблицы
+    options = options or {}
+    for option in options:
+        if option not in TABLE_OPTIONS:
+            return metadata, f"Неизвестный параметр таблицы: {option}."
+
+    table_options = {}
+    for option, (default, valid_values) in TABLE_OPTIONS.items():
+        value = options.get(option, default).lower()
+        if value not in valid_values:
+            valid_values_str = ", ".join(sorted(valid_values))
+            msg = f"Некорректное значение параметра {option}: {value}. "
+            msg += f"Допустимые значения: {valid_values_str}"
+            return metadata, msg
+        table_options[option] = value
+
+    # ID индексируется всегда; в бинарном формате ID строк возрастают,
+    # и запись по ID находится двоичным поиском по файлу без индекса
+    if table_options["storage"] == STORAGE_BINARY:
+        indexes = {}
+    else:
+        indexes = {"ID": INDEX_HASH}
+
     # Добавляем таблицу в метаданные
     metadata[table_name] = {
         "columns": processed_columns,
         "data": [],  # Пока пустой список для будущих данных
+        **table_options,
+        "indexes": indexes,
+        "next_id": 1,  # Следующий ID, ID удаленных записей не переиспользуются
+        # Отличает таблицу от удаленной ранее таблицы с тем же именем,
+        # чтобы журнал предзаписи не применил к ней чужие операции
+        "created": time.time_ns(),
     }
 
     # Формируем сообщение о успешном создании
@@ -84,6 +174,51 @@ def drop_table(metadata: Dict[str, Any], table_name: str) -> Tuple[Dict[str, Any
     return metadata, f'Таблица "{table_name}" успешно удалена.'
 
 
+@handle_db_errors
+def create_index(
+    metadata: Dict[str, Any],
+    table_name: str,
+    column: str,
+    kind: str = INDEX_HASH,
+) -> Tuple[Dict[str, Any], str]:
+    """Добавляет индекс по столбцу в метаданные таблицы.
+
+    Args:
+        metadata: Текущие метаданные базы данных
+        table_name: Имя таблицы
+        column: Имя индексируемого столбца
+        kind: Тип индекса: "hash" (равенство) или "sorted" (диапазоны, только int)
+
+    Returns:
+        Кортеж (обновленные_метаданные, сообщение_о_результате)
+    """
+    if table_name not in metadata:
+        return metadata, f'Ошибка: Таблица "{table_name}" не существует.'
+
+    column_types = dict(col.split(":", 1) for col in metadata[table_name]["columns"])
+    if column not in column_types:
+        return metadata, f'Ошибка: Столбец "{column}" не существует.'
+
+    kind = kind.lower()
+    if kind not in VALID_INDEX_TYPES:
+        valid_kinds_str = ", ".join(sorted(VALID_INDEX_TYPES))
+        msg = f"Некорректный тип индекса: {kind}. "
+        msg += f"Допустимые типы: {valid_kinds_str}"
+        return metadata, msg
+
+    if kind == INDEX_SORTED and column_types[column] != "int":
+        msg = "Ошибка: Сортированный индекс поддерживается только для столбцов int."
+        return metadata, msg
+
+    indexes = metadata[table_name].setdefault("indexes", {})
+    if column in indexes:
+        return metadata, f'Ошибка: Индекс по столбцу "{column}" уже существует.'
+
+    indexes[column] = kind
+    msg = f'Индекс по столбцу "{column}" таблицы "{table_name}" успешно создан.'
+    return metadata, msg
+
+
 @handle_db_errors
 def list_tables(metadata: Dict[str, Any]) -> str:
     """Возвращает строку со списком всех таблиц.
@@ -147,21 +282,205 @@ def validate_value_type(value: Any, expected_type: str) -> bool:
         return False
 
 
+def check_set_clause(columns: List[str], set_clause: Dict[str, Any]) -> Optional[str]:
+    """Проверяет новые значения update по схеме таблицы.
+
+    Args:
+        columns: Столбцы таблицы в формате "имя:тип"
+        set_clause: Что обновлять (столбец -> новое значение)
+
+    Returns:
+        Сообщение об ошибке или None, если все значения подходят
+    """
+    types = dict(column.split(":", 1) for column in columns)
+    for col_name, value in set_clause.items():
+        if col_name not in types:
+            return f'Ошибка: Столбец "{col_name}" не существует.'
+        if not validate_value_type(value, types[col_name]):
+            msg = f"Ошибка: Неверный тип для столбца {col_name}. "
+            msg += f"Ожидается {types[col_name]}."
+            return msg
+    return None
+
+
+def coerce_value(value: Any, expected_type: str) -> Any:
+    """Приводит значение из файла импорта к типу столбца.
+
+    Строки (например, из CSV) преобразуются в int или bool, значения
+    остальных типов только проверяются.
+
+    Args:
+        value: Исходное значение
+        expected_type: Ожидаемый тип (int, str, bool)
+
+    Returns:
+        Значение ожидаемого типа
+
+    Raises:
+        ValueError: Если значение нельзя привести к типу
+    """
+    if isinstance(value, str) and expected_type != "str":
+        text = value.strip().lower()
+        if expected_type == "int":
+            return int(text)
+        if text in ("true", "1"):
+            return True
+        if text in ("false", "0"):
+            return False
+        raise ValueError(f"Ожидается bool, получено: {value!r}")
+
+    if not validate_value_type(value, expected_type):
+        raise ValueError(f"Ожидается {expected_type}, получено: {value!r}")
+    return value
+
+
+def normalize_where(where_clause: Optional[WhereClause]) -> List[Condition]:
+    """Приводит условие WHERE к списку условий сравнения.
+
+    Args:
+        where_clause: Словарь равенств или список условий
+
+    Returns:
+        Список кортежей (столбец, оператор, значение)
+    """
+    if not where_clause:
+        return []
+    if isinstance(where_clause, dict):
+        return [(column, "=", value) for column, value in where_clause.items()]
+    return list(where_clause)
+
+
+def record_matches(record: Dict[str, Any], conditions: List[Condition]) -> bool:
+    """Проверяет, удовлетворяет ли запись условиям WHERE.
+
+    Значения несравнимых типов (например, None и число) условию
+    не удовлетворяют. Для проверки многих записей лучше один раз
+    скомпилировать условия через compile_predicate.
+
+    Args:
+        record: Запись таблицы
+        conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+
+    Returns:
+        True если условия выполнены, иначе False
+    """
+    return compile_predicate(conditions)(record)
+
+
+def find_matching_positions(
+    table_data: TableData,
+    where_clause: Optional[WhereClause] = None,
+    indexes: Optional[Dict[str, Index]] = None,
+) -> List[int]:
+    """Возвращает позиции записей, удовлетворяющих условию WHERE.
+
+    Если по одному из столбцов условия есть индекс, проверяются только
+    записи из него, иначе просматривается вся таблица; удаленные записи
+    (см. tombstones.py) отбрасываются из найденных. Много кандидатов
+    просматриваются параллельно (см. parallel_match_positions).
+
+    Args:
+        table_data: Данные таблицы
+        where_clause: Условие для поиска записей
+        indexes: Индексы таблицы (столбец -> индекс)
+
+    Returns:
+        Список позиций найденных записей в порядке возрастания
+    """
+    conditions = normalize_where(where_clause)
+    candidates = candidate_positions(len(table_data), conditions, indexes)
+    if metrics.enabled:
+        metrics.inc("rows_scanned_total", len(candidates))
+    positions = parallel_match_positions(table_data, conditions, candidates)
+    if positions is None:
+        positions = scan_positions(table_data, conditions, candidates)
+    return skip_deleted(table_data, positions)
+
+
+def find_matching_ids(
+    table_data: TableData,
+    where_clause: Optional[WhereClause] = None,
+    indexes: Optional[Dict[str, Index]] = None,
+) -> List[int]:
+    """Возвращает ID записей, удовлетворяющих условию WHERE.
+
+    Args:
+        table_data: Данные таблицы
+        where_clause: Условие для поиска записей
+        indexes: Индексы таблицы (столбец -> индекс)
+
+    Returns:
+        Список ID найденных записей
+    """
+    positions = find_matching_positions(table_data, where_clause, indexes)
+    return [table_data[position].get("ID") for position in positions]
+
+
+def bump_version(metadata: Dict[str, Any], table_name: str) -> int:
+    """Увеличивает версию таблицы после изменения ее данных.
+
+    По версии кэш результатов select отличает актуальные записи от устаревших.
+
+    Args:
+        metadata: Метаданные базы данных
+        table_name: Имя таблицы
+
+    Returns:
+        Новая версия таблицы
+    """
+    table_meta = metadata[table_name]
+    table_meta["version"] = table_meta.get("version", 0) + 1
+    return table_meta["version"]
+
+
+def allocate_ids(
+    metadata: Dict[str, Any],
+    table_name: str,
+    table_data: TableData,
+    count: int = 1,
+) -> int:
+    """Выделяет последовательные ID из счетчика таблицы в метаданных.
+
+    Счетчик "next_id" только растет, поэтому ID удаленных записей (в том
+    числе последней) повторно не выдаются. Для таблиц, созданных до появления
+    счетчика, он один раз вычисляется по максимальному ID в данных.
+
+    Args:
+        metadata: Метаданные базы данных (счетчик в них увеличивается)
+        table_name: Имя таблицы
+        table_data: Данные таблицы
+        count: Сколько ID выделить
+
+    Returns:
+        Первый из выделенных ID
+    """
+    table_meta = metadata[table_name]
+    if "next_id" not in table_meta:
+        last_id = max((record.get("ID", 0) for record in table_data), default=0)
+        table_meta["next_id"] = last_id + 1
+
+    first_id = table_meta["next_id"]
+    table_meta["next_id"] = first_id + count
+    return first_id
+
+
 @handle_db_errors
 @log_time
 def insert(
     metadata: Dict[str, Any],
-    table_data: List[Dict[str, Any]],
+    table_data: TableData,
     table_name: str,
     values: List[Any],
-) -> Tuple[List[Dict[str, Any]], str]:
+    indexes: Optional[Dict[str, Index]] = None,
+) -> Tuple[TableData, str]:
     """Добавляет новую запись в таблицу.
 
     Args:
-        metadata: Метаданные базы данных
+        metadata: Метаданные базы данных (счетчик ID в них увеличивается)
         table_data: Данные таблицы
         table_name: Имя таблицы
         values: Список значений для вставки
+        indexes: Индексы таблицы, обновляемые вместе с данными
 
     Returns:
         Кортеж (обновленные_данные_таблицы, сообщение)
@@ -178,15 +497,8 @@ def insert(
         got = len(values)
         return table_data, f'Ошибка: Ожидается {expected} значений, получено {got}.'
 
-    # Генерируем новый ID
-    if table_data:
-        last_id = max(record.get("ID", 0) for record in table_data)
-        new_id = last_id + 1
-    else:
-        new_id = 1
-
     # Создаем новую запись
-    new_record = {"ID": new_id}
+    new_record = {}
 
     # Валидируем и добавляем значения
     for i, (col_schema, value) in enumerate(zip(columns_schema, values)):
@@ -200,48 +512,277 @@ def insert(
 
         new_record[col_name] = value
 
+    # Генерируем новый ID из счетчика таблицы
+    new_id = allocate_ids(metadata, table_name, table_data)
+    new_record = {"ID": new_id, **new_record}
+
     # Добавляем запись
     table_data.append(new_record)
+    for idx in (indexes or {}).values():
+        idx.add(new_record.get(idx.column), len(table_data) - 1)
     msg = f'Запись с ID={new_id} успешно добавлена в таблицу "{table_name}".'
     return table_data, msg
 
 
+def _coerce_column(
+    values: List[Any], col_type: str, col_name: str, first_row_number: int
+) -> List[Any]:
+    """Приводит значения одного столбца пачки к типу столбца.
+
+    Однотипные столбцы (например, строки из CSV для str) проверяются одним
+    проходом без преобразования.
+
+    Raises:
+        ValueError: С номером строки, если значение нельзя привести к типу
+    """
+    python_type = {"int": int, "str": str}.get(col_type)
+    if python_type and all(type(value) is python_type for value in values):
+        return values
+
+    if col_type == "int" and all(type(value) is str for value in values):
+        # Числа из CSV преобразуются одним вызовом map, а при ошибке
+        # значения проверяются построчно ради точного сообщения
+        try:
+            return list(map(int, values))
+        except ValueError:
+            pass
+
+    coerced = []
+    for row_number, value in enumerate(values, start=first_row_number):
+        try:
+            coerced.append(coerce_value(value, col_type))
+        except ValueError as e:
+            raise ValueError(f"Строка {row_number}, столбец {col_name}: {e}")
+    return coerced
+
+
+@handle_db_errors
+def insert_many(
+    metadata: Dict[str, Any],
+    table_data: TableData,
+    table_name: str,
+    rows: List[Dict[str, Any]],
+    indexes: Optional[Dict[str, Index]] = None,
+    first_row_number: int = 1,
+) -> Tuple[TableData, int]:
+    """Добавляет пачку записей в таблицу.
+
+    Сначала проверяются и приводятся к типам все строки пачки, и только
+    затем выделяются ID и записи добавляются: ошибочная строка отклоняет
+    пачку целиком, не затрагивая таблицу. Столбец ID из входных строк
+    игнорируется, ID выдаются из счетчика таблицы.
+
+    Args:
+        metadata: Метаданные базы данных (счетчик ID в них увеличивается)
+        table_data: Данные таблицы
+        table_name: Имя таблицы
+        rows: Строки пачки (столбец -> значение)
+        indexes: Индексы таблицы, обновляемые вместе с данными
+        first_row_number: Номер первой строки пачки для сообщений об ошибках
+
+    Returns:
+        Кортеж (обновленные_данные_таблицы, количество_добавленных_записей)
+
+    Raises:
+        ValueError: Если строка не соответствует схеме таблицы
+    """
+    if table_name not in metadata:
+        raise ValueError(f'Таблица "{table_name}" не существует.')
+
+    columns_schema = [
+        col.split(":", 1) for col in metadata[table_name]["columns"][1:]
+    ]
+    column_names = [col_name for col_name, _ in columns_schema]
+
+    # Проверяем всю пачку до изменения таблицы, столбец за столбцом
+    columns_values = []
+    for col_name, col_type in columns_schema:
+        try:
+            values = [row[col_name] for row in rows]
+        except KeyError:
+            for row_number, row in enumerate(rows, start=first_row_number):
+                if col_name not in row:
+                    msg = f"Строка {row_number}: нет столбца {col_name}."
+                    raise ValueError(msg)
+            raise
+
+        values = _coerce_column(values, col_type, col_name, first_row_number)
+        columns_values.append(values)
+
+    # Выделяем ID одним блоком и добавляем записи
+    count = len(rows)
+    first_id = allocate_ids(metadata, table_name, table_data, count)
+    ids = range(first_id, first_id + count)
+    record_names = ["ID"] + column_names
+    values_by_column = dict(zip(record_names, [list(ids), *columns_values]))
+    first_position = len(table_data)
+    if isinstance(table_data, ColumnarTable):
+        table_data.extend_columns(values_by_column, count)
+    else:
+        for row in zip(ids, *columns_values):
+            table_data.append(dict(zip(record_names, row)))
+
+    for idx in (indexes or {}).values():
+        values = values_by_column.get(idx.column, [None] * count)
+        for position, value in enumerate(values, start=first_position):
+            idx.add(value, position)
+
+    return table_data, count
+
+
 @handle_db_errors
 @log_time
-@memoize
 def select(
-    table_data: List[Dict[str, Any]],
-    where_clause: Optional[Dict[str, Any]] = None,
-) -> List[Dict[str, Any]]:
+    table_data: TableData,
+    where_clause: Optional[WhereClause] = None,
+    indexes: Optional[Dict[str, Index]] = None,
+) -> TableData:
     """Выбирает записи из таблицы.
 
     Args:
         table_data: Данные таблицы
         where_clause: Условие фильтрации
+        indexes: Индексы таблицы (столбец -> индекс)
 
     Returns:
         Отфильтрованный список записей
     """
-    if not where_clause:
+    if not where_clause and not deleted_positions(table_data):
+        if metrics.enabled:
+            metrics.inc("rows_scanned_total", len(table_data))
+            metrics.inc("rows_returned_total", len(table_data))
         return table_data.copy()
 
     # Фильтруем записи
-    filtered = []
-    for record in table_data:
-        match = True
-        for column, expected_value in where_clause.items():
-            if record.get(column) != expected_value:
-                match = False
-                break
-        if match:
-            filtered.append(record.copy())
+    positions = find_matching_positions(table_data, where_clause, indexes)
+    if metrics.enabled:
+        metrics.inc("rows_returned_total", len(positions))
+    return [table_data[position].copy() for position in positions]
+
+
+def iter_select(
+    table_data: TableData,
+    where_clause: Optional[WhereClause] = None,
+    indexes: Optional[Dict[str, Index]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Iterator[Mapping[str, Any]]:
+    """Лениво выбирает записи из таблицы с учетом LIMIT и OFFSET.
+
+    Записи проверяются по одной и отдаются сразу, а просмотр прекращается,
+    как только набрано limit записей; без LIMIT большая таблица
+    просматривается параллельно. Записи не копируются, поэтому
+    вызывающий код не должен их изменять.
+
+    Args:
+        table_data: Данные таблицы
+        where_clause: Условие фильтрации
+        indexes: Индексы таблицы (столбец -> индекс)
+        limit: Максимальное количество записей (None - без ограничения)
+        offset: Сколько подходящих записей пропустить
 
-    return filtered
+    Returns:
+        Итератор записей в порядке следования в таблице
+    """
+    conditions = normalize_where(where_clause)
+    candidates = candidate_positions(len(table_data), conditions, indexes)
+
+    parallel = None
+    if conditions and limit is None:
+        parallel = parallel_match_positions(table_data, conditions, candidates)
+
+    if not conditions:
+        matches: Iterable[int] = candidates
+    elif parallel is not None:
+        matches = parallel
+    elif isinstance(table_data, ColumnarTable):
+        if limit is None:
+            # Без LIMIT быстрее отфильтровать столбцы целиком
+            matches = table_data.match_positions(conditions, candidates)
+        else:
+            matches = table_data.iter_match_positions(conditions, candidates)
+    elif isinstance(table_data, BinaryTable):
+        # Бинарная таблица читает из файла только поля условия
+        matches = table_data.iter_match_positions(conditions, candidates)
+    else:
+        predicate = compile_predicate(conditions)
+        matches = (
+            position for position in candidates if predicate(table_data[position])
+        )
+    # Удаленные записи (см. tombstones.py) отбрасываются из найденных
+    matches = iter_live(table_data, matches)
+
+    stop = None if limit is None else offset + limit
+    returned = 0
+    position = -1
+    for position in islice(matches, offset, stop):
+        returned += 1
+        yield table_data[position]
+
+    if metrics.enabled:
+        # При досрочной остановке по LIMIT просмотрены кандидаты
+        # до последней отданной записи
+        scanned = len(candidates)
+        if limit is not None and returned == limit:
+            scanned = bisect_right(candidates, position)
+        metrics.inc("rows_scanned_total", scanned)
+        metrics.inc("rows_returned_total", returned)
+
+
+def iter_format_as_table(
+    records: Iterable[Mapping[str, Any]],
+    columns: List[str],
+    page_size: int = SELECT_PAGE_SIZE,
+) -> Iterator[str]:
+    """Форматирует записи в таблицу PrettyTable постранично.
+
+    Каждая страница отдается, как только набрано page_size записей, поэтому
+    первые строки выводятся сразу, а весь результат не держится в памяти.
+    Ширина столбцов следующих страниц не меньше, чем у первой.
+
+    Args:
+        records: Итерируемые записи
+        columns: Список столбцов в формате "имя:тип"
+        page_size: Количество записей на странице
+
+    Returns:
+        Итератор строк - фрагментов таблицы
+    """
+    column_names = [col.split(":", 1)[0] for col in columns]
+    records = iter(records)
+    min_width: Optional[Dict[str, int]] = None
+
+    while True:
+        page = [
+            [record.get(col_name, "") for col_name in column_names]
+            for record in islice(records, page_size)
+        ]
+        if not page:
+            break
+
+        table = PrettyTable()
+        table.field_names = column_names
+        if min_width is None:
+            min_width = {}
+            for i, col_name in enumerate(column_names):
+                values_width = max(len(str(row[i])) for row in page)
+                min_width[col_name] = max(len(col_name), values_width)
+            table.add_rows(page)
+            yield table.get_string()
+        else:
+            # Продолжение таблицы: без заголовка и верхней рамки
+            table.header = False
+            table.min_width = min_width
+            table.add_rows(page)
+            yield table.get_string().split("\n", 1)[1]
+
+    if min_width is None:
+        yield "Записей не найдено."
 
 
 @handle_db_errors
 def format_as_table(
-    records: List[Dict[str, Any]],
+    records: TableData,
     columns: List[str],
 ) -> str:
     """Форматирует записи в виде таблицы PrettyTable.
@@ -268,88 +809,87 @@ def format_as_table(
     # Добавляем заголовки
     table.field_names = column_names
 
-    # Добавляем данные
-    for record in records:
-        row = []
-        for col_name in column_names:
-            row.append(record.get(col_name, ""))
-        table.add_row(row)
+    # Добавляем данные (колоночная таблица отдает строки прямо из столбцов)
+    if isinstance(records, ColumnarTable):
+        for row in records.iter_rows(column_names):
+            table.add_row(list(row))
+    else:
+        for record in records:
+            row = []
+            for col_name in column_names:
+                row.append(record.get(col_name, ""))
+            table.add_row(row)
 
     return table.get_string()
 
 
 @handle_db_errors
 def update(
-    table_data: List[Dict[str, Any]],
+    table_data: TableData,
     set_clause: Dict[str, Any],
-    where_clause: Dict[str, Any],
-) -> Tuple[List[Dict[str, Any]], int]:
+    where_clause: WhereClause,
+    indexes: Optional[Dict[str, Index]] = None,
+) -> Tuple[TableData, int]:
     """Обновляет записи в таблице.
 
     Args:
         table_data: Данные таблицы
         set_clause: Что обновлять (столбец -> новое значение)
         where_clause: Условие для поиска записей
+        indexes: Индексы таблицы, обновляемые вместе с данными
 
     Returns:
         Кортеж (обновленные_данные, количество_обновленных_записей)
     """
-    updated_count = 0
+    indexes = indexes or {}
+    positions = find_matching_positions(table_data, where_clause, indexes)
 
-    for record in table_data:
-        # Проверяем условие WHERE
-        match = True
-        for column, expected_value in where_clause.items():
-            if record.get(column) != expected_value:
-                match = False
-                break
+    # У столбца может быть и индекс, и карта зон
+    column_indexes: Dict[str, List[Index]] = {}
+    for idx in indexes.values():
+        if idx.column in set_clause:
+            column_indexes.setdefault(idx.column, []).append(idx)
 
-        if match:
-            # Обновляем запись
-            for column, new_value in set_clause.items():
-                record[column] = new_value
-            updated_count += 1
+    for position in positions:
+        record = table_data[position]
+        # Обновляем запись и перекладываем ее в индексах
+        for column, new_value in set_clause.items():
+            old_value = record.get(column)
+            record[column] = new_value
+            for idx in column_indexes.get(column, ()):
+                idx.remove(old_value, position)
+                idx.add(new_value, position)
 
-    return table_data, updated_count
+    return table_data, len(positions)
 
 
 @handle_db_errors
 @confirm_action("удаление записей")
 def delete(
-    table_data: List[Dict[str, Any]],
-    where_clause: Dict[str, Any],
-) -> Tuple[List[Dict[str, Any]], int]:
+    table_data: TableData,
+    where_clause: WhereClause,
+    indexes: Optional[Dict[str, Index]] = None,
+) -> Tuple[TableData, int]:
     """Удаляет записи из таблицы.
 
+    Записи не вырезаются из таблицы, а отмечаются удаленными и убираются
+    из индексов (см. tombstones.py), поэтому остальные записи не
+    сдвигаются и индексы не перестраиваются.
+
     Args:
         table_data: Данные таблицы
         where_clause: Условие для поиска записей
+        indexes: Индексы таблицы, обновляемые вместе с данными
 
     Returns:
         Кортеж (обновленные_данные, количество_удаленных_записей)
     """
     if not where_clause:
         # Без условия WHERE удаляем все
-        deleted_count = len(table_data)
-        return [], deleted_count
-
-    # Фильтруем записи, которые НЕ соответствуют условию
-    filtered = []
-    deleted_count = 0
-
-    for record in table_data:
-        match = True
-        for column, expected_value in where_clause.items():
-            if record.get(column) != expected_value:
-                match = False
-                break
-
-        if match:
-            deleted_count += 1
-        else:
-            filtered.append(record)
-
-    return filtered, deleted_count
+        positions = list(live_positions(table_data))
+    else:
+        positions = find_matching_positions(table_data, where_clause, indexes)
+    return mark_deleted(table_data, positions, indexes or {}), len(positions)
 
 
 if __name__ == "__main__":
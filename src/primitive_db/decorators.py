@@ -1,9 +1,25 @@
 """Декораторы для улучшения кода базы данных."""
 
 import functools
+import inspect
 import time
 from typing import Any, Callable, Dict
 
+from .metrics import metrics
+
+# Отвечать ли на запросы подтверждения автоматически (пакетный режим)
+_auto_confirm = False
+
+
+def set_auto_confirm(enabled: bool) -> None:
+    """Включает или выключает автоматическое подтверждение операций.
+
+    Args:
+        enabled: True - confirm_action не спрашивает пользователя
+    """
+    global _auto_confirm
+    _auto_confirm = enabled
+
 
 def handle_db_errors(func: Callable) -> Callable:
     """Декоратор для обработки ошибок базы данных.
@@ -47,6 +63,9 @@ def confirm_action(action_name: str) -> Callable:
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _auto_confirm:
+                return func(*args, **kwargs)
+
             print(f'Вы уверены, что хотите выполнить "{action_name}"? [y/n]: ', end="")
             response = input().strip().lower()
             
@@ -65,17 +84,29 @@ def confirm_action(action_name: str) -> Callable:
 
 
 def log_time(func: Callable) -> Callable:
-    """Декоратор для замера времени выполнения функции."""
+    """Декоратор для замера времени выполнения функции.
+
+    Время записывается в гистограмму operation_seconds реестра метрик
+    с метками op (имя функции) и table (аргумент table_name, если он есть).
+    При выключенных метриках функция вызывается без замера.
+    """
+    parameters = list(inspect.signature(func).parameters)
+    table_index = parameters.index("table_name") if "table_name" in parameters else None
 
     @functools.wraps(func)
     def wrapper(*args: Any, **kwargs: Any) -> Any:
-        start_time = time.monotonic()
-        result = func(*args, **kwargs)
-        end_time = time.monotonic()
+        if not metrics.enabled:
+            return func(*args, **kwargs)
 
-        elapsed = end_time - start_time
-        print(f"Функция '{func.__name__}' выполнилась за {elapsed:.3f} секунд.")
-        return result
+        start_time = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            table = kwargs.get("table_name")
+            if table is None and table_index is not None and table_index < len(args):
+                table = args[table_index]
+            metrics.observe("operation_seconds", elapsed, op=func.__name__, table=table)
 
     return wrapper
 
@@ -145,7 +176,7 @@ if __name__ == "__main__":
         return "результат"
 
     @log_time
-    def test_timing():
+    def test_timing(table_name: str):
         time.sleep(0.1)
         return "готово"
 
@@ -174,3 +205,8 @@ if __name__ == "__main__":
 
     print(f"Первый вызов: {cacher('data_key', get_data)}")
     print(f"Второй вызов: {cacher('data_key', get_data)}")
+
+    # Тест замера времени (время попадает в реестр метрик)
+    print("\n4. Тест замера времени:")
+    test_timing("books")
+    print(metrics.format_summary())
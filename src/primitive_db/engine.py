@@ -1,9 +1,55 @@
 """Модуль движка базы данных."""
 
+import argparse
+import csv
+import os
 import shlex
-from typing import List
-
-from . import core, parser, utils
+import shutil
+import sys
+import time
+from contextlib import ExitStack
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from . import aggregate, core, index, locks, planner, segments, tombstones, utils
+from .binary import BinaryTable
+from .cache import query_cache
+from .columnar import ColumnarTable
+from .constants import (
+    COMMAND_EXPLAIN,
+    COMMAND_SELECT,
+    COMMANDS,
+    ENGINE_COLUMNAR,
+    ENGINE_ROWS,
+    FLUSH_ON_EXIT,
+    IMPORT_BATCH_SIZE,
+    LOG_COMPACT_THRESHOLD,
+    QUERY_CACHE_MAX_ROWS,
+    READ_COMMANDS,
+    STORAGE_BINARY,
+    STORAGE_JSON,
+    STORAGE_LOG,
+    STORAGE_SEGMENTED,
+    TABLE_CODEC,
+    TABLE_COMMANDS,
+    WAL_CHECKPOINT_BYTES,
+    WRITE_COMMANDS,
+)
+from .decorators import set_auto_confirm
+from .metrics import metrics
+from .session import parse_flush_policy, session
+from .statements import STATEMENT_COMMANDS, Statement, statement_cache
+from .wal import make_record, wal
 
 META_FILE = "db_meta.json"
 DATA_DIR = "data"
@@ -16,30 +62,102 @@ def print_help() -> None:
     msg = "<command> insert into <имя_таблицы> values (<значение1>, ...)"
     msg += " - создать запись."
     print(msg)
-    msg = "<command> select from <имя_таблицы> where <столбец> = <значение>"
-    msg += " - прочитать записи."
+    msg = "<command> select from <имя_таблицы> where <столбец> <оператор> <значение>"
+    msg += " - прочитать записи (операторы: =, !=, >, <, >=, <=)."
+    print(msg)
+    msg = "<command> ... where <условие> and|or <условие>, not <условие>, (...)"
+    msg += " - составные условия для select, update и delete."
     print(msg)
     print("<command> select from <имя_таблицы> - прочитать все записи.")
+    msg = "<command> select from <имя_таблицы> [where ...] limit <N> offset <M>"
+    msg += " - прочитать часть записей."
+    print(msg)
+    msg = "<command> select count(*), sum|avg|min|max(<столбец>), ..."
+    msg += " from <имя_таблицы> [where ...] [group by <столбец>, ...]"
+    msg += " - вычислить агрегаты по группам."
+    print(msg)
     msg = "<command> update <имя_таблицы> set <столбец1> = <новое_значение>"
     msg += " where <столбец_условия> = <значение_условия> - обновить запись."
     print(msg)
     msg = "<command> delete from <имя_таблицы> where <столбец> = <значение>"
     msg += " - удалить запись."
     print(msg)
+    msg = "<command> explain select from <имя_таблицы> [where ...]"
+    msg += " - показать план запроса, оценку и фактическое число строк и время."
+    print(msg)
     print("<command> info <имя_таблицы> - вывести информацию о таблице.")
+    msg = "<command> vacuum <имя_таблицы>"
+    msg += " - освободить место, занятое удаленными записями."
+    print(msg)
+    msg = "<command> import <имя_таблицы> <файл.csv|файл.jsonl>"
+    msg += " - загрузить записи из файла."
+    print(msg)
+    msg = "<command> analyze <имя_таблицы>"
+    msg += " - собрать статистику таблицы для планировщика запросов."
+    print(msg)
 
     print("\nУправление таблицами:")
     msg = "<command> create_table <имя_таблицы> <столбец1:тип> .."
-    msg += " - создать таблицу"
+    msg += " [storage=json|log|binary|segmented] [engine=rows|columnar]"
+    msg += " [codec=json|compact|jsonl|zlib] - создать таблицу"
     print(msg)
     print("<command> list_tables - показать список всех таблиц")
     print("<command> drop_table <имя_таблицы> - удалить таблицу")
+    msg = "<command> create_index <имя_таблицы> <столбец> [hash|sorted]"
+    msg += " - создать индекс по столбцу"
+    print(msg)
 
     print("\nОбщие команды:")
+    msg = "<command> flush [immediate|exit|every|<N>] - записать изменения на диск"
+    msg += " и задать политику сброса"
+    print(msg)
+    print("<command> stats - статистика кэшей и метрики операций")
+    msg = "<command> stats json|prometheus|on|off|reset, stats dump <файл>"
+    msg += " - выгрузить, включить/выключить или сбросить метрики"
+    print(msg)
     print("<command> exit - выход из программы")
     print("<command> help - справочная информация\n")
 
 
+def print_stats() -> None:
+    """Выводит счетчики кэшей команд и результатов select и метрики."""
+    for title, stats in (
+        ("Кэш команд", statement_cache.stats()),
+        ("Кэш запросов", query_cache.stats()),
+    ):
+        print(f"{title}:")
+        for key, value in stats.items():
+            if key == "hit_rate":
+                value = f"{value:.1%}"
+            print(f"  {key}: {value}")
+
+    state = "включены" if metrics.enabled else "выключены"
+    print(f"Метрики ({state}):")
+    print(metrics.format_summary())
+
+
+def dump_metrics(path: str) -> None:
+    """Записывает метрики в файл.
+
+    Файлы с расширением .prom или .txt получают текстовый формат
+    Prometheus, остальные - JSON.
+
+    Args:
+        path: Путь к файлу
+    """
+    if path.endswith((".prom", ".txt")):
+        text = metrics.to_prometheus()
+    else:
+        text = metrics.to_json()
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    except OSError as e:
+        print(f"Ошибка: Не удалось записать метрики в {path}: {e}")
+        return
+    print(f"Метрики записаны в {path}")
+
+
 def parse_command(user_input: str) -> List[str]:
     """Разбирает введенную строку на команду и аргументы.
 
@@ -56,273 +174,1132 @@ def parse_command(user_input: str) -> List[str]:
         return []
 
 
-def run() -> None:
-    """Основной цикл программы."""
-    print("***База данных***")
-    print_help()
+def table_signature(metadata: Dict[str, Any], table_name: str) -> tuple:
+    """Возвращает подпись таблицы: подпись ее файлов и версию из метаданных.
 
-    while True:
-        try:
-            # Загружаем актуальные метаданные
-            metadata = utils.load_metadata(META_FILE)
+    Версия меняется при любом изменении данных, в том числе другим
+    процессом, даже если время изменения и размер файлов остались прежними
+    (бинарная таблица изменяется на месте).
 
-            # Запрашиваем ввод
-            user_input = input("Введите команду: ").strip()
+    Args:
+        metadata: Метаданные базы данных
+        table_name: Имя таблицы
 
-            if not user_input:
-                continue
+    Returns:
+        Кортеж (подпись_файлов, версия)
+    """
+    version = metadata.get(table_name, {}).get("version", 0)
+    return utils.get_table_signature(table_name, DATA_DIR), version
 
-            # Разбираем команду
-            tokens = parse_command(user_input)
-            if not tokens:
-                continue
 
-            command = tokens[0].lower()
+def save_metadata(table_names: List[str]) -> List[str]:
+    """Сохраняет записи метаданных таблиц, сливая их с файлом.
 
-            # Обрабатываем команды
-            if command == "exit":
-                print("Выход из программы...")
-                break
+    Таблицы, которые другой процесс изменил после чтения метаданных
+    (см. Session.save_metadata), забываются вместе с индексами и
+    кэшированными результатами select.
 
-            elif command == "help":
-                print_help()
+    Args:
+        table_names: Таблицы, записи которых нужно сохранить
 
-            # Управление таблицами
-            elif command == "create_table":
-                if len(tokens) < 3:
-                    msg = "Ошибка: Недостаточно аргументов. "
-                    msg += "Используйте: create_table <имя> <столбец1:тип> ..."
-                    print(msg)
-                    continue
+    Returns:
+        Таблицы, записи которых не сохранены
+    """
+    skipped = session.save_metadata(META_FILE, table_names)
+    for table_name in skipped:
+        index.drop_indexes(table_name)
+        query_cache.invalidate(table_name)
+    return skipped
 
-                table_name = tokens[1]
-                columns = tokens[2:]
 
-                # Вызываем функцию создания таблицы
-                metadata, message = core.create_table(metadata, table_name, columns)
-                print(message)
+def load_table(
+    metadata: Dict[str, Any], table_name: str
+) -> Tuple[core.TableData, Dict[str, index.Index]]:
+    """Загружает данные таблицы вместе с ее индексами.
 
-                # Сохраняем изменения, если не было ошибки
-                if "успешно создана" in message:
-                    utils.save_metadata(metadata, META_FILE)
+    Таблица, уже загруженная в этой сессии, берется из кэша сессии, пока
+    подпись ее файлов не изменилась. Таблицы с storage=binary открываются
+    через mmap без чтения строк, таблицы с storage=segmented читаются
+    по сегментам, для таблиц с engine=columnar записи раскладываются
+    по столбцам.
 
-            elif command == "list_tables":
-                result = core.list_tables(metadata)
-                print(result)
+    Args:
+        metadata: Метаданные базы данных
+        table_name: Имя таблицы
 
-            elif command == "drop_table":
-                if len(tokens) != 2:
-                    print("Ошибка: Используйте: drop_table <имя_таблицы>")
-                    continue
+    Returns:
+        Кортеж (данные_таблицы, индексы)
+    """
+    table_meta = metadata.get(table_name, {})
+    signature = table_signature(metadata, table_name)
+    table_data = session.get_table(table_name, signature)
+
+    if table_data is None:
+        if table_meta.get("storage") == STORAGE_BINARY:
+            table_data = utils.load_binary_table(
+                table_name, table_meta["columns"], DATA_DIR
+            )
+        elif table_meta.get("storage") == STORAGE_SEGMENTED:
+            table_data = utils.load_segmented_table(table_name, DATA_DIR)
+        else:
+            table_data = utils.load_table_data(table_name, DATA_DIR)
+        if table_meta.get("engine", ENGINE_ROWS) == ENGINE_COLUMNAR:
+            table_data = ColumnarTable.from_records(table_meta["columns"], table_data)
+        session.put_table(table_name, table_data, signature)
+
+    index_specs = index.table_index_specs(table_meta)
+    indexes = index.load_indexes(table_name, index_specs, table_data, signature)
+    return table_data, indexes
+
+
+def save_table_changes(
+    metadata: Dict[str, Any],
+    table_name: str,
+    table_data: core.TableData,
+    operations: List[Dict[str, Any]],
+    indexes: Dict[str, index.Index],
+    force_flush: bool = False,
+) -> None:
+    """Фиксирует изменение таблицы в журнале предзаписи и в сессии.
+
+    Операции дописываются в WAL и фиксируются fsync (групповой фиксацией,
+    в пакетном режиме - только при сбросе), после чего команда считается
+    сохраненной; сами файлы таблиц
+    записываются по политике сброса или когда журнал разрастается.
+    Пока с базой работают другие процессы, таблица записывается сразу,
+    иначе они не увидят изменение.
+    Версия таблицы увеличивается сразу, поэтому кэш select не вернет
+    устаревший результат, даже если таблица еще не записана на диск;
+    индексы запоминаются под новой подписью таблицы.
 
-                table_name = tokens[1]
-                metadata, message = core.drop_table(metadata, table_name)
-                print(message)
-
-                # Сохраняем изменения, если не было ошибки
-                if "успешно удалена" in message:
-                    utils.save_metadata(metadata, META_FILE)
-                    # Удаляем файл с данными таблицы
-                    import os
-
-                    data_file = os.path.join(DATA_DIR, f"{table_name}.json")
-                    if os.path.exists(data_file):
-                        os.remove(data_file)
-
-            # CRUD операции
-            elif command == "insert":
-                if len(tokens) < 6 or tokens[1].lower() != "into":
-                    msg = "Ошибка: Используйте: insert into <таблица>"
-                    msg += " values (<значение1>, ...)"
-                    print(msg)
-                    continue
+    Args:
+        metadata: Метаданные базы данных
+        table_name: Имя таблицы
+        table_data: Данные таблицы после изменения
+        operations: Операции для журнала
+        indexes: Индексы таблицы, уже отражающие изменения
+        force_flush: Записать таблицы на диск сразу, минуя WAL (для импорта,
+            чтобы не писать каждую строку дважды)
+    """
+    core.bump_version(metadata, table_name)
+    query_cache.invalidate(table_name)
+
+    shared = False
+    if operations and not force_flush:
+        table_meta = metadata[table_name]
+        records = [make_record(table_name, table_meta, op) for op in operations]
+        # Другие процессы регистрируются под этой же блокировкой: либо
+        # проверка их увидит, либо они прочитают эти записи при запуске
+        with locks.wal_lock():
+            lsn = wal.append(records)
+            shared = locks.other_processes()
+        if session.sync_commits:
+            wal.commit(lsn)
+
+    session.mark_dirty(table_name, table_data, operations, indexes)
+    # Индексы уже отражают изменение: под новой версией они переиспользуются
+    # следующими командами, а не перестраиваются до записи таблицы
+    index.store_indexes(table_name, indexes, table_signature(metadata, table_name))
+    if force_flush or shared:
+        flush_tables(metadata, [table_name])
+
+
+def flush_tables(
+    metadata: Dict[str, Any], table_names: Optional[List[str]] = None
+) -> int:
+    """Записывает на диск измененные таблицы сессии (контрольная точка).
+
+    Таблицы записываются под исключительными блокировками (по порядку
+    имен). Сначала сохраняются метаданные (вместе со сдвинутыми счетчиками
+    ID): при сбое теряется номер, но ID никогда не выдается повторно.
+    Таблица, которую другой процесс уже изменил, доиграв ее операции из
+    журнала (см. save_metadata), не перезаписывается. Когда записаны все
+    таблицы, журнал предзаписи очищается: при сбое раньше этого его
+    операции просто применятся повторно. Таблица, которую не удалось
+    записать, остается несохраненной, а журнал тогда не очищается: ее
+    изменения восстановятся из него после перезапуска.
 
-                if tokens[3].lower() != "values":
-                    msg = "Ошибка: Используйте: insert into <таблица>"
-                    msg += " values (<значение1>, ...)"
-                    print(msg)
-                    continue
+    Args:
+        metadata: Метаданные базы данных
+        table_names: Записать только эти таблицы (по умолчанию все
+            измененные); журнал тогда не очищается
 
-                table_name = tokens[2]
-                values_str = " ".join(tokens[4:])
+    Returns:
+        Количество записанных таблиц
+    """
+    dirty = session.dirty_tables()
+    if table_names is not None:
+        dirty = [table_name for table_name in dirty if table_name in table_names]
+    if not dirty:
+        if table_names is None and wal.size():
+            with locks.wal_lock():
+                wal.truncate()
+        return 0
+
+    wal.sync()
+    with ExitStack() as stack:
+        for table_name in sorted(dirty):
+            stack.enter_context(locks.table_lock(table_name, exclusive=True))
+        # Статистика планировщика сохраняется вместе с метаданными
+        for table_name in dirty:
+            if table_name in metadata:
+                entry = session.tables[table_name]
+                planner.refresh_stats(
+                    metadata[table_name], entry.table_data, entry.operations
+                )
+        skipped = save_metadata(dirty)
 
+        failed = []
+        for table_name in dirty:
+            if table_name in skipped:
+                continue
+            entry = session.tables[table_name]
+            if table_name in metadata:
                 try:
-                    values = parser.parse_values(values_str)
-                except ValueError as e:
-                    print(f"Ошибка парсинга значений: {e}")
+                    # Удаленные записи выбрасываются до записи (файлы
+                    # бинарной таблицы при этом переписываются)
+                    entry.table_data = tombstones.compact_table(
+                        entry.table_data, entry.indexes
+                    )
+                    write_table(
+                        metadata, table_name, entry.table_data, entry.operations
+                    )
+                except Exception as e:
+                    print(f'Ошибка: Не удалось записать таблицу "{table_name}": {e}')
+                    failed.append(table_name)
                     continue
+            signature = table_signature(metadata, table_name)
+            index.store_indexes(table_name, entry.indexes, signature)
+            session.mark_clean(table_name, signature)
+
+            # Бинарная таблица после перезаписи целиком снова открывается
+            # через mmap, а не держится в памяти списком записей
+            is_binary = metadata.get(table_name, {}).get("storage") == STORAGE_BINARY
+            if is_binary and not isinstance(entry.table_data, BinaryTable):
+                session.forget(table_name)
+
+    if not session.is_dirty():
+        session.flushed()
+    if table_names is None and not failed:
+        with locks.wal_lock():
+            wal.truncate()
+    return len(dirty) - len(skipped) - len(failed)
+
+
+def recover_from_wal() -> int:
+    """Доигрывает операции из журнала предзаписи после сбоя.
+
+    Операции применяются к файлам таблиц (контрольной точке), вместе
+    с ними восстанавливаются счетчики ID и версии таблиц, после чего
+    таблицы записываются на диск, а журнал очищается. Операции таблиц,
+    удаленных после записи в журнал (или пересозданных с тем же именем),
+    пропускаются. Если таблицу не удалось записать, журнал остается
+    до следующего запуска.
+
+    Процесс сначала регистрируется, а журнал читает под блокировками всех
+    таблиц: так в файлы попадают и несохраненные изменения других
+    процессов, которые до этого работали с базой в одиночку.
 
-                # Загружаем данные таблицы
-                table_data = utils.load_table_data(table_name, DATA_DIR)
+    Returns:
+        Количество восстановленных операций
+    """
+    locks.register_process()
+    table_names = sorted(session.load_metadata(META_FILE))
+    with ExitStack() as stack:
+        for table_name in table_names:
+            stack.enter_context(locks.table_lock(table_name, exclusive=True))
+        stack.enter_context(locks.wal_lock())
+
+        records = list(wal.read_records())
+        if not records:
+            if wal.size():
+                wal.truncate()
+            return 0
+
+        metadata = session.load_metadata(META_FILE)
+        operations_by_table: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            table_name = record.get("table")
+            table_meta = metadata.get(table_name)
+            # Таблицы, созданные после чтения списка, не заблокированы; их
+            # изменения другие процессы записывают сразу
+            if table_name not in table_names or table_meta is None:
+                continue
+            if record.get("created") != table_meta.get("created"):
+                continue
+            operations = operations_by_table.setdefault(table_name, [])
+            operations.append(record["operation"])
+            for key, value in record.get("meta", {}).items():
+                table_meta[key] = max(table_meta.get(key, 0), value)
+
+        failed = []
+        for table_name, operations in operations_by_table.items():
+            table_data, _ = load_table(metadata, table_name)
+            if hasattr(table_data, "to_records"):
+                table_data = table_data.to_records()
+            recovered = utils.apply_operations(table_data, operations)
+            try:
+                write_table(metadata, table_name, recovered, operations)
+            except Exception as e:
+                print(f'Ошибка: Не удалось записать таблицу "{table_name}": {e}')
+                failed.append(table_name)
+            session.forget(table_name)
+            index.drop_indexes(table_name)
+            query_cache.invalidate(table_name)
+
+        save_metadata(list(operations_by_table))
+        if not failed:
+            wal.truncate()
+    return sum(
+        len(operations)
+        for table_name, operations in operations_by_table.items()
+        if table_name not in failed
+    )
+
+
+def write_table(
+    metadata: Dict[str, Any],
+    table_name: str,
+    table_data: core.TableData,
+    operations: List[Dict[str, Any]],
+) -> None:
+    """Записывает таблицу на диск согласно ее режиму хранения.
+
+    Для режима "log" операции дописываются в журнал таблицы, и файл
+    данных не перезаписывается; разросшийся журнал сворачивается в базовый файл.
+    Для режима "binary" новые и измененные строки записываются в файл
+    таблицы на место. Для режима "segmented" переписываются только
+    сегменты, в которые попали ID вставок и обновлений, а удаления
+    отмечаются в картах удалений сегментов. Для режима "json" таблица
+    сохраняется целиком. Файлы данных записываются кодеком таблицы
+    (параметр codec).
 
-                # Выполняем вставку
-                table_data, message = core.insert(
-                    metadata, table_data, table_name, values
-                )
-                print(message)
+    Args:
+        metadata: Метаданные базы данных
+        table_name: Имя таблицы
+        table_data: Данные таблицы
+        operations: Операции для журнала
+    """
+    storage = metadata[table_name].get("storage", STORAGE_JSON)
+    codec = metadata[table_name].get("codec", TABLE_CODEC)
+    if storage == STORAGE_LOG:
+        log_size = utils.append_table_log(table_name, operations, DATA_DIR)
+        # Журнал сворачивается, когда он больше порога и больше базового
+        # файла: так стоимость перезаписи базы делится на все операции журнала
+        base_file = os.path.join(DATA_DIR, f"{table_name}.json")
+        base_size = os.path.getsize(base_file) if os.path.exists(base_file) else 0
+        if log_size is not None and log_size > max(LOG_COMPACT_THRESHOLD, base_size):
+            utils.compact_table_log(table_name, DATA_DIR, codec)
+    elif storage == STORAGE_BINARY:
+        columns = metadata[table_name]["columns"]
+        utils.save_binary_table(table_name, columns, table_data, DATA_DIR)
+    elif storage == STORAGE_SEGMENTED:
+        utils.save_segmented_table(
+            table_name, table_data, operations, DATA_DIR, codec
+        )
+    else:
+        utils.save_table_data(table_name, table_data, DATA_DIR, codec)
+
+
+def vacuum_table(metadata: Dict[str, Any], table_name: str) -> None:
+    """Освобождает место, занятое удаленными записями таблицы.
+
+    Сначала несохраненные изменения таблицы записываются на диск, при
+    этом удаленные записи выбрасываются из таблицы в памяти (см.
+    tombstones.py). Для storage=segmented сегменты с удаленными строками
+    переписываются без них, для storage=log журнал сворачивается в базовый
+    файл. Таблицы json и binary записываются без удаленных строк целиком,
+    сжимать в них нечего.
 
-                # Сохраняем изменения, если не было ошибки
-                if "успешно добавлена" in message:
-                    utils.save_table_data(table_name, table_data, DATA_DIR)
+    Args:
+        metadata: Метаданные базы данных
+        table_name: Имя таблицы
+    """
+    flush_tables(metadata, [table_name])
+    storage = metadata[table_name].get("storage", STORAGE_JSON)
+    codec = metadata[table_name].get("codec", TABLE_CODEC)
+    size_before = utils.get_table_size(table_name, DATA_DIR)
+
+    reclaimed_rows = None
+    if storage == STORAGE_SEGMENTED:
+        segment_dir = segments.get_segment_dir(table_name, DATA_DIR)
+        reclaimed_rows, _ = segments.vacuum_segments(segment_dir, codec)
+    elif storage == STORAGE_LOG:
+        utils.compact_table_log(table_name, DATA_DIR, codec)
+
+    reclaimed = size_before - utils.get_table_size(table_name, DATA_DIR)
+    msg = f'Таблица "{table_name}" сжата. Освобождено байт: {max(reclaimed, 0)}'
+    if reclaimed_rows is not None:
+        msg += f", удаленных строк: {reclaimed_rows}"
+    print(msg)
 
-            elif command == "select":
-                if len(tokens) < 3 or tokens[1].lower() != "from":
-                    msg = "Ошибка: Используйте: select from <таблица>"
-                    msg += " [where <условие>]"
-                    print(msg)
-                    continue
 
-                table_name = tokens[2]
+def import_file(metadata: Dict[str, Any], table_name: str, filepath: str) -> None:
+    """Импортирует записи из CSV или JSON Lines файла в таблицу.
 
-                # Проверяем существование таблицы
-                if table_name not in metadata:
-                    print(f'Ошибка: Таблица "{table_name}" не существует.')
-                    continue
+    Файл читается потоково пачками по IMPORT_BATCH_SIZE строк. Для режима
+    хранения "log" каждая пачка сразу дописывается в журнал, для
+    "segmented" - в последние сегменты, для "binary" - в конец файла
+    таблицы, для "json" таблица сохраняется один раз в конце.
+    Строки импорта записываются прямо в файлы таблицы, минуя WAL.
+    Пачка с ошибочной строкой отклоняется и импорт останавливается,
+    предыдущие пачки сохраняются.
 
-                # Загружаем данные таблицы
-                table_data = utils.load_table_data(table_name, DATA_DIR)
-
-                # Проверяем наличие условия WHERE
-                if len(tokens) > 4 and tokens[3].lower() == "where":
-                    where_str = " ".join(tokens[4:])
-                    try:
-                        where_clause = parser.parse_where_clause(where_str)
-                    except ValueError as e:
-                        print(f"Ошибка парсинга условия WHERE: {e}")
-                        continue
-
-                    # Выполняем выборку с условием
-                    selected = core.select(table_data, where_clause)
-                else:
-                    # Выполняем выборку без условия
-                    selected = core.select(table_data)
-
-                # Форматируем и выводим результат
-                columns = metadata[table_name]["columns"]
-                result = core.format_as_table(selected, columns)
-                print(result)
-
-            elif command == "update":
-                if len(tokens) < 7:
-                    msg = "Ошибка: Используйте: update <таблица>"
-                    msg += " set <столбец> = <значение> where <условие>"
-                    print(msg)
-                    continue
+    Args:
+        metadata: Метаданные базы данных
+        table_name: Имя таблицы
+        filepath: Путь к файлу импорта
+    """
+    start_time = time.monotonic()
+    table_data, indexes = load_table(metadata, table_name)
+    storage = metadata[table_name].get("storage", STORAGE_JSON)
 
-                # Проверяем наличие SET и WHERE
-                set_index = -1
-                where_index = -1
+    imported = 0
+    unsaved = 0
+    try:
+        for batch in utils.iter_import_batches(filepath, IMPORT_BATCH_SIZE):
+            result = core.insert_many(
+                metadata, table_data, table_name, batch, indexes, imported + 1
+            )
+            if result is None:
+                break
+            table_data, count = result
+            imported += count
+
+            if storage in (STORAGE_LOG, STORAGE_SEGMENTED):
+                operations = [
+                    {"op": "insert", "record": dict(table_data[position])}
+                    for position in range(len(table_data) - count, len(table_data))
+                ]
+                save_table_changes(
+                    metadata, table_name, table_data, operations, indexes, True
+                )
+            elif isinstance(table_data, BinaryTable):
+                save_table_changes(
+                    metadata, table_name, table_data, [], indexes, True
+                )
+            else:
+                unsaved += count
+    except (OSError, ValueError, csv.Error) as e:
+        print(f"Ошибка импорта: {e}")
 
-                for i in range(len(tokens)):
-                    if tokens[i].lower() == "set":
-                        set_index = i
-                    elif tokens[i].lower() == "where":
-                        where_index = i
+    if unsaved:
+        save_table_changes(metadata, table_name, table_data, [], indexes, True)
 
-                if set_index == -1 or where_index == -1:
-                    msg = "Ошибка: Используйте: update <таблица>"
-                    msg += " set <столбец> = <значение> where <условие>"
-                    print(msg)
-                    continue
+    elapsed = time.monotonic() - start_time
+    rate = imported / elapsed if elapsed > 0 else 0
+    msg = f'Импортировано записей в таблицу "{table_name}": {imported}'
+    msg += f" за {elapsed:.3f} секунд ({rate:.0f} записей/с)."
+    print(msg)
 
-                table_name = tokens[1]
 
-                # Собираем части SET и WHERE
-                set_str = " ".join(tokens[set_index + 1 : where_index])
-                where_str = " ".join(tokens[where_index + 1 :])
+def _collect_rows(
+    rows: Iterable[Mapping[str, Any]], collected: Optional[List[Dict[str, Any]]]
+) -> Iterator[Mapping[str, Any]]:
+    """Пропускает строки выборки, копируя их в список для кэша.
 
-                try:
-                    set_clause = parser.parse_set_clause(set_str)
-                    where_clause = parser.parse_where_clause(where_str)
-                except ValueError as e:
-                    print(f"Ошибка парсинга: {e}")
-                    continue
+    После QUERY_CACHE_MAX_ROWS строк копирование прекращается: такой
+    результат все равно не будет закэширован.
 
-                # Проверяем существование таблицы
-                if table_name not in metadata:
-                    print(f'Ошибка: Таблица "{table_name}" не существует.')
-                    continue
+    Args:
+        rows: Строки выборки
+        collected: Список для копий строк или None, если копировать не нужно
 
-                # Загружаем данные таблицы
-                table_data = utils.load_table_data(table_name, DATA_DIR)
+    Yields:
+        Те же строки
+    """
+    for row in rows:
+        if collected is not None and len(collected) <= QUERY_CACHE_MAX_ROWS:
+            collected.append(dict(row))
+        yield row
 
-                # Выполняем обновление
-                table_data, updated_count = core.update(
-                    table_data, set_clause, where_clause
-                )
 
-                if updated_count > 0:
-                    msg = f'Записи в таблице "{table_name}" успешно обновлены.'
-                    msg += f" Обновлено записей: {updated_count}"
-                    print(msg)
-                    utils.save_table_data(table_name, table_data, DATA_DIR)
-                else:
-                    print("Записи не найдены.")
-
-            elif command == "delete":
-                if len(tokens) < 5:
-                    msg = "Ошибка: Используйте: delete from <таблица>"
-                    msg += " where <условие>"
-                    print(msg)
-                    continue
+def run_select(
+    metadata: Dict[str, Any],
+    statement: Statement,
+    load: Callable[
+        [Dict[str, Any], str], Tuple[core.TableData, Dict[str, index.Index]]
+    ] = load_table,
+) -> None:
+    """Выполняет разобранный select и выводит результат страницами.
 
-                if tokens[1].lower() != "from" or tokens[3].lower() != "where":
-                    msg = "Ошибка: Используйте: delete from <таблица>"
-                    msg += " where <условие>"
-                    print(msg)
-                    continue
+    Args:
+        metadata: Метаданные базы данных
+        statement: Разобранная команда select
+        load: Функция загрузки таблицы с индексами (по умолчанию load_table;
+            сервер передает чтение из снимка)
+    """
+    table_name = statement.table
 
-                table_name = tokens[2]
-                where_str = " ".join(tokens[4:])
+    # Проверяем существование таблицы
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return
 
-                try:
-                    where_clause = parser.parse_where_clause(where_str)
-                except ValueError as e:
-                    print(f"Ошибка парсинга условия WHERE: {e}")
-                    continue
+    where_clause = statement.where
+    limit, offset = statement.limit, statement.offset
 
-                # Проверяем существование таблицы
-                if table_name not in metadata:
-                    print(f'Ошибка: Таблица "{table_name}" не существует.')
-                    continue
+    columns = metadata[table_name]["columns"]
+    aggregation = None
+    if statement.columns is not None:
+        try:
+            aggregate.check_select(columns, statement.columns, statement.group_by)
+        except ValueError as e:
+            print(f"Ошибка: {e}")
+            return
+        columns = [aggregate.item_name(item) for item in statement.columns]
+        aggregation = tuple(statement.columns), tuple(statement.group_by)
+
+    # Ищем результат в кэше по версии таблицы, условию и LIMIT/OFFSET
+    version = metadata[table_name].get("version", 0)
+    cache_key = query_cache.make_key(
+        table_name, version, where_clause, limit, offset, aggregation
+    )
+    selected = query_cache.get(cache_key)
+
+    if selected is not None:
+        rows = selected
+    else:
+        table_data, indexes = load(metadata, table_name)
+        plan = planner.plan_select(
+            metadata[table_name], where_clause, indexes, len(table_data)
+        )
+        if metrics.enabled:
+            metrics.inc("query_plans_total", plan=plan.kind)
+        if aggregation is None:
+            rows = core.iter_select(
+                table_data, where_clause, plan.indexes, limit, offset
+            )
+        else:
+            # LIMIT и OFFSET агрегатного select относятся к группам
+            rows = aggregate.iter_aggregate(
+                table_data, where_clause, plan.indexes,
+                statement.columns, statement.group_by,
+            )
+            stop = None if limit is None else offset + limit
+            rows = islice(rows, offset, stop)
+
+    # Выводим результат страницами по мере выборки, запоминая
+    # строки для кэша, пока их не слишком много
+    collected = [] if selected is None else None
+    for chunk in core.iter_format_as_table(_collect_rows(rows, collected), columns):
+        print(chunk, flush=True)
+
+    if collected is not None and len(collected) <= QUERY_CACHE_MAX_ROWS:
+        query_cache.put(cache_key, collected)
+
+
+def explain_select(metadata: Dict[str, Any], statement: Statement) -> None:
+    """Выполняет select и выводит план с оценками и фактическими числами.
+
+    Строки результата не выводятся и не кэшируются.
 
-                # Загружаем данные таблицы
-                table_data = utils.load_table_data(table_name, DATA_DIR)
+    Args:
+        metadata: Метаданные базы данных
+        statement: Разобранная команда select
+    """
+    table_name = statement.table
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return
+
+    table_meta = metadata[table_name]
+    where_clause = statement.where
+    limit, offset = statement.limit, statement.offset
+    if statement.columns is not None:
+        # Выполняется отбор записей для агрегатов, LIMIT и OFFSET
+        # агрегатного select относятся к группам
+        limit, offset = None, 0
+    table_data, indexes = load_table(metadata, table_name)
+    table_size = len(table_data)
+
+    start_time = time.perf_counter()
+    plan = planner.plan_select(table_meta, where_clause, indexes, table_size)
+    planned_time = time.perf_counter()
+    rows = core.iter_select(table_data, where_clause, plan.indexes, limit, offset)
+    actual_rows = sum(1 for _ in rows)
+    finished_time = time.perf_counter()
+
+    candidates = tombstones.skip_deleted(
+        table_data, index.candidate_positions(table_size, where_clause, plan.indexes)
+    )
+    estimated_rows = max(plan.rows - offset, 0)
+    if limit is not None:
+        estimated_rows = min(estimated_rows, limit)
+
+    print(f"План: {plan.describe()}")
+    stats = table_meta.get("stats")
+    if stats is None:
+        print("Статистика: нет, оценки по умолчанию (соберите: analyze)")
+    else:
+        print(f"Статистика: собрана для {stats['rows']} строк")
+    msg = f"Стоимость: {plan.cost:.1f}"
+    if plan.alternatives:
+        others = ", ".join(
+            f"{other.kind} {other.cost:.1f}" for other in plan.alternatives
+        )
+        msg += f" (другие варианты: {others})"
+    print(msg)
+    msg = f"Строк-кандидатов: оценка {plan.candidates:.0f},"
+    msg += f" фактически {len(candidates)} из {table_size}"
+    print(msg)
+    msg = f"Строк в результате: оценка {estimated_rows:.0f},"
+    msg += f" фактически {actual_rows}"
+    print(msg)
+    msg = f"Время: планирование {(planned_time - start_time) * 1000:.3f} мс,"
+    msg += f" выполнение {(finished_time - planned_time) * 1000:.3f} мс"
+    print(msg)
 
-                # Выполняем удаление
-                table_data, deleted_count = core.delete(table_data, where_clause)
 
-                if deleted_count > 0:
-                    msg = f'Записи успешно удалены из таблицы "{table_name}".'
-                    msg += f" Удалено записей: {deleted_count}"
-                    print(msg)
-                    utils.save_table_data(table_name, table_data, DATA_DIR)
-                else:
-                    print("Записи не найдены.")
+def analyze_table(metadata: Dict[str, Any], table_name: str) -> None:
+    """Собирает статистику таблицы для планировщика и сохраняет ее.
 
-            elif command == "info":
-                if len(tokens) != 2:
-                    print("Ошибка: Используйте: info <имя_таблицы>")
-                    continue
+    Статистика таблицы с несохраненными изменениями записывается вместе
+    с ними при сбросе.
 
-                table_name = tokens[1]
+    Args:
+        metadata: Метаданные базы данных
+        table_name: Имя существующей таблицы
+    """
+    table_data, _ = load_table(metadata, table_name)
+    table_meta = metadata[table_name]
+    table_meta["stats"] = planner.collect_stats(table_data, table_meta)
+    if table_name not in session.dirty_tables():
+        save_metadata([table_name])
+    msg = f'Статистика таблицы "{table_name}" собрана.'
+    rows = tombstones.live_count(table_data)
+    msg += f" Строк: {rows}, столбцов: {len(table_meta['columns'])}"
+    print(msg)
 
-                if table_name not in metadata:
-                    print(f'Ошибка: Таблица "{table_name}" не существует.')
-                    continue
 
-                # Получаем информацию о таблице
-                columns = metadata[table_name]["columns"]
-                table_data = utils.load_table_data(table_name, DATA_DIR)
+def execute_command(user_input: str) -> bool:
+    """Выполняет одну команду, записывая ее время в метрики.
+
+    Args:
+        user_input: Непустая строка команды
+
+    Returns:
+        False, если команда завершает работу (exit), иначе True
+    """
+    if not metrics.enabled:
+        return _dispatch_command(user_input)
+
+    metrics.context_table = ""
+    start_time = time.perf_counter()
+    try:
+        return _dispatch_command(user_input)
+    finally:
+        elapsed = time.perf_counter() - start_time
+        # Неизвестные команды не порождают отдельных меток
+        op = user_input.split(None, 1)[0].strip("\"'").lower()
+        if op not in COMMANDS:
+            op = "unknown"
+        metrics.observe("command_seconds", elapsed, op=op)
+        metrics.inc("commands_total", op=op)
+
+
+def _dispatch_command(user_input: str) -> bool:
+    """Разбирает и выполняет одну команду (см. execute_command).
+
+    Команда с таблицей выполняется под блокировкой этой таблицы:
+    разделяемой для чтения, исключительной для изменения. Сброс по
+    политике идет после ее снятия, так как берет блокировки всех
+    измененных таблиц.
+    """
+    # Команды с данными берутся из кэша разобранных команд,
+    # остальные разбираются на токены
+    statement = None
+    first_word = user_input.split(None, 1)[0].strip("\"'").lower()
+    explain = first_word == COMMAND_EXPLAIN
+    if explain:
+        # explain выполняет следующую за ним команду select
+        words = user_input.split(None, 1)
+        user_input = words[1] if len(words) > 1 else ""
+        first_word = user_input.split(None, 1)[0].lower() if user_input else ""
+        if first_word != COMMAND_SELECT:
+            print("Ошибка: Используйте: explain select from <имя_таблицы> ...")
+            return True
+    if first_word in STATEMENT_COMMANDS:
+        try:
+            statement = statement_cache.get(user_input)
+        except ValueError as e:
+            print(e)
+            return True
+        tokens = None
+        command = COMMAND_EXPLAIN if explain else statement.command
+        table_name = statement.table
+    else:
+        tokens = parse_command(user_input)
+        if not tokens:
+            return True
+        command = tokens[0].lower()
+        table_name = tokens[1] if len(tokens) > 1 else ""
+    # Метка table для метрик команды: таблица из ее первого аргумента
+    # или из разобранной команды с данными (в том числе explain)
+    if table_name and (command in TABLE_COMMANDS or statement is not None):
+        metrics.context_table = table_name
+
+    if table_name and command in READ_COMMANDS | WRITE_COMMANDS:
+        exclusive = command in WRITE_COMMANDS
+        with locks.table_lock(table_name, exclusive=exclusive):
+            keep_running = _run_command(command, tokens, statement)
+    else:
+        keep_running = _run_command(command, tokens, statement)
+
+    over_limit = session.should_flush() or wal.size() > WAL_CHECKPOINT_BYTES
+    if keep_running and session.is_dirty() and over_limit:
+        flush_tables(session.metadata)
+    return keep_running
+
+
+def _run_command(
+    command: str, tokens: Optional[List[str]], statement: Optional[Statement]
+) -> bool:
+    """Выполняет разобранную команду (см. _dispatch_command).
 
-                print(f"Таблица: {table_name}")
-                print(f"Столбцы: {', '.join(columns)}")
-                print(f"Количество записей: {len(table_data)}")
+    Args:
+        command: Имя команды
+        tokens: Токены команды без кэша разобранных команд
+        statement: Разобранная команда с данными
 
+    Returns:
+        False, если нужно завершить работу
+    """
+    # Метаданные перечитываются, только если файл изменился
+    metadata = session.load_metadata(META_FILE)
+
+    # Обрабатываем команды
+    if command == "exit":
+        flush_tables(metadata)
+        print("Выход из программы...")
+        return False
+
+    elif command == "help":
+        print_help()
+
+    # Управление таблицами
+    elif command == "create_table":
+        if len(tokens) < 3:
+            msg = "Ошибка: Недостаточно аргументов. "
+            msg += "Используйте: create_table <имя> <столбец1:тип> ..."
+            print(msg)
+            return True
+
+        table_name = tokens[1]
+
+        # Параметры таблицы задаются в виде ключ=значение
+        columns = []
+        options = {}
+        for token in tokens[2:]:
+            if "=" in token and ":" not in token:
+                key, value = token.split("=", 1)
+                options[key.lower()] = value
             else:
-                print(f"Функции '{command}' нет. Попробуйте снова.")
+                columns.append(token)
+
+        # Вызываем функцию создания таблицы
+        metadata, message = core.create_table(
+            metadata, table_name, columns, options
+        )
+        print(message)
+
+        # Сохраняем изменения, если не было ошибки
+        if "успешно создана" in message:
+            save_metadata([table_name])
+            session.forget(table_name)
+
+    elif command == "list_tables":
+        result = core.list_tables(metadata)
+        print(result)
+
+    elif command == "drop_table":
+        if len(tokens) != 2:
+            print("Ошибка: Используйте: drop_table <имя_таблицы>")
+            return True
+
+        table_name = tokens[1]
+        metadata, message = core.drop_table(metadata, table_name)
+        print(message)
+
+        # Сохраняем изменения, если не было ошибки
+        if "успешно удалена" in message:
+            # Операции удаленной таблицы остаются в WAL, но не применятся
+            # к новой таблице с тем же именем: у нее другая метка created
+            session.forget(table_name)
+            save_metadata([table_name])
+            index.drop_indexes(table_name)
+            query_cache.invalidate(table_name)
+            # Удаляем файлы с данными таблицы и ее журнал
+            data_file = os.path.join(DATA_DIR, f"{table_name}.json")
+            log_file = utils.get_log_path(table_name, DATA_DIR)
+            binary_files = utils.get_binary_paths(table_name, DATA_DIR)
+            for path in (data_file, log_file, *binary_files):
+                if os.path.exists(path):
+                    os.remove(path)
+            segment_dir = segments.get_segment_dir(table_name, DATA_DIR)
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+    elif command == "create_index":
+        if len(tokens) not in (3, 4):
+            msg = "Ошибка: Используйте: create_index <имя_таблицы>"
+            msg += " <столбец> [hash|sorted]"
+            print(msg)
+            return True
+
+        table_name = tokens[1]
+        column = tokens[2]
+        kind = tokens[3] if len(tokens) == 4 else index.INDEX_HASH
+        metadata, message = core.create_index(
+            metadata, table_name, column, kind
+        )
+        print(message)
+
+        # Сохраняем изменения, если не было ошибки
+        if "успешно создан" in message:
+            save_metadata([table_name])
+
+    # CRUD операции
+    elif command == "insert":
+        table_name = statement.table
+        values = statement.values
+
+        # Загружаем данные таблицы
+        table_data, indexes = load_table(metadata, table_name)
+
+        # Выполняем вставку
+        table_data, message = core.insert(
+            metadata, table_data, table_name, values, indexes
+        )
+        print(message)
+
+        # Сохраняем изменения, если не было ошибки
+        if "успешно добавлена" in message:
+            operation = {"op": "insert", "record": dict(table_data[-1])}
+            save_table_changes(
+                metadata, table_name, table_data, [operation], indexes
+            )
+
+    elif command == "select":
+        run_select(metadata, statement)
+
+    elif command == "explain":
+        explain_select(metadata, statement)
+
+    elif command == "update":
+        table_name = statement.table
+        set_clause = statement.set_clause
+        where_clause = statement.where
+
+        # Проверяем существование таблицы
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        # Проверяем новые значения до изменения записей, как при вставке
+        message = core.check_set_clause(metadata[table_name]["columns"], set_clause)
+        if message is not None:
+            print(message)
+            return True
+
+        # Загружаем данные таблицы
+        table_data, indexes = load_table(metadata, table_name)
+
+        # Запоминаем затрагиваемые записи для журнала
+        updated_ids = core.find_matching_ids(table_data, where_clause, indexes)
+
+        # Выполняем обновление
+        result = core.update(table_data, set_clause, where_clause, indexes)
+        if result is None:
+            # Изменения не сохранены, таблица и индексы в памяти могли
+            # разойтись с файлом данных
+            index.drop_indexes(table_name)
+            session.discard(table_name)
+            return True
+        table_data, updated_count = result
+
+        if updated_count > 0:
+            msg = f'Записи в таблице "{table_name}" успешно обновлены.'
+            msg += f" Обновлено записей: {updated_count}"
+            print(msg)
+            operation = {"op": "update", "ids": updated_ids, "set": set_clause}
+            save_table_changes(
+                metadata, table_name, table_data, [operation], indexes
+            )
+        else:
+            print("Записи не найдены.")
+
+    elif command == "delete":
+        table_name = statement.table
+        where_clause = statement.where
+
+        # Проверяем существование таблицы
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        # Загружаем данные таблицы
+        table_data, indexes = load_table(metadata, table_name)
+
+        # Запоминаем удаляемые записи для журнала
+        deleted_ids = core.find_matching_ids(table_data, where_clause, indexes)
+
+        # Выполняем удаление
+        result = core.delete(table_data, where_clause, indexes)
+        if result is None:
+            index.drop_indexes(table_name)
+            session.discard(table_name)
+            return True
+        table_data, deleted_count = result
+        if not isinstance(deleted_count, int):
+            # Пользователь отменил удаление
+            return True
+
+        if deleted_count > 0:
+            msg = f'Записи успешно удалены из таблицы "{table_name}".'
+            msg += f" Удалено записей: {deleted_count}"
+            print(msg)
+            operation = {"op": "delete", "ids": deleted_ids}
+            save_table_changes(
+                metadata, table_name, table_data, [operation], indexes
+            )
+        else:
+            print("Записи не найдены.")
+
+    elif command == "import":
+        if len(tokens) != 3:
+            msg = "Ошибка: Используйте: import <таблица>"
+            msg += " <файл.csv|файл.jsonl>"
+            print(msg)
+            return True
+
+        table_name = tokens[1]
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        import_file(metadata, table_name, tokens[2])
+
+    elif command == "info":
+        if len(tokens) != 2:
+            print("Ошибка: Используйте: info <имя_таблицы>")
+            return True
+
+        table_name = tokens[1]
+
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        # Получаем информацию о таблице (бинарная таблица берет
+        # количество записей из заголовка файла)
+        columns = metadata[table_name]["columns"]
+        table_data, _ = load_table(metadata, table_name)
+
+        print(f"Таблица: {table_name}")
+        print(f"Столбцы: {', '.join(columns)}")
+        print(f"Количество записей: {tombstones.live_count(table_data)}")
+        storage = metadata[table_name].get("storage", STORAGE_JSON)
+        if storage != STORAGE_BINARY:
+            print(f"Формат файла: {metadata[table_name].get('codec', TABLE_CODEC)}")
+        # Файлы отстают от таблицы на операции, которые пока только в WAL
+        msg = f"Размер на диске: {utils.get_table_size(table_name, DATA_DIR)} байт"
+        if table_name in session.dirty_tables():
+            pending = len(session.tables[table_name].operations)
+            msg += f" (без несохраненных операций: {pending}, они в журнале"
+            msg += " предзаписи)"
+        print(msg)
+        if storage == STORAGE_SEGMENTED:
+            segment_dir = segments.get_segment_dir(table_name, DATA_DIR)
+            stats = segments.segment_stats(segment_dir)
+            print(f"Сегментов: {stats['segments']}")
+            ratio = stats["dead"] / stats["rows"] if stats["rows"] else 0
+            msg = f"Удаленных строк в файлах: {stats['dead']} ({ratio:.1%}),"
+            msg += f" занимают около {stats['dead_bytes']} байт"
+            print(msg)
+
+    elif command == "vacuum":
+        if len(tokens) != 2:
+            print("Ошибка: Используйте: vacuum <имя_таблицы>")
+            return True
+
+        table_name = tokens[1]
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        vacuum_table(metadata, table_name)
+
+    elif command == "analyze":
+        if len(tokens) != 2:
+            print("Ошибка: Используйте: analyze <имя_таблицы>")
+            return True
+
+        table_name = tokens[1]
+        if table_name not in metadata:
+            print(f'Ошибка: Таблица "{table_name}" не существует.')
+            return True
+
+        analyze_table(metadata, table_name)
+
+    elif command == "stats":
+        usage = "Ошибка: Используйте: stats [json|prometheus|on|off|reset]"
+        usage += " или stats dump <файл>"
+        option = tokens[1].lower() if len(tokens) > 1 else None
+        if len(tokens) == 1:
+            print_stats()
+        elif len(tokens) == 3 and option == "dump":
+            dump_metrics(tokens[2])
+        elif len(tokens) != 2:
+            print(usage)
+        elif option == "json":
+            print(metrics.to_json())
+        elif option == "prometheus":
+            print(metrics.to_prometheus(), end="")
+        elif option in ("on", "off"):
+            metrics.enabled = option == "on"
+            print(f"Метрики {'включены' if metrics.enabled else 'выключены'}")
+        elif option == "reset":
+            metrics.reset()
+            print("Метрики сброшены")
+        else:
+            print(usage)
+
+    elif command == "flush":
+        if len(tokens) > 2:
+            print("Ошибка: Используйте: flush [immediate|exit|every|<N>]")
+            return True
+
+        if len(tokens) == 2:
+            try:
+                session.flush_policy = parse_flush_policy(tokens[1])
+            except ValueError as e:
+                print(f"Ошибка: {e}")
+                return True
+            print(f"Политика сброса: {session.flush_policy}")
+
+        flushed = flush_tables(metadata)
+        print(f"Записано таблиц: {flushed}")
+
+    else:
+        print(f"Функции '{command}' нет. Попробуйте снова.")
+
+    return True
+
+
+def run_script(path: str) -> None:
+    """Выполняет команды из файла без приглашений и подтверждений.
+
+    Запросы подтверждения отвечаются автоматически. Измененные таблицы
+    остаются в памяти сессии и записываются на диск один раз в конце
+    скрипта или командой flush, которая служит границей транзакции;
+    журнал предзаписи фиксируется fsync только на этих границах.
+    Пустые строки и комментарии ("--" или "#") пропускаются, точка с
+    запятой в конце команды отбрасывается.
+
+    Args:
+        path: Путь к файлу команд или "-" для stdin
+    """
+    try:
+        script = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    except OSError as e:
+        print(f"Ошибка: Не удалось открыть скрипт {path}: {e}")
+        return
+
+    recovered = recover_from_wal()
+    if recovered:
+        print(f"Восстановлено операций из журнала предзаписи: {recovered}")
+
+    flush_policy, sync_commits = session.flush_policy, session.sync_commits
+    session.flush_policy, session.sync_commits = FLUSH_ON_EXIT, False
+    set_auto_confirm(True)
+    start_time = time.monotonic()
+    executed = 0
+    try:
+        for line_number, line in enumerate(script, start=1):
+            user_input = line.strip().removesuffix(";").rstrip()
+            if not user_input or user_input.startswith(("--", "#")):
+                continue
+
+            executed += 1
+            try:
+                if not execute_command(user_input):
+                    break
+            except Exception as e:
+                print(f"Ошибка в строке {line_number}: {e}")
+    finally:
+        if session.metadata is not None:
+            flush_tables(session.metadata)
+        set_auto_confirm(False)
+        session.flush_policy, session.sync_commits = flush_policy, sync_commits
+        if script is not sys.stdin:
+            script.close()
+
+    elapsed = time.monotonic() - start_time
+    print(f"Выполнено команд: {executed} за {elapsed:.3f} секунд.")
+
+
+def run(argv: Optional[List[str]] = None) -> None:
+    """Основной цикл программы.
+
+    С ключом --script команды читаются из файла (или stdin для "-")
+    и выполняются без приглашений, см. run_script.
+
+    Args:
+        argv: Аргументы командной строки (по умолчанию sys.argv[1:])
+    """
+    arg_parser = argparse.ArgumentParser(prog="database")
+    arg_parser.add_argument(
+        "--script",
+        metavar="FILE",
+        help='выполнить команды из файла ("-" - из stdin) без подтверждений',
+    )
+    arg_parser.add_argument(
+        "--metrics-dump",
+        metavar="FILE",
+        help="записать метрики в файл при выходе (.prom - формат Prometheus)",
+    )
+    arg_parser.add_argument(
+        "--no-metrics", action="store_true", help="не собирать метрики"
+    )
+    args = arg_parser.parse_args(argv)
+    if args.no_metrics:
+        metrics.enabled = False
+
+    try:
+        if args.script is not None:
+            run_script(args.script)
+        else:
+            run_interactive()
+    finally:
+        if args.metrics_dump:
+            dump_metrics(args.metrics_dump)
+
+
+def run_interactive() -> None:
+    """Интерактивный цикл: команды вводятся с клавиатуры."""
+    print("***База данных***")
+    print_help()
+
+    # Доигрываем операции, не попавшие в файлы таблиц до сбоя
+    recovered = recover_from_wal()
+    if recovered:
+        print(f"Восстановлено операций из журнала предзаписи: {recovered}")
+
+    while True:
+        try:
+            # Запрашиваем ввод
+            user_input = input("Введите команду: ").strip()
+
+            if not user_input:
+                continue
+
+            if not execute_command(user_input):
+                break
 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
+            # Несохраненные изменения записываются и при аварийном выходе
+            if session.metadata is not None:
+                flush_tables(session.metadata)
             print("\n\nВыход из программы...")
             break
         except Exception as e:
@@ -0,0 +1,326 @@
+"""Индексы для ускорения поиска записей по условию WHERE."""
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .constants import STORAGE_BINARY
+from .predicate import is_comparison
+from .tombstones import deleted_positions
+from .zonemap import INDEX_ZONE, ZoneMap, zone_candidates, zone_columns
+
+# Типы индексов
+INDEX_HASH = "hash"
+INDEX_SORTED = "sorted"
+VALID_INDEX_TYPES = {INDEX_HASH, INDEX_SORTED}
+
+# Операторы, для которых сортированный индекс умеет выбирать диапазон
+RANGE_OPERATORS = {"=", ">", "<", ">=", "<="}
+
+# Условие WHERE: (столбец, оператор, значение)
+Condition = Tuple[str, str, Any]
+
+# Индексы таблиц текущей сессии: имя таблицы -> (подпись файлов, индексы)
+_registry: Dict[str, Tuple[Any, Dict[str, "Index"]]] = {}
+
+
+class HashIndex:
+    """Хэш-индекс: значение столбца -> позиции записей в таблице."""
+
+    kind = INDEX_HASH
+
+    def __init__(self, column: str) -> None:
+        self.column = column
+        self.buckets: Dict[Any, List[int]] = {}
+        # Значения, чьи списки позиций принадлежат этому индексу; None - все
+        # (списки остальных общие с индексом, от которого сделан fork)
+        self.owned: Optional[Set[Any]] = None
+
+    def build(self, table_data: List[Dict[str, Any]]) -> "HashIndex":
+        """Строит индекс заново по данным таблицы.
+
+        Удаленные записи (см. tombstones.py) в индекс не попадают.
+
+        Args:
+            table_data: Данные таблицы
+
+        Returns:
+            Этот же индекс
+        """
+        self.buckets = {}
+        self.owned = None
+        deleted = deleted_positions(table_data)
+        for position, record in enumerate(table_data):
+            if position not in deleted:
+                self.add(record.get(self.column), position)
+        return self
+
+    def fork(self) -> "HashIndex":
+        """Возвращает копию индекса, которую можно изменять.
+
+        Списки позиций общие с этим индексом и копируются при первом
+        изменении, поэтому сам индекс после fork изменять нельзя.
+        """
+        forked = HashIndex(self.column)
+        forked.buckets = dict(self.buckets)
+        forked.owned = set()
+        return forked
+
+    def _bucket(self, value: Any) -> Optional[List[int]]:
+        """Возвращает список позиций значения, свой для этого индекса."""
+        positions = self.buckets.get(value)
+        if positions is not None and self.owned is not None:
+            if value not in self.owned:
+                positions = self.buckets[value] = list(positions)
+                self.owned.add(value)
+        return positions
+
+    def add(self, value: Any, position: int) -> None:
+        """Добавляет позицию записи для значения."""
+        positions = self._bucket(value)
+        if positions is None:
+            self.buckets[value] = [position]
+            if self.owned is not None:
+                self.owned.add(value)
+        else:
+            positions.append(position)
+
+    def remove(self, value: Any, position: int) -> None:
+        """Удаляет позицию записи для значения."""
+        positions = self._bucket(value)
+        if positions is None:
+            return
+        positions.remove(position)
+        if not positions:
+            del self.buckets[value]
+
+    def supports(self, operator: str, value: Any) -> bool:
+        """Проверяет, может ли индекс обработать условие."""
+        return operator == "="
+
+    def lookup(self, operator: str, value: Any) -> List[int]:
+        """Возвращает позиции записей, удовлетворяющих условию."""
+        return self.buckets.get(value, [])
+
+
+class SortedIndex:
+    """Сортированный индекс по целочисленному столбцу для диапазонных условий.
+
+    Значения хранятся в отсортированном списке, параллельно которому лежат
+    позиции записей, поэтому диапазон находится двоичным поиском. Значения
+    других типов (например, None) в индекс не попадают: с целым числом
+    они не сравниваются, и такие записи диапазонным условиям не удовлетворяют.
+    """
+
+    kind = INDEX_SORTED
+
+    def __init__(self, column: str) -> None:
+        self.column = column
+        self.keys: List[int] = []
+        self.positions: List[int] = []
+
+    def build(self, table_data: List[Dict[str, Any]]) -> "SortedIndex":
+        """Строит индекс заново по данным таблицы.
+
+        Удаленные записи (см. tombstones.py) в индекс не попадают.
+
+        Args:
+            table_data: Данные таблицы
+
+        Returns:
+            Этот же индекс
+        """
+        deleted = deleted_positions(table_data)
+        pairs = sorted(
+            (record.get(self.column), position)
+            for position, record in enumerate(table_data)
+            if isinstance(record.get(self.column), int) and position not in deleted
+        )
+        self.keys = [value for value, _ in pairs]
+        self.positions = [position for _, position in pairs]
+        return self
+
+    def fork(self) -> "SortedIndex":
+        """Возвращает копию индекса, которую можно изменять."""
+        forked = SortedIndex(self.column)
+        forked.keys = list(self.keys)
+        forked.positions = list(self.positions)
+        return forked
+
+    def add(self, value: Any, position: int) -> None:
+        """Добавляет позицию записи для значения."""
+        if not isinstance(value, int):
+            return
+        i = bisect_right(self.keys, value)
+        self.keys.insert(i, value)
+        self.positions.insert(i, position)
+
+    def remove(self, value: Any, position: int) -> None:
+        """Удаляет позицию записи для значения."""
+        if not isinstance(value, int):
+            return
+        lo = bisect_left(self.keys, value)
+        hi = bisect_right(self.keys, value)
+        try:
+            i = self.positions.index(position, lo, hi)
+        except ValueError:
+            return
+        del self.keys[i]
+        del self.positions[i]
+
+    def supports(self, operator: str, value: Any) -> bool:
+        """Проверяет, может ли индекс обработать условие."""
+        return operator in RANGE_OPERATORS and isinstance(value, int)
+
+    def lookup(self, operator: str, value: Any) -> List[int]:
+        """Возвращает позиции записей, удовлетворяющих условию."""
+        if operator == "=":
+            lo, hi = bisect_left(self.keys, value), bisect_right(self.keys, value)
+        elif operator == ">":
+            lo, hi = bisect_right(self.keys, value), len(self.keys)
+        elif operator == ">=":
+            lo, hi = bisect_left(self.keys, value), len(self.keys)
+        elif operator == "<":
+            lo, hi = 0, bisect_left(self.keys, value)
+        else:
+            lo, hi = 0, bisect_right(self.keys, value)
+        return self.positions[lo:hi]
+
+
+Index = Union[HashIndex, SortedIndex, ZoneMap]
+
+
+def create_index(kind: str, column: str) -> Index:
+    """Создает пустой индекс заданного типа.
+
+    Args:
+        kind: Тип индекса
+        column: Имя столбца
+
+    Returns:
+        Объект индекса
+
+    Raises:
+        ValueError: Если тип индекса неизвестен
+    """
+    if kind == INDEX_HASH:
+        return HashIndex(column)
+    if kind == INDEX_SORTED:
+        return SortedIndex(column)
+    if kind == INDEX_ZONE:
+        return ZoneMap(column)
+    raise ValueError(f"Неизвестный тип индекса: {kind}")
+
+
+def load_indexes(
+    table_name: str,
+    index_specs: Dict[str, str],
+    table_data: List[Dict[str, Any]],
+    signature: Any,
+) -> Dict[str, Index]:
+    """Возвращает индексы таблицы, перестраивая их только при необходимости.
+
+    Индексы переиспользуются между командами, пока подпись файлов таблицы
+    (время изменения и размер) и набор индексированных столбцов не меняются.
+
+    Args:
+        table_name: Имя таблицы
+        index_specs: Описание индексов (столбец -> тип), см. table_index_specs
+        table_data: Данные таблицы
+        signature: Подпись файлов таблицы
+
+    Returns:
+        Словарь столбец -> индекс
+    """
+    cached = _registry.get(table_name)
+    if cached is not None:
+        cached_signature, indexes = cached
+        specs = {key: idx.kind for key, idx in indexes.items()}
+        if cached_signature == signature and specs == index_specs:
+            return indexes
+
+    # Ключ карты зон - "столбец:zone", ключ индекса - имя столбца
+    indexes = {
+        key: create_index(kind, key.split(":", 1)[0]).build(table_data)
+        for key, kind in index_specs.items()
+    }
+    _registry[table_name] = (signature, indexes)
+    return indexes
+
+
+def table_index_specs(table_meta: Dict[str, Any]) -> Dict[str, str]:
+    """Возвращает индексы таблицы из метаданных вместе с картами зон.
+
+    Карты зон строятся для всех столбцов int и bool: они пропускают блоки
+    и по условиям, которые индекс столбца не обслуживает (например,
+    диапазон по ID с хэш-индексом). Бинарные таблицы их не получают:
+    построение прочитало бы из файла все строки, а условия на ID они
+    сужают двоичным поиском.
+
+    Args:
+        table_meta: Метаданные таблицы
+
+    Returns:
+        Словарь столбец (или ключ карты зон) -> тип индекса
+    """
+    specs = dict(table_meta.get("indexes", {}))
+    if table_meta.get("storage") != STORAGE_BINARY:
+        specs.update(zone_columns(table_meta))
+    return specs
+
+
+def store_indexes(
+    table_name: str, indexes: Dict[str, Index], signature: Any
+) -> None:
+    """Запоминает актуальные индексы таблицы после сохранения изменений."""
+    _registry[table_name] = (signature, indexes)
+
+
+def drop_indexes(table_name: str) -> None:
+    """Забывает индексы таблицы."""
+    _registry.pop(table_name, None)
+
+
+def candidate_positions(
+    table_size: int,
+    conditions: List[Condition],
+    indexes: Optional[Dict[str, Index]] = None,
+) -> Iterable[int]:
+    """Возвращает позиции записей, которые могут удовлетворять условию.
+
+    Если хотя бы одно сравнение верхнего уровня (под AND) обслуживается
+    индексом, используется самый узкий из подходящих индексов. Карты зон
+    исключают блоки, которые не могут удовлетворять условию, и
+    используются, если оставляют меньше позиций. Иначе возвращаются все
+    позиции таблицы.
+
+    Args:
+        table_size: Количество записей в таблице
+        conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+        indexes: Индексы таблицы
+
+    Returns:
+        Позиции-кандидаты в порядке возрастания
+    """
+    if not indexes:
+        return range(table_size)
+
+    best: Optional[List[int]] = None
+    for node in conditions:
+        if not is_comparison(node):
+            continue
+        column, operator, value = node
+        idx = indexes.get(column)
+        if idx is None or not idx.supports(operator, value):
+            continue
+        positions = idx.lookup(operator, value)
+        if best is None or len(positions) < len(best):
+            best = positions
+
+    # Позиции по картам зон уже идут по возрастанию
+    zoned = zone_candidates(table_size, conditions, indexes)
+    if zoned is not None and (best is None or len(zoned) < len(best)):
+        return zoned
+
+    if best is None:
+        return range(table_size)
+    return sorted(best)
@@ -0,0 +1,183 @@
+"""Блокировки файлов базы между процессами (fcntl.flock).
+
+У каждой таблицы своя блокировка чтения/записи: команды чтения берут
+разделяемую блокировку и не мешают друг другу, команды изменения -
+исключительную только на свою таблицу. Короткие исключительные блокировки
+защищают дозапись в журнал предзаписи и слияние файла метаданных.
+
+Каждый процесс держит блокировку своего файла присутствия, поэтому по
+ним видно, работают ли с базой другие процессы. На платформах без fcntl
+(Windows) блокировки ничего не делают, а процесс считается единственным.
+
+Порядок захвата, исключающий взаимные блокировки: таблицы (по имени),
+затем журнал предзаписи, затем метаданные.
+"""
+
+import atexit
+import os
+from contextlib import contextmanager
+from typing import ContextManager, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .constants import LOCK_DIR
+
+# Префикс файлов присутствия процессов
+PROCESS_PREFIX = "process-"
+
+
+class FileLock:
+    """Блокировка чтения/записи на файле, повторно входимая в процессе.
+
+    Вложенный захват не обращается к системе; разделяемую блокировку
+    нельзя повысить до исключительной (flock делает это не атомарно).
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+        self._depth = 0
+        self._exclusive = False
+
+    def _flock(self, operation: int) -> None:
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, operation)
+
+    @contextmanager
+    def hold(self, exclusive: bool) -> Iterator[None]:
+        """Удерживает блокировку на время блока with.
+
+        Args:
+            exclusive: Исключительная (запись) или разделяемая (чтение)
+
+        Raises:
+            RuntimeError: При попытке повысить разделяемую блокировку
+        """
+        if fcntl is None:
+            yield
+            return
+
+        if self._depth:
+            if exclusive and not self._exclusive:
+                raise RuntimeError(f"Нельзя повысить блокировку {self.path}")
+        else:
+            self._flock(fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._exclusive = exclusive
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+_locks: Dict[str, FileLock] = {}
+_process_fd: Optional[int] = None
+
+
+def _get_lock(name: str) -> FileLock:
+    lock = _locks.get(name)
+    if lock is None:
+        lock = _locks[name] = FileLock(os.path.join(LOCK_DIR, f"{name}.lock"))
+    return lock
+
+
+def table_lock(table_name: str, exclusive: bool = False) -> ContextManager[None]:
+    """Блокировка таблицы: разделяемая для чтения, исключительная для записи.
+
+    Args:
+        table_name: Имя таблицы
+        exclusive: Нужна ли исключительная блокировка
+
+    Returns:
+        Контекстный менеджер блокировки
+    """
+    register_process()
+    return _get_lock(f"table-{table_name}").hold(exclusive)
+
+
+def wal_lock() -> ContextManager[None]:
+    """Исключительная блокировка дозаписи и очистки журнала предзаписи."""
+    return _get_lock("wal").hold(True)
+
+
+def metadata_lock() -> ContextManager[None]:
+    """Исключительная блокировка слияния файла метаданных."""
+    return _get_lock("meta").hold(True)
+
+
+def register_process() -> None:
+    """Отмечает присутствие текущего процесса (один раз за процесс).
+
+    Файл присутствия блокируется до переименования в окончательное имя,
+    поэтому другие процессы не примут его за файл завершенного процесса.
+    Регистрация идет под блокировкой журнала предзаписи: процесс, который
+    дописывает в журнал и проверяет присутствие других, либо увидит новый
+    процесс, либо допишет запись раньше, чем тот прочитает журнал.
+    """
+    global _process_fd
+    if fcntl is None or _process_fd is not None:
+        return
+    with wal_lock():
+        os.makedirs(LOCK_DIR, exist_ok=True)
+        path = os.path.join(LOCK_DIR, f"{PROCESS_PREFIX}{os.getpid()}")
+        fd = os.open(f"{path}.tmp", os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        os.replace(f"{path}.tmp", f"{path}.lock")
+        _process_fd = fd
+    atexit.register(_unregister_process, f"{path}.lock")
+
+
+def _unregister_process(path: str) -> None:
+    """Удаляет файл присутствия при завершении процесса."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def other_processes() -> bool:
+    """Проверяет, работают ли с базой другие процессы.
+
+    Файлы присутствия завершившихся процессов (их блокировку удается
+    захватить) удаляются.
+
+    Returns:
+        True, если есть хотя бы один другой живой процесс
+    """
+    if fcntl is None:
+        return False
+    own = f"{PROCESS_PREFIX}{os.getpid()}.lock"
+    try:
+        names = os.listdir(LOCK_DIR)
+    except FileNotFoundError:
+        return False
+
+    for name in names:
+        if not (name.startswith(PROCESS_PREFIX) and name.endswith(".lock")):
+            continue
+        if name == own:
+            continue
+        path = os.path.join(LOCK_DIR, name)
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except FileNotFoundError:
+            continue
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        finally:
+            os.close(fd)
+    return False
@@ -0,0 +1,262 @@
+"""Реестр метрик: счетчики и гистограммы времени выполнения.
+
+Метрики хранятся в памяти процесса с метками (операция, таблица и т.п.)
+и выгружаются в JSON или в текстовом формате Prometheus. Гистограммы
+используют фиксированные границы корзин (шаг sqrt(2) от 1 мкс), поэтому
+запись значения - это двоичный поиск и два сложения, а квантили p50/p95/p99
+оцениваются по корзинам. Когда реестр выключен, методы сразу возвращаются,
+а горячие участки кода проверяют metrics.enabled до сбора значений.
+"""
+
+import json
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Tuple
+
+from .constants import METRICS_ENABLED, METRICS_PREFIX
+
+# Верхние границы корзин гистограмм в секундах: от 1 мкс до ~18 минут
+BUCKET_BOUNDS = [1e-6 * 2 ** (i / 2) for i in range(61)]
+
+# Квантили, которые выводятся для гистограмм
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Метки метрики: отсортированные пары (имя, значение)
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Гистограмма значений с фиксированными корзинами."""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self) -> None:
+        # Последняя корзина - значения больше последней границы
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        """Добавляет значение в гистограмму."""
+        self.counts[bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> float:
+        """Оценивает квантиль линейной интерполяцией внутри корзины.
+
+        Args:
+            q: Уровень квантиля от 0 до 1
+
+        Returns:
+            Оценка квантиля (0.0 для пустой гистограммы)
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = BUCKET_BOUNDS[i - 1] if i else 0.0
+                if i == len(BUCKET_BOUNDS):
+                    return lower
+                fraction = (rank - cumulative) / bucket_count
+                return lower + (BUCKET_BOUNDS[i] - lower) * fraction
+            cumulative += bucket_count
+        return BUCKET_BOUNDS[-1]
+
+
+class MetricsRegistry:
+    """Счетчики и гистограммы с метками.
+
+    Метка table по умолчанию берется из context_table - таблицы текущей
+    команды, которую задает движок. context_table хранится отдельно для
+    каждого потока, а изменения значений защищены блокировкой, поэтому
+    реестр можно использовать из потоков сервера.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED) -> None:
+        self.enabled = enabled
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+
+    @property
+    def context_table(self) -> str:
+        """Таблица команды, выполняемой в текущем потоке."""
+        return getattr(self._local, "table", "")
+
+    @context_table.setter
+    def context_table(self, table_name: str) -> None:
+        self._local.table = table_name
+
+    def _key(self, name: str, labels: Dict[str, Any]) -> Tuple[str, Labels]:
+        if labels.get("table") is None:
+            labels["table"] = self.context_table
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Увеличивает счетчик.
+
+        Args:
+            name: Имя счетчика
+            value: Приращение
+            **labels: Метки (table по умолчанию - таблица текущей команды)
+        """
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Добавляет значение в гистограмму.
+
+        Args:
+            name: Имя гистограммы
+            value: Значение (для времени - в секундах)
+            **labels: Метки (table по умолчанию - таблица текущей команды)
+        """
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        """Сбрасывает все метрики."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def _sorted_items(self) -> Tuple[List[Any], List[Any]]:
+        """Копирует счетчики и гистограммы под блокировкой, сортируя по ключу."""
+        with self._lock:
+            return sorted(self.counters.items()), sorted(self.histograms.items())
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Возвращает текущие значения метрик.
+
+        Returns:
+            Словарь {"counters": [...], "histograms": [...]}, у гистограмм
+            есть count, sum и квантили p50/p95/p99 в секундах
+        """
+        counter_items, histogram_items = self._sorted_items()
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in counter_items
+        ]
+        histograms = []
+        for (name, labels), histogram in histogram_items:
+            entry = {
+                "name": name,
+                "labels": dict(labels),
+                "count": histogram.count,
+                "sum": histogram.total,
+            }
+            for q in QUANTILES:
+                entry[f"p{round(q * 100)}"] = histogram.quantile(q)
+            histograms.append(entry)
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self) -> str:
+        """Выгружает метрики в JSON."""
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = METRICS_PREFIX) -> str:
+        """Выгружает метрики в текстовом формате Prometheus.
+
+        Args:
+            prefix: Префикс имен метрик
+
+        Returns:
+            Текст в формате экспозиции Prometheus
+        """
+        lines: List[str] = []
+        typed = set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        counter_items, histogram_items = self._sorted_items()
+        for (name, labels), value in counter_items:
+            full_name = f"{prefix}_{name}"
+            declare(full_name, "counter")
+            lines.append(f"{full_name}{_format_labels(labels)} {value}")
+
+        for (name, labels), histogram in histogram_items:
+            full_name = f"{prefix}_{name}"
+            declare(full_name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKET_BOUNDS, histogram.counts):
+                cumulative += bucket_count
+                le = (("le", f"{bound:.9g}"),)
+                lines.append(
+                    f"{full_name}_bucket{_format_labels(labels + le)} {cumulative}"
+                )
+            le = (("le", "+Inf"),)
+            lines.append(
+                f"{full_name}_bucket{_format_labels(labels + le)} {histogram.count}"
+            )
+            lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram.total}")
+            lines.append(
+                f"{full_name}_count{_format_labels(labels)} {histogram.count}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def format_summary(self) -> str:
+        """Форматирует метрики для вывода в консоль.
+
+        Returns:
+            Строки счетчиков и гистограмм (время в миллисекундах)
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for counter in snapshot["counters"]:
+            labels = _format_labels(tuple(counter["labels"].items()))
+            value = counter["value"]
+            if float(value).is_integer():
+                value = int(value)
+            lines.append(f"  {counter['name']}{labels}: {value}")
+        for entry in snapshot["histograms"]:
+            labels = _format_labels(tuple(entry["labels"].items()))
+            quantiles = ", ".join(
+                f"p{round(q * 100)}={entry[f'p{round(q * 100)}'] * 1000:.3f}"
+                for q in QUANTILES
+            )
+            lines.append(
+                f"  {entry['name']}{labels}: count={entry['count']}, {quantiles} мс"
+            )
+        return "\n".join(lines) if lines else "  (метрик нет)"
+
+
+def _escape(value: str) -> str:
+    """Экранирует значение метки для формата Prometheus."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+# Реестр метрик текущего процесса
+metrics = MetricsRegistry()
+
+
+if __name__ == "__main__":
+    import random
+
+    registry = MetricsRegistry()
+    for _ in range(1000):
+        registry.observe("command_seconds", random.expovariate(1000), op="select")
+    registry.inc("rows_scanned_total", 5000, table="books")
+    print(registry.format_summary())
+    print(registry.to_prometheus().splitlines()[0])
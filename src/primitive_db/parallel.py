@@ -0,0 +1,176 @@
+"""Параллельный просмотр больших таблиц.
+
+Позиции-кандидаты делятся на равные непрерывные части, условие WHERE
+проверяется в каждой части отдельно, а результаты склеиваются в порядке
+частей - то есть в порядке позиций (и ID), как при обычном просмотре.
+
+Части выполняются в пуле потоков на сборках Python без GIL, иначе в пуле
+процессов, созданных через fork: процессы наследуют таблицу из памяти,
+поэтому ее не нужно сериализовать, а обратно передаются только найденные
+позиции. Где fork недоступен (Windows) или небезопасен (в процессе уже
+работают другие потоки, например в сервере), просмотр остается обычным.
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, List, Optional, Sequence, Tuple
+
+from .binary import BinaryTable
+from .columnar import ColumnarTable
+from .constants import PARALLEL_SCAN_MIN_ROWS, PARALLEL_SCAN_WORKERS
+from .metrics import metrics
+from .predicate import compile_predicate
+
+# Просмотр, который выполняют процессы пула: (таблица, условия, кандидаты).
+# Задается перед созданием пула и достается процессам при fork
+_scan: Optional[Tuple[Any, List[Any], Sequence[int]]] = None
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+
+
+def scan_positions(
+    table_data: Any, conditions: List[Any], candidates: Sequence[int]
+) -> List[int]:
+    """Проверяет кандидатов по условиям WHERE в одном потоке.
+
+    Args:
+        table_data: Данные таблицы
+        conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+        candidates: Позиции-кандидаты в порядке возрастания
+
+    Returns:
+        Позиции записей, удовлетворяющих условиям
+    """
+    if isinstance(table_data, (ColumnarTable, BinaryTable)):
+        return table_data.match_positions(conditions, candidates)
+    predicate = compile_predicate(conditions)
+    return [position for position in candidates if predicate(table_data[position])]
+
+
+def _scan_part(
+    table_data: Any, conditions: List[Any], candidates: Sequence[int]
+) -> List[int]:
+    if isinstance(table_data, ColumnarTable):
+        # Пакетный фильтр читает широкую выборку столбцом целиком,
+        # а часть должна читать только свои позиции
+        return list(table_data.iter_match_positions(conditions, candidates))
+    return scan_positions(table_data, conditions, candidates)
+
+
+def _scan_inherited(start: int, stop: int) -> List[int]:
+    """Просматривает часть кандидатов в процессе пула (см. _scan)."""
+    table_data, conditions, candidates = _scan
+    return _scan_part(table_data, conditions, candidates[start:stop])
+
+
+def scan_workers() -> int:
+    """Возвращает число частей, на которые делится просмотр.
+
+    Returns:
+        PARALLEL_SCAN_WORKERS или число ядер, если константа равна 0
+    """
+    return PARALLEL_SCAN_WORKERS or os.cpu_count() or 1
+
+
+def _free_threaded() -> bool:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def _executor(workers: int) -> Optional[Executor]:
+    """Возвращает пул для просмотра или None, если параллелить нельзя."""
+    global _thread_pool
+    if _free_threaded():
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(workers, "parallel-scan")
+        return _thread_pool
+    if "fork" in multiprocessing.get_all_start_methods():
+        # fork копирует только вызывающий поток: блокировки, захваченные
+        # другими потоками, в дочернем процессе не освободились бы
+        if threading.active_count() == 1:
+            context = multiprocessing.get_context("fork")
+            return ProcessPoolExecutor(workers, mp_context=context)
+    return None
+
+
+def parallel_match_positions(
+    table_data: Any, conditions: List[Any], candidates: Sequence[int]
+) -> Optional[List[int]]:
+    """Проверяет кандидатов по условиям WHERE параллельно.
+
+    Параллельный просмотр включается, только если кандидатов не меньше
+    PARALLEL_SCAN_MIN_ROWS и доступно больше одного ядра. Бинарная таблица,
+    которая сужает полный просмотр по условиям на ID, просматривается
+    обычным образом: диапазон по ID дешевле.
+
+    Args:
+        table_data: Данные таблицы
+        conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+        candidates: Позиции-кандидаты в порядке возрастания
+
+    Returns:
+        Позиции записей, удовлетворяющих условиям, или None, если
+        просмотр нужно выполнить в одном потоке
+    """
+    global _scan
+    workers = scan_workers()
+    if not conditions or workers < 2 or len(candidates) < PARALLEL_SCAN_MIN_ROWS:
+        return None
+    if isinstance(table_data, BinaryTable):
+        if table_data._narrow_by_id(conditions, candidates) is not candidates:
+            return None
+
+    executor = _executor(workers)
+    if executor is None:
+        return None
+
+    step = -(-len(candidates) // workers)
+    bounds = [(start, start + step) for start in range(0, len(candidates), step)]
+    if isinstance(executor, ThreadPoolExecutor):
+        futures = [
+            executor.submit(_scan_part, table_data, conditions, candidates[a:b])
+            for a, b in bounds
+        ]
+        parts = [future.result() for future in futures]
+    else:
+        _scan = (table_data, conditions, candidates)
+        try:
+            with executor:
+                parts = list(executor.map(_scan_inherited, *zip(*bounds)))
+        finally:
+            _scan = None
+
+    if metrics.enabled:
+        metrics.inc("parallel_scans_total")
+    return [position for part in parts for position in part]
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    records = [
+        {"ID": i, "value": random.randrange(1000), "label": f"row{i % 7}"}
+        for i in range(1, PARALLEL_SCAN_MIN_ROWS + 1)
+    ]
+    where = [("value", "<", 100), ("label", "!=", "row3")]
+    positions = range(len(records))
+
+    start_time = time.perf_counter()
+    serial = scan_positions(records, where, positions)
+    serial_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    parallel = parallel_match_positions(records, where, positions)
+    parallel_time = time.perf_counter() - start_time
+
+    print(f"Частей: {scan_workers()}, найдено записей: {len(serial)}")
+    print(f"Обычный просмотр: {serial_time:.3f} с")
+    if parallel is None:
+        print("Параллельный просмотр недоступен")
+    else:
+        print(f"Параллельный просмотр: {parallel_time:.3f} с")
+        print(f"Результаты совпадают: {parallel == serial}")
@@ -1,8 +1,51 @@
 """Парсеры для разбора условий WHERE и SET."""
 
+import operator
 import re
 from typing import Any, Dict, List, Optional, Tuple
 
+# Функции сравнения для операторов WHERE
+COMPARISON_OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt,
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+# Логические операторы WHERE. Выражение хранится кортежами: сравнение -
+# (столбец, оператор, значение), составные узлы - ("and", (узлы...)),
+# ("or", (узлы...)) и ("not", узел)
+LOGICAL_AND = "and"
+LOGICAL_OR = "or"
+LOGICAL_NOT = "not"
+LOGICAL_KEYWORDS = {LOGICAL_AND, LOGICAL_OR, LOGICAL_NOT}
+
+# Агрегатные функции select и аргумент count(*). Элемент списка select -
+# (функция, столбец) или (None, столбец) для столбца группировки
+AGGREGATE_FUNCTIONS = {"count", "sum", "avg", "min", "max"}
+COUNT_ALL = "*"
+SelectItem = Tuple[Optional[str], str]
+
+# Элемент списка select: функция(столбец|*) или имя столбца
+_SELECT_ITEM = re.compile(
+    r"""(?P<function>\w+)\s*\(\s*(?P<argument>[^()\s]+)\s*\)
+    |(?P<column>[^()\s]+)""",
+    re.VERBOSE,
+)
+
+# Лексемы WHERE: строка в кавычках, оператор сравнения, скобка или слово
+_WHERE_TOKEN = re.compile(
+    r"""\s*(?:
+        (?P<string>"[^"]*"|'[^']*')
+        |(?P<operator>!=|>=|<=|=|>|<)
+        |(?P<paren>[()])
+        |(?P<word>(?:[^\s()=!<>"']|!(?!=))+)
+    )""",
+    re.VERBOSE,
+)
+
 
 def parse_value(value_str: str) -> Any:
     """Парсит строковое значение в соответствующий тип Python.
@@ -54,7 +97,8 @@ def parse_comparison_operator(condition_str: str) -> Tuple[str, str, Any]:
         ValueError: Если формат некорректный
     """
     # Регулярное выражение для поиска операторов сравнения
-    pattern = r"\s*(=|!=|>|<|>=|<=)\s*"
+    # (двухсимвольные операторы проверяются раньше односимвольных)
+    pattern = r"\s*(!=|>=|<=|=|>|<)\s*"
 
     match = re.split(pattern, condition_str, maxsplit=1)
     if len(match) != 3:
@@ -68,37 +112,160 @@ def parse_comparison_operator(condition_str: str) -> Tuple[str, str, Any]:
     return column, operator, value
 
 
-def parse_where_clause(where_str: str) -> Dict[str, Any]:
-    """Парсит условие WHERE в словарь для простых условий с =.
+def tokenize_where(where_str: str) -> List[Tuple[str, str]]:
+    """Разбивает условие WHERE на лексемы.
 
     Args:
-        where_str: Строка условия, например "age = 28" или 'name = "John"'
+        where_str: Строка условия
 
     Returns:
-        Словарь вида {'column': value} (только для оператора =)
+        Список пар (вид_лексемы, текст), вид - string, operator, paren или word
 
     Raises:
-        ValueError: Если формат некорректный
+        ValueError: Если в строке есть незакрытая кавычка или лишний символ
+    """
+    tokens = []
+    position = 0
+    where_str = where_str.rstrip()
+    while position < len(where_str):
+        match = _WHERE_TOKEN.match(where_str, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Неожиданный символ: {where_str[position:].strip()}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+    return tokens
+
+
+class _WhereParser:
+    """Рекурсивный разбор выражения WHERE.
+
+    Грамматика (по убыванию приоритета связок: NOT, AND, OR):
+        выражение := и-выражение ("or" и-выражение)*
+        и-выражение := не-выражение ("and" не-выражение)*
+        не-выражение := "not" не-выражение | "(" выражение ")" | сравнение
+        сравнение := столбец оператор значение
     """
-    if not where_str:
-        return {}
 
-    try:
-        # Пытаемся разобрать как условие сравнения
-        column, operator, value = parse_comparison_operator(where_str)
+    def __init__(self, tokens: List[Tuple[str, str]]) -> None:
+        self.tokens = tokens
+        self.position = 0
+
+    def _peek(self) -> Tuple[Optional[str], str]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None, ""
+
+    def _is_keyword(self, keyword: str) -> bool:
+        kind, text = self._peek()
+        return kind == "word" and text.lower() == keyword
+
+    def _next(self) -> Tuple[Optional[str], str]:
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def parse(self) -> Any:
+        node = self._parse_or()
+        if self.position < len(self.tokens):
+            raise ValueError(f"Лишняя часть условия: {self._peek()[1]}")
+        return node
+
+    def _parse_or(self) -> Any:
+        children = [self._parse_and()]
+        while self._is_keyword(LOGICAL_OR):
+            self._next()
+            children.append(self._parse_and())
+        return _combine(LOGICAL_OR, children)
+
+    def _parse_and(self) -> Any:
+        children = [self._parse_not()]
+        while self._is_keyword(LOGICAL_AND):
+            self._next()
+            children.append(self._parse_not())
+        return _combine(LOGICAL_AND, children)
+
+    def _parse_not(self) -> Any:
+        if self._is_keyword(LOGICAL_NOT):
+            self._next()
+            return (LOGICAL_NOT, self._parse_not())
+
+        kind, text = self._peek()
+        if kind == "paren" and text == "(":
+            self._next()
+            node = self._parse_or()
+            kind, text = self._next()
+            if kind != "paren" or text != ")":
+                raise ValueError("Не закрыта скобка")
+            return node
+        return self._parse_comparison()
+
+    def _parse_comparison(self) -> Tuple[str, str, Any]:
+        kind, column = self._next()
+        if kind != "word" or column.lower() in LOGICAL_KEYWORDS:
+            raise ValueError(f"Ожидается имя столбца, получено: {column or 'конец'}")
+
+        kind, op = self._next()
+        if kind != "operator":
+            raise ValueError(f"Ожидается оператор сравнения после {column}")
+
+        # Значение - строка в кавычках или слова до связки или скобки
+        kind, text = self._peek()
+        if kind == "string":
+            self._next()
+            return column, op, parse_value(text)
+
+        words = []
+        while kind == "word" and text.lower() not in LOGICAL_KEYWORDS:
+            words.append(text)
+            self._next()
+            kind, text = self._peek()
+        if not words:
+            raise ValueError(f"Нет значения в условии для столбца {column}")
+        return column, op, parse_value(" ".join(words))
+
+
+def _combine(kind: str, children: List[Any]) -> Any:
+    """Объединяет узлы связкой, раскрывая вложенные узлы той же связки."""
+    if len(children) == 1:
+        return children[0]
+    flat: List[Any] = []
+    for child in children:
+        if len(child) == 2 and child[0] == kind:
+            flat.extend(child[1])
+        else:
+            flat.append(child)
+    return kind, tuple(flat)
 
-        if operator != "=":
-            # Для обратной совместимости возвращаем только условия с =
-            # Более сложные условия обрабатываются в engine.py
-            raise ValueError(
-                f"Некорректный формат WHERE: {where_str}. "
-                f"Для WHERE поддерживается только оператор ="
-            )
 
-        return {column: value}
+def parse_where_clause(where_str: str) -> List[Any]:
+    """Парсит условие WHERE в список условий, объединенных через AND.
+
+    Поддерживаемые операторы: =, !=, >, <, >=, <=, связки AND, OR, NOT
+    и скобки. Простые сравнения верхнего уровня остаются кортежами
+    (столбец, оператор, значение), поэтому по ним работают индексы.
+
+    Args:
+        where_str: Строка условия, например "age > 28 and (name = "John" or
+            not active = true)"
+
+    Returns:
+        Список условий: сравнений ('column', 'operator', value) и узлов OR/NOT
+
+    Raises:
+        ValueError: Если формат некорректный
+    """
+    if not where_str or not where_str.strip():
+        return []
+
+    try:
+        node = _WhereParser(tokenize_where(where_str)).parse()
     except Exception as e:
         raise ValueError(f"Некорректный формат WHERE: {where_str}. Ошибка: {e}")
 
+    if len(node) == 2 and node[0] == LOGICAL_AND:
+        return list(node[1])
+    return [node]
+
 
 def parse_set_clause(set_str: str) -> Dict[str, Any]:
     """Парсит условие SET в словарь.
@@ -148,6 +315,38 @@ def parse_where_with_operator(where_str: str) -> Optional[Tuple[str, str, Any]]:
     return parse_comparison_operator(where_str)
 
 
+def parse_limit_offset(tokens: List[str]) -> Tuple[List[str], Optional[int], int]:
+    """Отделяет от конца команды части LIMIT и OFFSET.
+
+    Args:
+        tokens: Токены команды, например [..., "limit", "10", "offset", "20"]
+
+    Returns:
+        Кортеж (токены_без_limit_offset, limit или None, offset)
+
+    Raises:
+        ValueError: Если значение LIMIT/OFFSET не является неотрицательным числом
+    """
+    limit: Optional[int] = None
+    offset = 0
+    tokens = list(tokens)
+
+    while len(tokens) >= 2 and tokens[-2].lower() in ("limit", "offset"):
+        keyword, value_str = tokens[-2].lower(), tokens[-1]
+        if not value_str.isdigit():
+            raise ValueError(
+                f"Некорректное значение {keyword.upper()}: {value_str}. "
+                f"Ожидается неотрицательное целое число"
+            )
+        if keyword == "limit":
+            limit = int(value_str)
+        else:
+            offset = int(value_str)
+        tokens = tokens[:-2]
+
+    return tokens, limit, offset
+
+
 def parse_values(values_str: str) -> List[Any]:
     """Парсит строку значений в список.
 
@@ -239,6 +438,19 @@ def test_parser():
         except Exception as e:
             print(f"  {test_case} -> ОШИБКА: {e}")
 
+    print("\nТест parse_where_clause:")
+    test_cases = [
+        "age > 28",
+        'age >= 18 and (name = "John Smith" or not active = true)',
+        "pages < 100 or pages > 400",
+    ]
+
+    for test_case in test_cases:
+        try:
+            print(f"  {test_case} -> {parse_where_clause(test_case)}")
+        except ValueError as e:
+            print(f"  {test_case} -> ОШИБКА: {e}")
+
     print("\nТест parse_values:")
     test_cases = [
         '("Sergei", 28, true)',
@@ -260,3 +472,56 @@ def test_parser():
 
 if __name__ == "__main__":
     test_parser()
+
+
+def parse_select_list(select_str: str) -> List[SelectItem]:
+    """Парсит список выражений select через запятую.
+
+    Args:
+        select_str: Строка вида "count(*), avg(price), author"
+
+    Returns:
+        Список элементов (функция, столбец); для столбца без функции
+        функция - None
+
+    Raises:
+        ValueError: Если элемент или функция некорректны
+    """
+    items: List[SelectItem] = []
+    for part in select_str.split(","):
+        part = part.strip()
+        match = _SELECT_ITEM.fullmatch(part)
+        if match is None:
+            raise ValueError(f"Некорректное выражение select: {part!r}")
+        if match.group("column") is not None:
+            items.append((None, match.group("column")))
+            continue
+        function = match.group("function").lower()
+        argument = match.group("argument")
+        if function not in AGGREGATE_FUNCTIONS:
+            valid = ", ".join(sorted(AGGREGATE_FUNCTIONS))
+            raise ValueError(f"Неизвестная функция: {function}. Допустимые: {valid}")
+        if argument == COUNT_ALL and function != "count":
+            raise ValueError(f"{function}(*) не поддерживается, только count(*)")
+        items.append((function, argument))
+    return items
+
+
+def parse_group_by(group_str: str) -> List[str]:
+    """Парсит список столбцов GROUP BY через запятую.
+
+    Args:
+        group_str: Строка вида "author, year"
+
+    Returns:
+        Список столбцов
+
+    Raises:
+        ValueError: Если список пуст или столбец указан дважды
+    """
+    columns = [column.strip() for column in group_str.split(",")]
+    if not all(columns):
+        raise ValueError(f"Некорректный формат GROUP BY: {group_str!r}")
+    if len(set(columns)) != len(columns):
+        raise ValueError(f"Столбец указан в GROUP BY дважды: {group_str!r}")
+    return columns
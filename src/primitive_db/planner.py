@@ -0,0 +1,458 @@
+"""Планировщик запросов: статистика таблиц и выбор способа чтения.
+
+Статистика таблицы хранится в db_meta.json под ключом "stats": количество
+строк и для каждого столбца - оценка числа различных значений, число None,
+наименьшее и наибольшее значение, доля True (bool) и гистограмма равной
+глубины (int и str). Она собирается по выборке не более STATS_SAMPLE_ROWS
+строк при записи таблицы, если ее еще нет или таблица заметно изменилась
+(см. stats_outdated), и командой analyze. Вставленные, измененные
+и удаленные с момента сбора строки считаются в "modified".
+
+По статистике оценивается доля строк, удовлетворяющих условию WHERE, и
+выбирается самый дешевый способ чтения:
+- index lookup - позиции из хэш-индекса по равенству;
+- range scan - диапазон сортированного индекса;
+- full scan - просмотр всех строк, кроме блоков, которые исключают карты
+  зон (их количество известно точно, без оценки).
+Стоимость - количество проверяемых строк с весами PLANNER_*_COST. Для
+столбцов без статистики берутся доли по умолчанию: 1/10 для равенства
+и 1/3 для диапазона.
+"""
+
+import json
+import random
+from bisect import bisect_left
+from collections import Counter
+from math import prod
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .columnar import ColumnarTable
+from .constants import (
+    PLANNER_INDEX_COST,
+    PLANNER_INDEX_ROW_COST,
+    PLANNER_ROW_COST,
+    STATS_HISTOGRAM_BUCKETS,
+    STATS_REFRESH_RATIO,
+    STATS_REFRESH_VERSIONS,
+    STATS_SAMPLE_ROWS,
+)
+from .parser import LOGICAL_AND, LOGICAL_NOT
+from .predicate import is_comparison
+from .tombstones import live_count, skip_deleted
+from .zonemap import INDEX_ZONE, zone_block_mask
+
+# Способы чтения таблицы
+PLAN_INDEX_LOOKUP = "index lookup"
+PLAN_RANGE_SCAN = "range scan"
+PLAN_FULL_SCAN = "full scan"
+
+# Доли строк по умолчанию для столбцов без статистики
+_DEFAULT_SELECTIVITY = {"=": 0.1, "!=": 0.9}
+_DEFAULT_RANGE_SELECTIVITY = 1 / 3
+
+
+class Plan:
+    """Выбранный способ чтения таблицы и его оценки.
+
+    indexes - индексы, которые передаются в core.iter_select: только
+    индекс плана (index lookup, range scan) или только карты зон
+    (full scan), поэтому поиск кандидатов идет выбранным способом.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        cost: float,
+        candidates: float,
+        indexes: Dict[str, Any],
+        condition: Optional[Tuple[str, str, Any]] = None,
+        zone_blocks: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        self.kind = kind
+        self.cost = cost
+        self.candidates = candidates
+        self.indexes = indexes
+        self.condition = condition
+        self.zone_blocks = zone_blocks
+        self.rows = 0.0
+        self.alternatives: List["Plan"] = []
+
+    def describe(self) -> str:
+        """Возвращает описание плана для explain."""
+        if self.condition is None:
+            text = self.kind
+            if self.zone_blocks is not None:
+                kept, total = self.zone_blocks
+                text += f", карты зон: пропуск {total - kept} из {total} блоков"
+            return text
+        column, operator, value = self.condition
+        index_kind = self.indexes[column].kind
+        value_text = json.dumps(value, ensure_ascii=False)
+        condition = f"{column} {operator} {value_text}"
+        return f"{self.kind} по индексу {index_kind}({column}): {condition}"
+
+
+def sample_positions(table_size: int) -> List[int]:
+    """Выбирает позиции строк для сбора статистики.
+
+    Выборка случайная, а не каждая k-я строка: шаг совпадал бы
+    с периодичными данными. Генератор зависит только от размера таблицы,
+    поэтому статистика повторяема.
+
+    Args:
+        table_size: Количество записей в таблице
+
+    Returns:
+        Не более STATS_SAMPLE_ROWS позиций в порядке возрастания
+    """
+    if table_size <= STATS_SAMPLE_ROWS:
+        return list(range(table_size))
+    generator = random.Random(table_size)
+    return sorted(generator.sample(range(table_size), STATS_SAMPLE_ROWS))
+
+
+def _sample_column(table_data: Any, column: str, positions: List[int]) -> List[Any]:
+    """Возвращает значения столбца в выбранных позициях."""
+    if isinstance(table_data, ColumnarTable) and column in table_data.columns:
+        get = table_data.columns[column].get
+        return [get(position) for position in positions]
+    return [table_data[position].get(column) for position in positions]
+
+
+def estimate_distinct(values: List[Any], scale: float) -> int:
+    """Оценивает число различных значений столбца по выборке.
+
+    Оценка Haas-Stokes (Duj1, как в PostgreSQL): n * d / (n - f1 + f1 / scale),
+    где n - размер выборки, d - различных значений в ней, f1 - значений,
+    встретившихся один раз. Если все значения выборки различны, столбец
+    считается уникальным.
+
+    Args:
+        values: Значения из выборки (без None)
+        scale: Отношение числа строк таблицы к размеру выборки
+
+    Returns:
+        Оценка числа различных значений
+    """
+    counts = Counter(values)
+    if scale <= 1 or not counts:
+        return len(counts)
+    once = sum(1 for count in counts.values() if count == 1)
+    sample = len(values)
+    return round(sample * len(counts) / (sample - once + once / scale))
+
+
+def _column_stats(values: List[Any], table_rows: int, col_type: str) -> Dict[str, Any]:
+    """Собирает статистику столбца по выборке значений."""
+    present = [value for value in values if value is not None]
+    scale = table_rows / len(values) if values else 1
+    stats: Dict[str, Any] = {
+        "distinct": estimate_distinct(present, scale),
+        "nulls": round((len(values) - len(present)) * scale),
+    }
+    if not present:
+        return stats
+    if col_type == "bool":
+        stats["true"] = present.count(True) / len(present)
+        return stats
+
+    try:
+        ordered = sorted(present)
+    except TypeError:
+        return stats
+    stats["min"], stats["max"] = ordered[0], ordered[-1]
+    buckets = min(STATS_HISTOGRAM_BUCKETS, len(ordered))
+    stats["histogram"] = [
+        ordered[(len(ordered) - 1) * bucket // buckets]
+        for bucket in range(buckets + 1)
+    ]
+    return stats
+
+
+def collect_stats(table_data: Any, table_meta: Mapping[str, Any]) -> Dict[str, Any]:
+    """Собирает статистику таблицы по выборке строк (см. sample_positions).
+
+    Удаленные записи (см. tombstones.py) в выборку и число строк не входят.
+
+    Args:
+        table_data: Данные таблицы
+        table_meta: Метаданные таблицы
+
+    Returns:
+        Статистика для ключа "stats" метаданных таблицы
+    """
+    rows = live_count(table_data)
+    positions = skip_deleted(table_data, sample_positions(len(table_data)))
+    columns = {}
+    for column in table_meta["columns"]:
+        name, col_type = column.split(":", 1)
+        values = _sample_column(table_data, name, positions)
+        columns[name] = _column_stats(values, rows, col_type)
+    return {
+        "rows": rows,
+        "version": table_meta.get("version", 0),
+        "columns": columns,
+    }
+
+
+def modified_rows(operations: Iterable[Mapping[str, Any]]) -> int:
+    """Считает строки, которые затрагивают операции.
+
+    Args:
+        operations: Операции {"op": "insert" | "update" | "delete", ...}
+
+    Returns:
+        Количество вставленных, измененных и удаленных строк
+    """
+    return sum(
+        1 if operation.get("op") == "insert" else len(operation.get("ids", ()))
+        for operation in operations
+    )
+
+
+def stats_outdated(table_meta: Mapping[str, Any], table_size: int) -> bool:
+    """Проверяет, нужно ли собрать статистику таблицы заново.
+
+    Args:
+        table_meta: Метаданные таблицы
+        table_size: Текущее количество записей
+
+    Returns:
+        True, если статистики нет, количество строк или число измененных
+        строк (modified) больше STATS_REFRESH_RATIO от числа строк
+        в статистике или прошло STATS_REFRESH_VERSIONS версий
+    """
+    stats = table_meta.get("stats")
+    if stats is None:
+        return table_size > 0
+    changed = max(abs(table_size - stats["rows"]), stats.get("modified", 0))
+    if changed > STATS_REFRESH_RATIO * stats["rows"]:
+        return True
+    versions = table_meta.get("version", 0) - stats.get("version", 0)
+    return versions >= STATS_REFRESH_VERSIONS
+
+
+def refresh_stats(
+    table_meta: Dict[str, Any],
+    table_data: Any,
+    operations: Iterable[Mapping[str, Any]] = (),
+) -> bool:
+    """Собирает статистику таблицы заново, если она устарела.
+
+    Args:
+        table_meta: Метаданные таблицы (изменяются на месте)
+        table_data: Данные таблицы
+        operations: Операции с прошлой записи таблицы: затронутые ими
+            строки добавляются к счетчику modified статистики
+
+    Returns:
+        True, если статистика обновлена
+    """
+    stats = table_meta.get("stats")
+    if stats is not None:
+        stats["modified"] = stats.get("modified", 0) + modified_rows(operations)
+    if not stats_outdated(table_meta, live_count(table_data)):
+        return False
+    table_meta["stats"] = collect_stats(table_data, table_meta)
+    return True
+
+
+def _fraction_below(column_stats: Mapping[str, Any], value: Any) -> Optional[float]:
+    """Оценивает долю значений столбца (без None), меньших value."""
+    bounds = column_stats.get("histogram")
+    if not bounds:
+        return None
+    low = bisect_left(bounds, value)
+    if low == 0:
+        return 0.0
+    if low == len(bounds):
+        return 1.0
+    buckets = len(bounds) - 1
+    if bounds[low] == value:
+        return low / buckets
+    # Значение внутри корзины: для чисел доля внутри корзины линейна
+    start, end = bounds[low - 1], bounds[low]
+    inside = 0.5
+    if isinstance(value, int) and isinstance(start, int) and end != start:
+        inside = (value - start) / (end - start)
+    return (low - 1 + inside) / buckets
+
+
+def _fraction_equal(column_stats: Mapping[str, Any], value: Any) -> float:
+    """Оценивает долю значений столбца (без None), равных value."""
+    if "true" in column_stats and isinstance(value, bool):
+        return column_stats["true"] if value else 1 - column_stats["true"]
+    bounds = column_stats.get("histogram")
+    if bounds and (value < bounds[0] or value > bounds[-1]):
+        return 0.0
+    return 1 / max(column_stats.get("distinct", 1), 1)
+
+
+def _on_boundary(column_stats: Mapping[str, Any], value: Any) -> bool:
+    """Проверяет, совпадает ли value с границей гистограммы столбца."""
+    bounds = column_stats.get("histogram", ())
+    low = bisect_left(bounds, value)
+    return low < len(bounds) and bounds[low] == value
+
+
+def comparison_selectivity(
+    stats: Optional[Mapping[str, Any]], column: str, operator: str, value: Any
+) -> float:
+    """Оценивает долю строк, удовлетворяющих сравнению.
+
+    Args:
+        stats: Статистика таблицы (см. collect_stats) или None
+        column: Столбец
+        operator: Оператор сравнения
+        value: Значение из условия
+
+    Returns:
+        Доля строк от 0 до 1
+    """
+    default = _DEFAULT_SELECTIVITY.get(operator, _DEFAULT_RANGE_SELECTIVITY)
+    column_stats = stats["columns"].get(column) if stats else None
+    if column_stats is None or not stats["rows"]:
+        return default
+    present = max(0.0, 1 - column_stats.get("nulls", 0) / stats["rows"])
+
+    try:
+        equal = _fraction_equal(column_stats, value)
+        if operator == "=":
+            return present * equal
+        if operator == "!=":
+            # None != значение - истина
+            return 1 - present * equal
+        below = _fraction_below(column_stats, value)
+    except TypeError:
+        # Значение не сравнивается со значениями столбца
+        return default
+    if below is None:
+        return default
+
+    # Равные строки отделяют < от <= и > от >= только для значения,
+    # которое точно есть в столбце (попало на границу гистограммы);
+    # для остальных значений их доля считается нулевой
+    if not _on_boundary(column_stats, value):
+        equal = 0.0
+    if operator == "<":
+        fraction = below
+    elif operator == "<=":
+        fraction = below + equal
+    elif operator == ">":
+        fraction = 1 - below - equal
+    else:
+        fraction = 1 - below
+    return present * min(1.0, max(0.0, fraction))
+
+
+def estimate_selectivity(
+    stats: Optional[Mapping[str, Any]], conditions: List[Any]
+) -> float:
+    """Оценивает долю строк, удовлетворяющих условию WHERE.
+
+    Условия считаются независимыми: доли AND перемножаются, OR
+    складываются по формуле включения-исключения.
+
+    Args:
+        stats: Статистика таблицы (см. collect_stats) или None
+        conditions: Условия WHERE, объединенные через AND
+
+    Returns:
+        Доля строк от 0 до 1
+    """
+    return prod(_node_selectivity(stats, node) for node in conditions)
+
+
+def _node_selectivity(stats: Optional[Mapping[str, Any]], node: Any) -> float:
+    if is_comparison(node):
+        return comparison_selectivity(stats, *node)
+    if node[0] == LOGICAL_NOT:
+        return 1 - _node_selectivity(stats, node[1])
+    fractions = [_node_selectivity(stats, child) for child in node[1]]
+    if node[0] == LOGICAL_AND:
+        return prod(fractions)
+    return 1 - prod(1 - fraction for fraction in fractions)
+
+
+def plan_select(
+    table_meta: Mapping[str, Any],
+    conditions: List[Any],
+    indexes: Mapping[str, Any],
+    table_size: int,
+) -> Plan:
+    """Выбирает самый дешевый способ чтения таблицы для условия WHERE.
+
+    Args:
+        table_meta: Метаданные таблицы (статистика - ключ "stats")
+        conditions: Условия WHERE, объединенные через AND
+        indexes: Индексы таблицы вместе с картами зон
+        table_size: Количество записей в таблице
+
+    Returns:
+        План; остальные рассмотренные планы - в его alternatives
+    """
+    stats = table_meta.get("stats")
+    zones = {key: idx for key, idx in indexes.items() if idx.kind == INDEX_ZONE}
+
+    # Полный просмотр проверяет строки блоков, не исключенных картами зон
+    scanned, zone_blocks = table_size, None
+    mask = zone_block_mask(table_size, conditions, zones) if conditions else None
+    if mask is not None:
+        keep, block_rows = mask
+        zone_blocks = (keep.count(True), len(keep))
+        scanned = sum(
+            min(block_rows, table_size - block * block_rows)
+            for block, kept in enumerate(keep)
+            if kept
+        )
+    plans = [
+        Plan(
+            PLAN_FULL_SCAN, scanned * PLANNER_ROW_COST, scanned,
+            zones if zone_blocks else {}, zone_blocks=zone_blocks,
+        )
+    ]
+
+    for node in conditions:
+        if not is_comparison(node):
+            continue
+        column, operator, value = node
+        idx = indexes.get(column)
+        if idx is None or not idx.supports(operator, value):
+            continue
+        candidates = table_size * comparison_selectivity(stats, *node)
+        cost = PLANNER_INDEX_COST
+        cost += candidates * (PLANNER_ROW_COST + PLANNER_INDEX_ROW_COST)
+        kind = PLAN_INDEX_LOOKUP if operator == "=" else PLAN_RANGE_SCAN
+        plans.append(Plan(kind, cost, candidates, {column: idx}, condition=node))
+
+    best = min(plans, key=lambda plan: plan.cost)
+    best.rows = table_size * estimate_selectivity(stats, conditions)
+    best.alternatives = [plan for plan in plans if plan is not best]
+    return best
+
+
+if __name__ == "__main__":
+    from .index import SortedIndex
+    from .zonemap import ZoneMap, zone_key
+
+    records = [
+        {"ID": i, "price": i % 1000, "label": f"row{i % 7}"}
+        for i in range(1, 200001)
+    ]
+    meta = {"columns": ["ID:int", "price:int", "label:str"], "version": 1}
+    meta["stats"] = collect_stats(records, meta)
+    table_indexes = {
+        "price": SortedIndex("price").build(records),
+        zone_key("ID"): ZoneMap("ID").build(records),
+    }
+    for where in (
+        [("price", "=", 5)],
+        [("price", ">", 100)],
+        [("ID", "<", 5000), ("price", "<", 500)],
+        [("label", "=", "row3")],
+    ):
+        plan = plan_select(meta, where, table_indexes, len(records))
+        actual = sum(all(
+            {"=": r[c] == v, ">": r[c] > v, "<": r[c] < v}[op] for c, op, v in where
+        ) for r in records)
+        print(f"{where}: {plan.describe()}, оценка {plan.rows:.0f}, факт {actual}")
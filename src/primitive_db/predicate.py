@@ -0,0 +1,243 @@
+"""Компиляция условий WHERE в функции Python.
+
+Разобранное выражение (список условий, объединенных через AND, с узлами
+OR/NOT) превращается в одну lambda: сравнения встраиваются в ее код,
+поэтому при просмотре таблицы не интерпретируется дерево условий.
+Для колоночных таблиц есть пакетный фильтр по спискам позиций.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Sequence
+
+from .parser import COMPARISON_OPERATORS, LOGICAL_AND, LOGICAL_NOT, LOGICAL_OR
+
+# Классы значений, между которыми определены сравнения порядка
+_ORDERED_CLASSES = {int: (int, float), float: (int, float), bool: (int, float)}
+
+# Операторы Python для операторов WHERE
+_PYTHON_OPERATORS = {"=": "==", "!=": "!=", ">": ">", "<": "<", ">=": ">=", "<=": "<="}
+
+
+def _safe_compare(compare, left: Any, right: Any) -> bool:
+    """Сравнивает значения; несравнимые типы условию не удовлетворяют."""
+    try:
+        return compare(left, right)
+    except TypeError:
+        return False
+
+
+def is_comparison(node: Any) -> bool:
+    """Проверяет, является ли узел простым сравнением (столбец, оператор, значение).
+
+    Args:
+        node: Узел выражения WHERE
+
+    Returns:
+        True для сравнения, False для узлов AND/OR/NOT
+    """
+    return len(node) == 3
+
+
+def iter_comparisons(node: Any) -> Iterable[tuple]:
+    """Перебирает все сравнения в узле выражения.
+
+    Args:
+        node: Узел выражения WHERE
+
+    Returns:
+        Итератор сравнений (столбец, оператор, значение)
+    """
+    if is_comparison(node):
+        yield node
+    elif node[0] == LOGICAL_NOT:
+        yield from iter_comparisons(node[1])
+    else:
+        for child in node[1]:
+            yield from iter_comparisons(child)
+
+
+def normalize(node: Any) -> Hashable:
+    """Приводит узел выражения к хэшируемому ключу, не зависящему от порядка.
+
+    Тип значения входит в ключ, чтобы 1 и True не считались одним условием.
+
+    Args:
+        node: Узел выражения WHERE
+
+    Returns:
+        Хэшируемый ключ
+    """
+    if is_comparison(node):
+        column, op, value = node
+        return column, op, type(value).__name__, value
+    if node[0] == LOGICAL_NOT:
+        return LOGICAL_NOT, normalize(node[1])
+    return node[0], tuple(sorted((normalize(child) for child in node[1]), key=repr))
+
+
+class _Compiler:
+    """Генерирует код lambda для выражения WHERE.
+
+    Значения и имена столбцов передаются в код через пространство имен,
+    а не подставляются в текст, поэтому строки из запроса не исполняются.
+    """
+
+    def __init__(self, read: Callable[[int, str], str]) -> None:
+        self.read = read
+        self.namespace: Dict[str, Any] = {
+            "_safe": _safe_compare,
+            "_ops": COMPARISON_OPERATORS,
+            "_str": str,
+        }
+        self.counter = 0
+
+    def emit(self, node: Any) -> str:
+        if not is_comparison(node):
+            kind = node[0]
+            if kind == LOGICAL_NOT:
+                return f"(not {self.emit(node[1])})"
+            joiner = " and " if kind == LOGICAL_AND else " or "
+            return "(" + joiner.join(self.emit(child) for child in node[1]) + ")"
+
+        column, op, value = node
+        i = self.counter
+        self.counter += 1
+        self.namespace[f"c{i}"] = value
+        read = self.read(i, column)
+
+        if op in ("=", "!="):
+            # Равенство определено для любых типов и не бросает TypeError
+            return f"({read} {_PYTHON_OPERATORS[op]} c{i})"
+
+        if isinstance(value, str):
+            classes = "_str"
+        elif type(value) in _ORDERED_CLASSES:
+            self.namespace["_num"] = _ORDERED_CLASSES[type(value)]
+            classes = "_num"
+        else:
+            # Для прочих значений (например, None) сравнение с перехватом ошибки
+            return f"_safe(_ops[{op!r}], {read}, c{i})"
+
+        # Несравнимые типы (None, строка с числом) условию не удовлетворяют
+        python_op = _PYTHON_OPERATORS[op]
+        return f"(isinstance(v{i} := {read}, {classes}) and v{i} {python_op} c{i})"
+
+    def build(self, conditions: Sequence[Any], argument: str) -> Callable:
+        if not conditions:
+            return lambda _: True
+        body = " and ".join(self.emit(node) for node in conditions)
+        return eval(f"lambda {argument}: {body}", self.namespace)
+
+
+def compile_predicate(conditions: Sequence[Any]) -> Callable[[Any], bool]:
+    """Компилирует условия WHERE в функцию от записи.
+
+    Args:
+        conditions: Условия, объединенные через AND (сравнения и узлы OR/NOT)
+
+    Returns:
+        Функция запись -> bool
+    """
+
+    def read(i: int, column: str) -> str:
+        compiler.namespace[f"k{i}"] = column
+        return f"r.get(k{i})"
+
+    compiler = _Compiler(read)
+    return compiler.build(conditions, "r")
+
+
+def compile_position_predicate(
+    conditions: Sequence[Any], getters: Callable[[str], Callable[[int], Any]]
+) -> Callable[[int], bool]:
+    """Компилирует условия WHERE в функцию от позиции записи в таблице.
+
+    Значения читаются функциями столбцов (например, прямо из массивов
+    колоночной таблицы или из файла бинарной таблицы), без сборки записи.
+
+    Args:
+        conditions: Условия, объединенные через AND (сравнения и узлы OR/NOT)
+        getters: Функция столбец -> функция чтения значения по позиции
+
+    Returns:
+        Функция позиция -> bool
+    """
+
+    def read(i: int, column: str) -> str:
+        compiler.namespace[f"g{i}"] = getters(column)
+        return f"g{i}(p)"
+
+    compiler = _Compiler(read)
+    return compiler.build(conditions, "p")
+
+
+def filter_positions(
+    conditions: Sequence[Any],
+    positions: List[int],
+    filter_comparison: Callable[[tuple, List[int]], List[int]],
+) -> List[int]:
+    """Пакетно фильтрует позиции по условиям WHERE.
+
+    Простые сравнения фильтруются функцией таблицы целым списком позиций,
+    AND сужает список последовательно, OR объединяет результаты ветвей
+    (каждая следующая ветвь проверяет только еще не подошедшие позиции),
+    NOT исключает позиции, подошедшие под вложенное условие.
+
+    Args:
+        conditions: Условия, объединенные через AND
+        positions: Позиции-кандидаты в порядке возрастания
+        filter_comparison: Функция (сравнение, позиции) -> подходящие позиции
+
+    Returns:
+        Подходящие позиции в порядке возрастания
+    """
+    for node in conditions:
+        if not positions:
+            break
+        positions = _filter_node(node, positions, filter_comparison)
+    return positions
+
+
+def _filter_node(
+    node: Any,
+    positions: List[int],
+    filter_comparison: Callable[[tuple, List[int]], List[int]],
+) -> List[int]:
+    if is_comparison(node):
+        return filter_comparison(node, positions)
+
+    kind = node[0]
+    if kind == LOGICAL_AND:
+        return filter_positions(node[1], positions, filter_comparison)
+
+    if kind == LOGICAL_NOT:
+        excluded = set(_filter_node(node[1], positions, filter_comparison))
+        return [p for p in positions if p not in excluded]
+
+    if kind == LOGICAL_OR:
+        matched: set = set()
+        remaining = positions
+        for child in node[1]:
+            if not remaining:
+                break
+            matched.update(_filter_node(child, remaining, filter_comparison))
+            remaining = [p for p in remaining if p not in matched]
+        return [p for p in positions if p in matched]
+
+    raise ValueError(f"Неизвестный узел условия: {kind}")
+
+
+if __name__ == "__main__":
+    from .parser import parse_where_clause
+
+    records = [
+        {"ID": 1, "name": "Anna", "age": 30, "active": True},
+        {"ID": 2, "name": "Boris", "age": None, "active": False},
+        {"ID": 3, "name": "Clara", "age": 17, "active": True},
+    ]
+    for where in [
+        "age > 18",
+        "age < 18 or not active = true",
+        'active = true and (name = "Anna" or age <= 17)',
+    ]:
+        predicate = compile_predicate(parse_where_clause(where))
+        print(f"{where} -> {[r['ID'] for r in records if predicate(r)]}")
@@ -0,0 +1,459 @@
+"""Сегментированное хранение таблицы: каталог сегментов и манифест.
+
+Таблица с storage=segmented хранится в каталоге data/<таблица>/:
+- manifest.json: список сегментов по порядку ID и счетчик имен файлов;
+- seg-NNNNNN.json: до SEGMENT_ROWS строк подряд, записанных кодеком таблицы.
+
+Сегмент отвечает за непрерывный диапазон ID: от ID после последней строки
+предыдущего сегмента до своей последней строки, а последний сегмент - и
+за все большие ID, поэтому новые строки попадают в него. Изменение
+переписывает только сегменты, в диапазон которых попали ID из операций;
+переполненный сегмент делится, опустевший удаляется.
+
+Удаление не переписывает сегмент: удаленные строки отмечаются в карте
+удалений сегмента (битовая карта по ID - first_id в манифесте), и чтение
+их пропускает. Сегмент, в котором доля удаленных строк достигла
+TOMBSTONE_COMPACT_RATIO, переписывается без них при следующей записи
+таблицы; команда vacuum сжимает все сегменты с удаленными строками.
+
+Сегменты записываются в файлы с новыми именами, а точкой фиксации служит
+атомарная замена манифеста: при сбое раньше нее остается прежняя версия
+таблицы, и журнал предзаписи доигрывает изменения заново.
+"""
+
+import base64
+import json
+import os
+import zlib
+from bisect import bisect_left, bisect_right
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from .codec import detect_codec, get_codec
+from .constants import SEGMENT_ROWS, TOMBSTONE_COMPACT_RATIO
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _record_id(record: Mapping[str, Any]) -> Any:
+    return record["ID"]
+
+
+def _load_bitmap(entry: Mapping[str, Any]) -> bytearray:
+    """Распаковывает карту удалений сегмента (пустую, если удалений нет)."""
+    encoded = entry.get("deleted")
+    if not encoded:
+        return bytearray()
+    return bytearray(zlib.decompress(base64.b64decode(encoded)))
+
+
+def _dump_bitmap(bits: bytearray) -> str:
+    # Карта почти всегда разреженная и сжимается до десятков байт
+    return base64.b64encode(zlib.compress(bytes(bits))).decode("ascii")
+
+
+def _is_deleted(bits: bytearray, offset: int) -> bool:
+    return bool(bits[offset >> 3] >> (offset & 7) & 1)
+
+
+def get_segment_dir(table_name: str, data_dir: str = "data") -> str:
+    """Возвращает каталог сегментов таблицы.
+
+    Args:
+        table_name: Имя таблицы
+        data_dir: Директория с файлами данных
+
+    Returns:
+        Путь к каталогу
+    """
+    return os.path.join(data_dir, table_name)
+
+
+def load_manifest(segment_dir: str) -> Dict[str, Any]:
+    """Читает манифест таблицы.
+
+    Args:
+        segment_dir: Каталог сегментов
+
+    Returns:
+        Манифест {"segments": [...], "next_file": N}; пустой, если таблица
+        еще не записана
+    """
+    try:
+        with open(os.path.join(segment_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"segments": [], "next_file": 1}
+
+
+def read_segment(segment_dir: str, entry: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """Читает записи одного сегмента.
+
+    Args:
+        segment_dir: Каталог сегментов
+        entry: Запись сегмента из манифеста
+
+    Returns:
+        Записи сегмента
+
+    Raises:
+        ValueError: Если файл сегмента поврежден
+    """
+    with open(os.path.join(segment_dir, entry["file"]), "rb") as f:
+        raw = f.read()
+    records = detect_codec(raw).decode(raw) if raw else []
+    bits = _load_bitmap(entry)
+    if bits:
+        first_id = entry["first_id"]
+        records = [
+            record
+            for record in records
+            if not _is_deleted(bits, record["ID"] - first_id)
+        ]
+    return records
+
+
+def iter_segments(segment_dir: str) -> Iterator[List[Dict[str, Any]]]:
+    """Потоково отдает записи таблицы по сегментам в порядке ID.
+
+    В памяти одновременно находится только один прочитанный сегмент.
+
+    Args:
+        segment_dir: Каталог сегментов
+
+    Returns:
+        Итератор списков записей сегментов
+    """
+    for entry in load_manifest(segment_dir)["segments"]:
+        yield read_segment(segment_dir, entry)
+
+
+def _segment_of(last_ids: List[Any], record_id: Any) -> Optional[int]:
+    """Номер сегмента, в диапазон которого попадает ID (None для не-int)."""
+    if not isinstance(record_id, int):
+        return None
+    return min(bisect_left(last_ids, record_id), len(last_ids) - 1)
+
+
+def touched_segments(
+    segments: List[Dict[str, Any]], operations: List[Dict[str, Any]]
+) -> Optional[Set[int]]:
+    """Находит сегменты, которые нужно переписать из-за вставок и обновлений.
+
+    Удаления сегменты не затрагивают: они отмечаются в картах удалений
+    (см. deleted_by_segment).
+
+    Args:
+        segments: Сегменты из манифеста
+        operations: Операции журнала {"op": ..., "record"/"ids": ...}
+
+    Returns:
+        Номера сегментов или None, если таблицу нужно записать целиком
+        (сегментов еще нет или изменения не описаны операциями)
+    """
+    if not segments or not operations:
+        return None
+    last_ids = [entry["last_id"] for entry in segments]
+    touched = set()
+    for operation in operations:
+        if operation.get("op") == "delete":
+            continue
+        if operation.get("op") == "insert":
+            ids = [operation["record"].get("ID")]
+        else:
+            ids = operation.get("ids", [])
+        for record_id in ids:
+            segment = _segment_of(last_ids, record_id)
+            if segment is None:
+                return None
+            touched.add(segment)
+    return touched
+
+
+def deleted_by_segment(
+    segments: List[Dict[str, Any]], operations: List[Dict[str, Any]]
+) -> Optional[Dict[int, List[int]]]:
+    """Раскладывает ID из операций удаления по сегментам.
+
+    Args:
+        segments: Сегменты из манифеста
+        operations: Операции журнала
+
+    Returns:
+        Номер сегмента -> удаленные ID или None, если таблицу нужно
+        записать целиком (ID не целые)
+    """
+    deleted: Dict[int, List[int]] = {}
+    if not segments:
+        return deleted
+    last_ids = [entry["last_id"] for entry in segments]
+    for operation in operations:
+        if operation.get("op") != "delete":
+            continue
+        for record_id in operation.get("ids", []):
+            segment = _segment_of(last_ids, record_id)
+            if segment is None:
+                return None
+            deleted.setdefault(segment, []).append(record_id)
+    return deleted
+
+
+def mark_deleted(entry: Dict[str, Any], ids: Iterable[int]) -> Dict[str, Any]:
+    """Отмечает ID в карте удалений сегмента.
+
+    ID вне диапазона сегмента (строки, еще не записанные в его файл) и уже
+    отмеченные ID пропускаются, поэтому повторное применение операций
+    из журнала предзаписи безопасно.
+
+    Args:
+        entry: Запись сегмента из манифеста
+        ids: Удаленные ID
+
+    Returns:
+        Новая запись сегмента (та же, если карта не изменилась)
+    """
+    first_id = entry["first_id"]
+    width = entry["last_id"] - first_id + 1
+    bits = _load_bitmap(entry)
+    bits.extend(bytes((width + 7) // 8 - len(bits)))
+    dead = entry.get("dead", 0)
+    for record_id in ids:
+        offset = record_id - first_id
+        if 0 <= offset < width and not _is_deleted(bits, offset):
+            bits[offset >> 3] |= 1 << (offset & 7)
+            dead += 1
+    if dead == entry.get("dead", 0):
+        return entry
+    return {**entry, "deleted": _dump_bitmap(bits), "dead": dead}
+
+
+def _rows(records: Sequence[Mapping[str, Any]], lo: int, hi: int) -> List[Any]:
+    if isinstance(records, list):
+        return records[lo:hi]
+    # Колоночная таблица отдает строки-представления
+    return [records[position].copy() for position in range(lo, hi)]
+
+
+def _write_segment(
+    segment_dir: str, manifest: Dict[str, Any], rows: List[Any], codec: str
+) -> Tuple[Dict[str, Any], int]:
+    """Записывает строки в новый файл сегмента.
+
+    Returns:
+        Кортеж (запись_сегмента_для_манифеста, записано_байт)
+    """
+    name = f"seg-{manifest['next_file']:06d}.json"
+    manifest["next_file"] += 1
+    payload = get_codec(codec).encode(rows)
+    with open(os.path.join(segment_dir, name), "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    entry = {
+        "file": name,
+        "rows": len(rows),
+        "first_id": rows[0]["ID"],
+        "last_id": rows[-1]["ID"],
+    }
+    return entry, len(payload)
+
+
+def _commit_manifest(
+    segment_dir: str, manifest: Dict[str, Any], new_segments: List[Dict[str, Any]]
+) -> None:
+    """Атомарно заменяет манифест и удаляет файлы замененных сегментов."""
+    old_files = {entry["file"] for entry in manifest["segments"]}
+    manifest["segments"] = new_segments
+    manifest_path = os.path.join(segment_dir, MANIFEST_FILE)
+    with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+        f.write(json.dumps(manifest, ensure_ascii=False))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    # Файлы замененных сегментов больше не нужны
+    for name in old_files - {entry["file"] for entry in new_segments}:
+        try:
+            os.remove(os.path.join(segment_dir, name))
+        except FileNotFoundError:
+            pass
+
+
+def _needs_compaction(entry: Mapping[str, Any], ratio: float) -> bool:
+    dead = entry.get("dead", 0)
+    return dead > 0 and dead >= ratio * entry["rows"]
+
+
+def write_segments(
+    segment_dir: str,
+    records: Sequence[Mapping[str, Any]],
+    operations: List[Dict[str, Any]],
+    codec: str,
+    segment_rows: int = SEGMENT_ROWS,
+    compact_ratio: float = TOMBSTONE_COMPACT_RATIO,
+) -> int:
+    """Записывает изменения таблицы, переписывая только затронутые сегменты.
+
+    Записи таблицы в памяти должны идти по возрастанию ID (как их выдает
+    вставка), тогда строки сегмента находятся двоичным поиском. Удаления
+    отмечаются в картах удалений; если в сегменте набралось не меньше
+    compact_ratio удаленных строк, он переписывается без них.
+
+    Args:
+        segment_dir: Каталог сегментов
+        records: Все записи таблицы (список или колоночная таблица)
+        operations: Операции с момента прошлой записи
+        codec: Кодек файлов сегментов
+        segment_rows: Наибольшее количество строк в сегменте
+        compact_ratio: Доля удаленных строк, при которой сегмент сжимается
+
+    Returns:
+        Количество записанных байт
+    """
+    os.makedirs(segment_dir, exist_ok=True)
+    manifest = load_manifest(segment_dir)
+    segments = list(manifest["segments"])
+    touched = touched_segments(segments, operations)
+    deleted = deleted_by_segment(segments, operations)
+    if touched is None or deleted is None:
+        touched = set(range(len(segments)))
+        deleted = {}
+
+    # Удаления в сегментах, которые не переписываются, отмечаются в картах
+    for i, ids in deleted.items():
+        if i not in touched:
+            segments[i] = mark_deleted(segments[i], ids)
+            if _needs_compaction(segments[i], compact_ratio):
+                touched.add(i)
+
+    # Границы сегментов в позициях записей: от конца предыдущего сегмента
+    # до последнего ID сегмента; последний сегмент забирает все остальное
+    ranges = []
+    lo = 0
+    for i, entry in enumerate(segments):
+        if i == len(segments) - 1:
+            hi = len(records)
+        else:
+            hi = bisect_right(records, entry["last_id"], lo=lo, key=_record_id)
+        # Сегмент, число живых строк которого разошлось с памятью
+        # (изменение не описано операциями), тоже переписывается
+        if hi - lo != entry["rows"] - entry.get("dead", 0):
+            touched.add(i)
+        ranges.append((lo, hi))
+        lo = hi
+    if not segments:
+        ranges.append((0, len(records)))
+        touched = {0}
+
+    written = 0
+    new_segments = []
+    for i, (lo, hi) in enumerate(ranges):
+        if i not in touched:
+            new_segments.append(segments[i])
+            continue
+        for start in range(lo, hi, segment_rows):
+            rows = _rows(records, start, min(start + segment_rows, hi))
+            entry, size = _write_segment(segment_dir, manifest, rows, codec)
+            new_segments.append(entry)
+            written += size
+
+    _commit_manifest(segment_dir, manifest, new_segments)
+    return written
+
+
+def vacuum_segments(segment_dir: str, codec: str) -> Tuple[int, int]:
+    """Переписывает сегменты с удаленными строками без них.
+
+    Работает только с файлами: сегменты читаются с диска (чтение уже
+    пропускает удаленные строки) и записываются заново.
+
+    Args:
+        segment_dir: Каталог сегментов
+        codec: Кодек файлов сегментов
+
+    Returns:
+        Кортеж (удалено_строк_из_файлов, освобождено_байт)
+    """
+    manifest = load_manifest(segment_dir)
+    reclaimed_rows = 0
+    reclaimed_bytes = 0
+    new_segments = []
+    for entry in manifest["segments"]:
+        if not entry.get("dead"):
+            new_segments.append(entry)
+            continue
+        path = os.path.join(segment_dir, entry["file"])
+        old_size = os.path.getsize(path)
+        rows = read_segment(segment_dir, entry)
+        size = 0
+        if rows:
+            new_entry, size = _write_segment(segment_dir, manifest, rows, codec)
+            new_segments.append(new_entry)
+        reclaimed_rows += entry["dead"]
+        reclaimed_bytes += old_size - size
+
+    if reclaimed_rows:
+        _commit_manifest(segment_dir, manifest, new_segments)
+    return reclaimed_rows, reclaimed_bytes
+
+
+def segment_stats(segment_dir: str) -> Dict[str, int]:
+    """Возвращает статистику места, занятого сегментами таблицы.
+
+    Место удаленных строк оценивается пропорционально их доле в сегменте.
+
+    Args:
+        segment_dir: Каталог сегментов
+
+    Returns:
+        Словарь: segments, rows (строк в файлах), dead (из них удаленных),
+        bytes (размер файлов), dead_bytes (оценка места удаленных строк)
+    """
+    stats = dict.fromkeys(("segments", "rows", "dead", "bytes", "dead_bytes"), 0)
+    for entry in load_manifest(segment_dir)["segments"]:
+        size = os.path.getsize(os.path.join(segment_dir, entry["file"]))
+        dead = entry.get("dead", 0)
+        stats["segments"] += 1
+        stats["rows"] += entry["rows"]
+        stats["dead"] += dead
+        stats["bytes"] += size
+        if entry["rows"]:
+            stats["dead_bytes"] += size * dead // entry["rows"]
+    return stats
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    rows = [{"ID": i, "name": f"user{i}", "age": 20 + i % 30} for i in range(1, 1001)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        write_segments(tmp_dir, rows, [], "compact", segment_rows=100)
+        print(f"Сегментов: {len(load_manifest(tmp_dir)['segments'])}")
+
+        rows[499]["age"] = 99
+        operations = [{"op": "update", "ids": [500], "set": {"age": 99}}]
+        before = {entry["file"] for entry in load_manifest(tmp_dir)["segments"]}
+        write_segments(tmp_dir, rows, operations, "compact", segment_rows=100)
+        after = {entry["file"] for entry in load_manifest(tmp_dir)["segments"]}
+        print(f"Переписано сегментов: {len(after - before)}")
+
+        loaded = [record for segment in iter_segments(tmp_dir) for record in segment]
+        print(f"Прочитано записей: {len(loaded)}, совпадают: {loaded == rows}")
+
+        del rows[199:209]
+        operations = [{"op": "delete", "ids": list(range(200, 210))}]
+        write_segments(tmp_dir, rows, operations, "compact", segment_rows=100)
+        print(f"После удаления: {segment_stats(tmp_dir)}")
+        print(f"vacuum (строк, байт): {vacuum_segments(tmp_dir, 'compact')}")
+        loaded = [record for segment in iter_segments(tmp_dir) for record in segment]
+        print(f"Прочитано записей: {len(loaded)}, совпадают: {loaded == rows}")
@@ -0,0 +1,725 @@
+"""Сервер базы данных на asyncio.
+
+Сервер принимает те же команды, что и интерактивный режим, по TCP.
+Протокол кадровый: каждый запрос и каждый ответ - это 4 байта длины
+(big-endian) и текст в UTF-8. Ответ - вывод команды, который в
+интерактивном режиме печатается в консоль.
+
+Команды select выполняются параллельно в пуле потоков над неизменяемым
+снимком базы (копией метаданных и таблиц), поэтому чтение не ждет записи.
+Все остальные команды выполняет одна задача записи в отдельном потоке:
+она забирает из очереди все накопившиеся команды, выполняет их по
+очереди, один раз фиксирует журнал предзаписи fsync (групповая
+фиксация) и публикует новый снимок. Таблица копируется в снимок при
+первом чтении, а после команд записи новый снимок получает копию из
+предыдущего с примененными операциями этих команд (см. apply_operations),
+поэтому таблица не копируется и индексы не строятся заново.
+"""
+
+import argparse
+import asyncio
+import copy
+import io
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import engine, index, tombstones
+from .columnar import ColumnarTable
+from .constants import (
+    LOAD_TEST_CONNECTIONS,
+    LOAD_TEST_REQUESTS,
+    LOAD_TEST_WRITE_RATIO,
+    SERVER_BACKLOG,
+    SERVER_HOST,
+    SERVER_MAX_FRAME,
+    SERVER_PORT,
+    SERVER_READ_WORKERS,
+    SERVER_WRITE_BATCH,
+)
+from .decorators import set_auto_confirm
+from .metrics import Histogram, metrics
+from .session import session
+from .statements import Statement, statement_cache
+from .wal import wal
+
+# Заголовок кадра: длина текста в байтах
+HEADER_SIZE = 4
+
+# Вывод команды в потоке, выполняющем ее на сервере
+_output = threading.local()
+
+# Ключи метаданных таблицы, которые меняются вместе с данными; при
+# изменении остальных (столбцы, индексы) копия таблицы строится заново
+_DATA_KEYS = {"version", "next_id", "stats"}
+
+
+class _OutputRouter:
+    """Подменяет sys.stdout: вывод потока с буфером попадает в его буфер.
+
+    Команды движка печатают результат через print; на сервере каждый поток
+    собирает вывод своей команды в ответ клиенту, а остальной вывод
+    (сообщения самого сервера) идет в исходный поток.
+    """
+
+    def __init__(self, stream: Any) -> None:
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        buffer = getattr(_output, "buffer", None)
+        if buffer is None:
+            return self.stream.write(text)
+        return buffer.write(text)
+
+    def flush(self) -> None:
+        if getattr(_output, "buffer", None) is None:
+            self.stream.flush()
+
+
+def capture_output(func: Callable[..., Any], *args: Any) -> str:
+    """Выполняет функцию и возвращает все, что она напечатала.
+
+    Ошибки функции попадают в вывод, как в интерактивном режиме.
+
+    Args:
+        func: Функция команды
+        *args: Аргументы функции
+
+    Returns:
+        Напечатанный текст
+    """
+    buffer = io.StringIO()
+    _output.buffer = buffer
+    try:
+        func(*args)
+    except Exception as e:
+        print(f"Неожиданная ошибка: {e}")
+    finally:
+        _output.buffer = None
+    return buffer.getvalue()
+
+
+def encode_frame(text: str) -> bytes:
+    """Кодирует текст в кадр протокола."""
+    payload = text.encode("utf-8")
+    return len(payload).to_bytes(HEADER_SIZE, "big") + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[str]:
+    """Читает один кадр протокола.
+
+    Args:
+        reader: Поток соединения
+
+    Returns:
+        Текст кадра или None, если соединение закрыто между кадрами
+
+    Raises:
+        ValueError: Если кадр больше SERVER_MAX_FRAME
+        asyncio.IncompleteReadError: Если соединение оборвалось посреди кадра
+    """
+    try:
+        header = await reader.readexactly(HEADER_SIZE)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise
+        return None
+
+    length = int.from_bytes(header, "big")
+    if length > SERVER_MAX_FRAME:
+        raise ValueError(f"Кадр слишком большой: {length} байт")
+    payload = await reader.readexactly(length)
+    return payload.decode("utf-8")
+
+
+def freeze_table(
+    table_data: Any, indexes: Dict[str, index.Index]
+) -> Tuple[Any, Dict[str, index.Index]]:
+    """Копирует таблицу и строит по копии ее индексы.
+
+    Колоночная таблица копируется по столбцам, строковая и бинарная -
+    в список словарей.
+
+    Args:
+        table_data: Данные таблицы сессии
+        indexes: Индексы таблицы сессии
+
+    Returns:
+        Кортеж (копия_таблицы, индексы_копии)
+    """
+    # Удаленные записи (см. tombstones.py) в копию не попадают
+    positions = tombstones.live_positions(table_data)
+    if isinstance(table_data, ColumnarTable):
+        frozen = table_data.take(positions)
+    else:
+        frozen = [dict(table_data[position]) for position in positions]
+    frozen_indexes = {
+        key: index.create_index(idx.kind, idx.column).build(frozen)
+        for key, idx in indexes.items()
+    }
+    return frozen, frozen_indexes
+
+
+def _record_id(record: Dict[str, Any]) -> Any:
+    return record.get("ID")
+
+
+def _find_position(table_data: Any, record_id: Any) -> Optional[int]:
+    """Находит позицию записи по ID двоичным поиском.
+
+    Записи в копии таблицы идут по возрастанию ID: новые ID только растут,
+    а копия строится в порядке таблицы.
+
+    Returns:
+        Позиция записи или None, если запись не найдена
+    """
+    try:
+        if isinstance(table_data, ColumnarTable):
+            column = table_data.columns.get("ID")
+            if column is None or column.nulls:
+                return None
+            position = bisect_left(column.values, record_id)
+        else:
+            position = bisect_left(table_data, record_id, key=_record_id)
+    except TypeError:
+        return None
+    if position == len(table_data) or table_data[position].get("ID") != record_id:
+        return None
+    return position
+
+
+def apply_operations(
+    frozen: Tuple[Any, Dict[str, index.Index]], operations: List[Dict[str, Any]]
+) -> Optional[Tuple[Any, Dict[str, index.Index]]]:
+    """Применяет операции журнала к копии таблицы из снимка.
+
+    Исходная копия не меняется: ее могут читать запросы к старому снимку.
+    Строковая таблица копируется как список ссылок на те же записи, а
+    обновленная запись заменяется новым словарем; у колоночной таблицы
+    копируются массивы столбцов. Индексы копируются через fork, поэтому
+    позиции меняются только там, где их затронули операции.
+
+    Args:
+        frozen: Кортеж (копия_таблицы, индексы_копии) из снимка
+        operations: Операции {"op": "insert" | "update" | "delete", ...}
+
+    Returns:
+        Новый кортеж (копия_таблицы, индексы_копии) или None, если записи
+        операции не найдены по ID (тогда копия строится заново)
+    """
+    table_data, indexes = frozen
+    columnar = isinstance(table_data, ColumnarTable)
+    if columnar:
+        table_data = table_data.fork()
+    else:
+        forked = tombstones.RowTable(table_data)
+        forked.deleted.update(tombstones.deleted_positions(table_data))
+        table_data = forked
+    indexes = {key: idx.fork() for key, idx in indexes.items()}
+
+    for operation in operations:
+        op = operation.get("op")
+        if op == "insert":
+            record = operation["record"]
+            position = len(table_data)
+            # Новая запись должна продолжить порядок ID
+            try:
+                if position and table_data[-1].get("ID") >= record.get("ID"):
+                    return None
+            except TypeError:
+                return None
+            table_data.append(record if columnar else dict(record))
+            for idx in indexes.values():
+                idx.add(record.get(idx.column), position)
+            continue
+
+        positions = [
+            _find_position(table_data, record_id) for record_id in operation["ids"]
+        ]
+        deleted = tombstones.deleted_positions(table_data)
+        if None in positions or not deleted.isdisjoint(positions):
+            return None
+        if op == "delete":
+            table_data = tombstones.mark_deleted(table_data, positions, indexes)
+            continue
+
+        changes = operation["set"]
+        column_indexes = [idx for idx in indexes.values() if idx.column in changes]
+        for position in positions:
+            record = table_data[position]
+            for idx in column_indexes:
+                idx.remove(record.get(idx.column), position)
+                idx.add(changes[idx.column], position)
+            if columnar:
+                record.update(changes)
+            else:
+                table_data[position] = {**record, **changes}
+    return table_data, indexes
+
+
+class Snapshot:
+    """Неизменяемый снимок базы для чтения.
+
+    Хранит копию метаданных и копии таблиц, уже понадобившихся для
+    чтения; снимок не меняется, изменения публикуются новым снимком.
+    """
+
+    __slots__ = ("metadata", "tables")
+
+    def __init__(
+        self, metadata: Dict[str, Any], tables: Dict[str, Tuple[Any, Any]]
+    ) -> None:
+        self.metadata = metadata
+        self.tables = tables
+
+    def load(self, metadata: Dict[str, Any], table_name: str) -> Tuple[Any, Any]:
+        """Возвращает копию таблицы и ее индексы (как engine.load_table)."""
+        return self.tables[table_name]
+
+
+def _same_schema(old_meta: Any, new_meta: Any) -> bool:
+    """Проверяет, что у таблицы изменились только данные (см. _DATA_KEYS)."""
+    if old_meta is None or new_meta is None:
+        return False
+    return all(
+        old_meta.get(key) == new_meta.get(key)
+        for key in old_meta.keys() | new_meta.keys()
+        if key not in _DATA_KEYS
+    )
+
+
+class DatabaseServer:
+    """Сервер: чтение по снимку в пуле потоков, запись одной задачей."""
+
+    def __init__(self, read_workers: int = SERVER_READ_WORKERS) -> None:
+        self.readers = ThreadPoolExecutor(read_workers, "db-reader")
+        self.writer = ThreadPoolExecutor(1, "db-writer")
+        self.snapshot = Snapshot({}, {})
+        self.queue: Optional[asyncio.Queue] = None
+        self._freezing: Dict[str, asyncio.Future] = {}
+        self.connections = 0
+        self.max_connections = 0
+        self.requests = 0
+
+    def start(self) -> None:
+        """Готовит сессию: восстанавливает WAL и публикует первый снимок."""
+        recovered = engine.recover_from_wal()
+        if recovered:
+            print(f"Восстановлено операций из журнала предзаписи: {recovered}")
+        # Подтверждения удаления на сервере некому вводить, а журнал
+        # фиксируется один раз на пачку команд записи
+        set_auto_confirm(True)
+        session.sync_commits = False
+        session.changes = []
+        self._publish()
+
+    def stop(self) -> None:
+        """Дожидается команд в работе и записывает изменения на диск."""
+        self.readers.shutdown(wait=True)
+        self.writer.shutdown(wait=True)
+        if session.metadata is not None:
+            engine.flush_tables(session.metadata)
+        set_auto_confirm(False)
+        session.sync_commits = True
+        session.changes = None
+
+    def _publish(self) -> None:
+        """Публикует снимок после команд записи (выполняется в потоке записи).
+
+        Копии таблиц, чьи метаданные (версия, столбцы, индексы) не изменились,
+        переходят в новый снимок. К копиям таблиц, у которых изменились только
+        данные, применяются операции команд пачки (см. apply_operations), если
+        каждая изменившая таблицу команда передала свои операции; остальные
+        таблицы будут скопированы заново при первом чтении.
+        """
+        old = self.snapshot
+        # Таблица -> операции команд пачки (None - изменения неизвестны)
+        # и число команд, изменивших таблицу
+        operations: Dict[str, Optional[List[Dict[str, Any]]]] = {}
+        commands: Dict[str, int] = {}
+        for name, table_operations in session.changes or []:
+            known = operations.get(name, [])
+            if known is not None and table_operations:
+                operations[name] = known + table_operations
+            else:
+                operations[name] = None
+            commands[name] = commands.get(name, 0) + 1
+        session.changes = []
+
+        metadata = copy.deepcopy(session.load_metadata(engine.META_FILE))
+        tables = {}
+        for name, table in old.tables.items():
+            old_meta, new_meta = old.metadata.get(name), metadata.get(name)
+            if old_meta == new_meta:
+                tables[name] = table
+            elif (
+                operations.get(name) is not None
+                and _same_schema(old_meta, new_meta)
+                and new_meta.get("version", 0) - old_meta.get("version", 0)
+                == commands[name]
+            ):
+                table = apply_operations(table, operations[name])
+                if table is not None:
+                    tables[name] = table
+        self.snapshot = Snapshot(metadata, tables)
+
+    def _apply_batch(self, commands: List[str]) -> List[str]:
+        """Выполняет пачку команд записи (в потоке записи).
+
+        Args:
+            commands: Команды в порядке поступления
+
+        Returns:
+            Вывод каждой команды
+        """
+        outputs = [capture_output(engine.execute_command, c) for c in commands]
+        # Ответы отправляются только после fsync журнала
+        wal.sync()
+        self._publish()
+        return outputs
+
+    def _freeze(self, table_name: str) -> Snapshot:
+        """Добавляет копию таблицы в снимок (в потоке записи).
+
+        Поток записи выполняет задачи по одной, поэтому таблица сессии
+        копируется между пачками команд и соответствует текущему снимку.
+        """
+        current = self.snapshot
+        metadata = session.load_metadata(engine.META_FILE)
+        if table_name in current.tables or table_name not in metadata:
+            return current
+        table_data, indexes = engine.load_table(metadata, table_name)
+        tables = dict(current.tables)
+        tables[table_name] = freeze_table(table_data, indexes)
+        self.snapshot = Snapshot(current.metadata, tables)
+        return self.snapshot
+
+    def _read(self, snapshot: Snapshot, statement: Statement) -> str:
+        """Выполняет select над снимком (в потоке чтения)."""
+        metrics.context_table = statement.table
+        start_time = time.perf_counter()
+        output = capture_output(
+            engine.run_select, snapshot.metadata, statement, snapshot.load
+        )
+        if metrics.enabled:
+            elapsed = time.perf_counter() - start_time
+            metrics.observe("command_seconds", elapsed, op="select")
+            metrics.inc("commands_total", op="select")
+        return output
+
+    async def _snapshot_for(self, table_name: str) -> Snapshot:
+        """Возвращает снимок, в котором есть копия таблицы."""
+        snapshot = self.snapshot
+        if table_name in snapshot.tables or table_name not in snapshot.metadata:
+            return snapshot
+
+        # Одновременные чтения таблицы ждут одного копирования
+        future = self._freezing.get(table_name)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.writer, self._freeze, table_name)
+            self._freezing[table_name] = future
+            future.add_done_callback(lambda _: self._freezing.pop(table_name, None))
+        return await future
+
+    async def _write_loop(self) -> None:
+        """Задача записи: выполняет накопившиеся команды одной пачкой."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while not self.queue.empty() and len(batch) < SERVER_WRITE_BATCH:
+                batch.append(self.queue.get_nowait())
+
+            commands = [command for command, _ in batch]
+            try:
+                outputs = await loop.run_in_executor(
+                    self.writer, self._apply_batch, commands
+                )
+            except Exception as e:
+                outputs = [f"Неожиданная ошибка: {e}\n"] * len(batch)
+            for (_, future), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+
+    async def execute(self, command: str) -> str:
+        """Выполняет команду клиента и возвращает ее вывод.
+
+        Args:
+            command: Текст команды
+
+        Returns:
+            Вывод команды
+        """
+        self.requests += 1
+        first_word = command.split(None, 1)[0].strip("\"'").lower()
+        if first_word == "select":
+            try:
+                statement = statement_cache.get(command)
+            except ValueError as e:
+                return f"{e}\n"
+            snapshot = await self._snapshot_for(statement.table)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.readers, self._read, snapshot, statement
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((command, future))
+        return await future
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Обслуживает одно соединение до его закрытия или команды exit."""
+        self.connections += 1
+        self.max_connections = max(self.max_connections, self.connections)
+        try:
+            while True:
+                command = await read_frame(reader)
+                if command is None:
+                    break
+                command = command.strip()
+                if command.lower() == "exit":
+                    writer.write(encode_frame("Соединение закрыто.\n"))
+                    await writer.drain()
+                    break
+                output = await self.execute(command) if command else ""
+                writer.write(encode_frame(output))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            print(f"Соединение прервано: {e}")
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        """Принимает соединения, пока задачу не отменят."""
+        self.queue = asyncio.Queue()
+        write_task = asyncio.create_task(self._write_loop())
+        server = await asyncio.start_server(
+            self.handle_client, host, port, backlog=SERVER_BACKLOG
+        )
+        address = ", ".join(
+            f"{sock.getsockname()[0]}:{sock.getsockname()[1]}"
+            for sock in server.sockets
+        )
+        print(f"Сервер базы данных слушает {address}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            write_task.cancel()
+
+
+async def send_command(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, command: str
+) -> str:
+    """Отправляет команду серверу и ждет ответа.
+
+    Args:
+        reader: Поток чтения соединения
+        writer: Поток записи соединения
+        command: Текст команды
+
+    Returns:
+        Вывод команды
+
+    Raises:
+        ConnectionError: Если сервер закрыл соединение
+    """
+    writer.write(encode_frame(command))
+    await writer.drain()
+    response = await read_frame(reader)
+    if response is None:
+        raise ConnectionError("Сервер закрыл соединение")
+    return response
+
+
+async def run_client(host: str, port: int) -> None:
+    """Отправляет серверу команды из stdin и печатает ответы."""
+    reader, writer = await asyncio.open_connection(host, port)
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            command = line.strip()
+            if not command:
+                continue
+            print(await send_command(reader, writer, command), end="", flush=True)
+            if command.lower() == "exit":
+                break
+    finally:
+        writer.close()
+
+
+async def load_test(
+    host: str,
+    port: int,
+    connections: int = LOAD_TEST_CONNECTIONS,
+    requests: int = LOAD_TEST_REQUESTS,
+    write_ratio: float = LOAD_TEST_WRITE_RATIO,
+    table_name: str = "load_test",
+) -> Dict[str, float]:
+    """Нагружает сервер одновременными соединениями и печатает пропускную способность.
+
+    Создает таблицу table_name с 1000 записями, затем каждое соединение
+    отправляет requests команд: insert с вероятностью write_ratio, иначе
+    select по случайному значению. В конце таблица удаляется.
+
+    Args:
+        host: Адрес сервера
+        port: Порт сервера
+        connections: Число одновременных соединений
+        requests: Число команд на соединение
+        write_ratio: Доля команд insert
+        table_name: Имя временной таблицы
+
+    Returns:
+        Словарь с числом команд, временем, командами в секунду и
+        квантилями задержки в секундах
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    await send_command(reader, writer, f"drop_table {table_name}")
+    await send_command(
+        reader, writer, f"create_table {table_name} value:int label:str"
+    )
+    await send_command(reader, writer, f"create_index {table_name} value hash")
+    for value in range(1000):
+        command = f'insert into {table_name} values ({value}, "row{value}")'
+        await send_command(reader, writer, command)
+
+    latency = Histogram()
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        conn_reader, conn_writer = await asyncio.open_connection(host, port)
+        try:
+            for _ in range(requests):
+                value = random.randrange(1000)
+                if random.random() < write_ratio:
+                    command = f'insert into {table_name} values ({value}, "new")'
+                else:
+                    command = f"select from {table_name} where value = {value}"
+                start_time = time.perf_counter()
+                response = await send_command(conn_reader, conn_writer, command)
+                latency.observe(time.perf_counter() - start_time)
+                if "Ошибка" in response:
+                    errors += 1
+        finally:
+            conn_writer.close()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    elapsed = time.perf_counter() - start_time
+
+    await send_command(reader, writer, f"drop_table {table_name}")
+    writer.close()
+
+    total = connections * requests
+    result = {
+        "commands": total,
+        "seconds": elapsed,
+        "commands_per_second": total / elapsed if elapsed > 0 else 0.0,
+        "p50": latency.quantile(0.5),
+        "p99": latency.quantile(0.99),
+    }
+    print(f"Соединений: {connections}, команд: {total} ({write_ratio:.0%} insert)")
+    msg = f"Время: {elapsed:.3f} с, {result['commands_per_second']:.0f} команд/с,"
+    msg += f" задержка p50 {result['p50'] * 1000:.2f} мс,"
+    msg += f" p99 {result['p99'] * 1000:.2f} мс"
+    print(msg)
+    if errors:
+        print(f"Ответов с ошибкой: {errors}")
+    return result
+
+
+def run(argv: Optional[List[str]] = None) -> None:
+    """Запускает сервер, клиент (--client) или нагрузочный тест (--load-test).
+
+    Args:
+        argv: Аргументы командной строки (по умолчанию sys.argv[1:])
+    """
+    arg_parser = argparse.ArgumentParser(prog="database-server")
+    arg_parser.add_argument("--host", default=SERVER_HOST, help="адрес сервера")
+    arg_parser.add_argument(
+        "--port", type=int, default=SERVER_PORT, help="порт сервера"
+    )
+    arg_parser.add_argument(
+        "--readers",
+        type=int,
+        default=SERVER_READ_WORKERS,
+        help="число потоков для select",
+    )
+    mode = arg_parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--client", action="store_true", help="отправлять серверу команды из stdin"
+    )
+    mode.add_argument(
+        "--load-test", action="store_true", help="нагрузочный тест запущенного сервера"
+    )
+    arg_parser.add_argument(
+        "--connections",
+        type=int,
+        default=LOAD_TEST_CONNECTIONS,
+        help="число соединений нагрузочного теста",
+    )
+    arg_parser.add_argument(
+        "--requests",
+        type=int,
+        default=LOAD_TEST_REQUESTS,
+        help="число команд на соединение",
+    )
+    arg_parser.add_argument(
+        "--write-ratio",
+        type=float,
+        default=LOAD_TEST_WRITE_RATIO,
+        help="доля команд insert",
+    )
+    args = arg_parser.parse_args(argv)
+
+    try:
+        if args.client:
+            asyncio.run(run_client(args.host, args.port))
+            return
+        if args.load_test:
+            asyncio.run(
+                load_test(
+                    args.host,
+                    args.port,
+                    args.connections,
+                    args.requests,
+                    args.write_ratio,
+                )
+            )
+            return
+    except OSError as e:
+        print(f"Ошибка: Не удалось подключиться к {args.host}:{args.port}: {e}")
+        return
+
+    server = DatabaseServer(args.readers)
+    stdout = sys.stdout
+    sys.stdout = _OutputRouter(stdout)
+    try:
+        server.start()
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Ошибка: Не удалось запустить сервер: {e}")
+    finally:
+        server.stop()
+        sys.stdout = stdout
+    msg = f"Сервер остановлен. Обработано команд: {server.requests},"
+    msg += f" наибольшее число соединений: {server.max_connections}"
+    print(msg)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,272 @@
+"""Кэш метаданных и загруженных таблиц текущей сессии.
+
+Метаданные и таблицы читаются с диска один раз и переиспользуются между
+командами, пока подпись их файлов (время изменения, размер и inode)
+не меняется, поэтому внешние правки файлов по-прежнему видны. Измененные
+таблицы помечаются "грязными" и записываются на диск согласно политике
+сброса.
+
+Файл метаданных общий для процессов, поэтому он не перезаписывается
+целиком: при сохранении записи измененных таблиц сливаются с текущим
+содержимым файла с оптимистичной проверкой версий таблиц.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from . import locks, utils
+from .constants import FLUSH_EVERY_OPS, FLUSH_IMMEDIATE, FLUSH_ON_EXIT, FLUSH_POLICY
+
+# Политика сброса: "immediate", "exit" или число операций между сбросами
+FlushPolicy = Union[str, int]
+
+
+class TableEntry:
+    """Загруженная таблица сессии вместе с несохраненными изменениями."""
+
+    __slots__ = ("table_data", "signature", "indexes", "operations", "dirty")
+
+    def __init__(self, table_data: Any, signature: Any) -> None:
+        self.table_data = table_data
+        self.signature = signature
+        self.indexes: Dict[str, Any] = {}
+        self.operations: List[Dict[str, Any]] = []
+        self.dirty = False
+
+
+def parse_flush_policy(value: str) -> FlushPolicy:
+    """Разбирает политику сброса из строки.
+
+    Args:
+        value: "immediate", "exit", "every" (каждые FLUSH_EVERY_OPS операций)
+            или положительное число операций
+
+    Returns:
+        Политика сброса
+
+    Raises:
+        ValueError: Если политика некорректна
+    """
+    value = value.strip().lower()
+    if value in (FLUSH_IMMEDIATE, FLUSH_ON_EXIT):
+        return value
+    if value == "every":
+        return FLUSH_EVERY_OPS
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    msg = f"Некорректная политика сброса: {value}. Допустимые значения: "
+    msg += f"{FLUSH_IMMEDIATE}, {FLUSH_ON_EXIT}, every или число операций"
+    raise ValueError(msg)
+
+
+class Session:
+    """Метаданные и таблицы, загруженные в текущей сессии."""
+
+    def __init__(self, flush_policy: FlushPolicy = FLUSH_POLICY) -> None:
+        self.flush_policy = flush_policy
+        self.metadata: Optional[Dict[str, Any]] = None
+        self.metadata_signature: Any = None
+        # Версии таблиц в файле метаданных на момент чтения или сохранения
+        self.base_versions: Dict[str, int] = {}
+        self.tables: Dict[str, TableEntry] = {}
+        self.pending_operations = 0
+        # Ждать ли fsync журнала предзаписи после каждой команды; в пакетном
+        # режиме журнал фиксируется только при сбросе таблиц
+        self.sync_commits = True
+        # Изменения таблиц для снимков сервера: (таблица, операции команды)
+        # по порядку; None - изменения не собираются
+        self.changes: Optional[List[Tuple[str, List[Dict[str, Any]]]]] = None
+
+    def load_metadata(self, filepath: str) -> Dict[str, Any]:
+        """Возвращает метаданные, перечитывая файл только после его изменения.
+
+        Записи таблиц с несохраненными изменениями остаются из памяти, если
+        версия таблицы в файле не изменилась. Если изменилась, другой процесс
+        уже доиграл эти изменения из журнала предзаписи в файлы таблицы:
+        копия в памяти устарела и забывается.
+
+        Args:
+            filepath: Путь к файлу метаданных
+
+        Returns:
+            Словарь метаданных
+        """
+        signature = utils.get_file_signature(filepath)
+        if self.metadata is not None and signature == self.metadata_signature:
+            return self.metadata
+
+        metadata = utils.load_metadata(filepath)
+        base_versions = {
+            table_name: table_meta.get("version", 0)
+            for table_name, table_meta in metadata.items()
+        }
+        for table_name in self.dirty_tables():
+            if (
+                self.metadata is not None
+                and table_name in self.metadata
+                and base_versions.get(table_name) == self.base_versions.get(table_name)
+            ):
+                metadata[table_name] = self.metadata[table_name]
+            else:
+                del self.tables[table_name]
+        self.base_versions = base_versions
+
+        if self.metadata is None:
+            self.metadata = metadata
+        else:
+            # Движок держит ссылку на словарь метаданных, поэтому он
+            # обновляется на месте
+            self.metadata.clear()
+            self.metadata.update(metadata)
+        self.metadata_signature = signature
+        return self.metadata
+
+    def save_metadata(self, filepath: str, table_names: List[str]) -> List[str]:
+        """Сохраняет записи метаданных таблиц, сливая их с файлом.
+
+        Под блокировкой метаданных файл перечитывается, записи таблиц из
+        table_names заменяются записями из памяти (или удаляются, если
+        таблицы в памяти нет), записи остальных таблиц берутся из файла.
+        Оптимистичная проверка: если версия таблицы в файле отличается от
+        прочитанной раньше, ее изменил другой процесс (доиграв изменения
+        этого процесса из журнала предзаписи) - запись из файла остается,
+        а таблица забывается.
+
+        Args:
+            filepath: Путь к файлу метаданных
+            table_names: Таблицы, записи которых нужно сохранить
+
+        Returns:
+            Таблицы, которые не сохранены из-за изменения другим процессом
+        """
+        with locks.metadata_lock():
+            disk = utils.load_metadata(filepath)
+            skipped = []
+            for table_name in table_names:
+                disk_version = None
+                if table_name in disk:
+                    disk_version = disk[table_name].get("version", 0)
+                if disk_version != self.base_versions.get(table_name):
+                    skipped.append(table_name)
+                    self.tables.pop(table_name, None)
+                elif table_name in self.metadata:
+                    disk[table_name] = self.metadata[table_name]
+                else:
+                    disk.pop(table_name, None)
+
+            utils.save_metadata(disk, filepath)
+            self.metadata_signature = utils.get_file_signature(filepath)
+
+        # Записи остальных таблиц обновляются из файла, кроме таблиц
+        # с несохраненными изменениями
+        saved = set(table_names)
+        dirty = set(self.dirty_tables()) - saved
+        for table_name in list(self.metadata):
+            if table_name not in disk and table_name not in dirty:
+                del self.metadata[table_name]
+        for table_name, table_meta in disk.items():
+            if table_name not in dirty:
+                self.metadata[table_name] = table_meta
+        self.base_versions = {
+            table_name: table_meta.get("version", 0)
+            for table_name, table_meta in disk.items()
+            if table_name not in dirty
+        } | {
+            table_name: version
+            for table_name, version in self.base_versions.items()
+            if table_name in dirty
+        }
+        return skipped
+
+    def get_table(self, table_name: str, signature: Any) -> Optional[Any]:
+        """Возвращает загруженную таблицу, если она еще актуальна.
+
+        Несохраненная таблица возвращается всегда: она новее файлов на диске.
+
+        Args:
+            table_name: Имя таблицы
+            signature: Текущая подпись файлов таблицы
+
+        Returns:
+            Данные таблицы или None, если таблицу нужно загрузить заново
+        """
+        entry = self.tables.get(table_name)
+        if entry is None:
+            return None
+        if entry.dirty or entry.signature == signature:
+            return entry.table_data
+        del self.tables[table_name]
+        return None
+
+    def put_table(self, table_name: str, table_data: Any, signature: Any) -> None:
+        """Запоминает таблицу, только что загруженную с диска."""
+        self.tables[table_name] = TableEntry(table_data, signature)
+
+    def mark_dirty(
+        self,
+        table_name: str,
+        table_data: Any,
+        operations: List[Dict[str, Any]],
+        indexes: Dict[str, Any],
+    ) -> None:
+        """Отмечает таблицу измененной до следующего сброса.
+
+        Args:
+            table_name: Имя таблицы
+            table_data: Данные таблицы после изменения
+            operations: Операции для журнала (режим хранения "log")
+            indexes: Индексы таблицы, уже отражающие изменения
+        """
+        entry = self.tables.get(table_name)
+        if entry is None:
+            entry = self.tables[table_name] = TableEntry(table_data, None)
+        entry.table_data = table_data
+        entry.indexes = indexes
+        entry.operations.extend(operations)
+        entry.dirty = True
+        self.pending_operations += 1
+        if self.changes is not None:
+            self.changes.append((table_name, operations))
+
+    def mark_clean(self, table_name: str, signature: Any) -> None:
+        """Отмечает таблицу сохраненной с новой подписью файлов."""
+        entry = self.tables[table_name]
+        entry.signature = signature
+        entry.operations = []
+        entry.dirty = False
+
+    def forget(self, table_name: str) -> None:
+        """Забывает таблицу (например, после удаления или ошибки изменения)."""
+        self.tables.pop(table_name, None)
+
+    def discard(self, table_name: str) -> None:
+        """Забывает таблицу после неудачного изменения.
+
+        Таблица с несохраненными изменениями остается: иначе они бы потерялись.
+        """
+        entry = self.tables.get(table_name)
+        if entry is not None and not entry.dirty:
+            del self.tables[table_name]
+
+    def dirty_tables(self) -> List[str]:
+        """Возвращает имена таблиц с несохраненными изменениями."""
+        return [name for name, entry in self.tables.items() if entry.dirty]
+
+    def is_dirty(self) -> bool:
+        """Есть ли несохраненные изменения."""
+        return any(entry.dirty for entry in self.tables.values())
+
+    def should_flush(self) -> bool:
+        """Проверяет, пора ли записать изменения согласно политике сброса."""
+        if self.flush_policy == FLUSH_IMMEDIATE:
+            return True
+        if self.flush_policy == FLUSH_ON_EXIT:
+            return False
+        return self.pending_operations >= self.flush_policy
+
+    def flushed(self) -> None:
+        """Сбрасывает счетчик операций после записи изменений."""
+        self.pending_operations = 0
+
+
+# Сессия текущего процесса
+session = Session()
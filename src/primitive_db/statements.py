@@ -0,0 +1,472 @@
+"""Разбор команд insert/select/update/delete и кэш разобранных команд.
+
+Команда разбирается в дерево (Statement), в котором значения из запроса
+заменены местами для параметров. Шаблон кэшируется по тексту команды,
+в котором литералы (строки в кавычках, числа, true/false) заменены на
+метки, поэтому повторные команды той же формы с другими значениями
+не проходят через shlex и парсеры: значения подставляются в готовый шаблон.
+"""
+
+import re
+import shlex
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import parser
+from .constants import (
+    COMMAND_DELETE,
+    COMMAND_INSERT,
+    COMMAND_SELECT,
+    COMMAND_UPDATE,
+    STATEMENT_CACHE_MAX_ENTRIES,
+)
+
+# Команды, которые разбираются в Statement и кэшируются
+STATEMENT_COMMANDS = {COMMAND_INSERT, COMMAND_SELECT, COMMAND_UPDATE, COMMAND_DELETE}
+
+# Литералы команды: строка в кавычках, целое число или true/false
+# отдельным словом
+_LITERAL = re.compile(
+    r"""(?P<string>"(?P<double>[^"]*)"|'(?P<single>[^']*)')
+    |(?<![^\s,(=<>!])(?P<bare>-?\d+|(?i:true|false))(?![^\s,)])""",
+    re.VERBOSE,
+)
+
+# Строки, которые разбираются одинаково с кавычками и без них: слова
+# без кавычек, скобок, запятых и операторов через одиночные пробелы
+_PLAIN_STRING = re.compile(r"[\w.@:+\-]+(?: [\w.@:+\-]+)*")
+
+# Слова, которые внутри строки меняют разбор команды без кавычек
+_KEYWORDS = {
+    "and", "or", "not", "where", "set", "limit", "offset", "from", "into", "values",
+    "group", "by",
+}
+
+# Метка параметра в тексте шаблона; \x01 не встречается в обычном вводе
+_MARKER = "\x01"
+_MARKER_VALUE = re.compile("\x01(\\d+)\x01")
+
+
+class Placeholder:
+    """Место для значения параметра в шаблоне команды."""
+
+    __slots__ = ("index",)
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"?{self.index}"
+
+
+class Statement:
+    """Разобранная команда insert/select/update/delete.
+
+    В шаблоне из кэша значения заменены на Placeholder, конкретная
+    команда получается подстановкой параметров через bind. У агрегатного
+    select columns - список выражений (см. parser.parse_select_list),
+    group_by - столбцы группировки; у обычного select columns равен None.
+    """
+
+    __slots__ = (
+        "command", "table", "values", "set_clause", "where", "limit", "offset",
+        "columns", "group_by",
+    )
+
+    def __init__(
+        self,
+        command: str,
+        table: str,
+        values: Optional[List[Any]] = None,
+        set_clause: Optional[Dict[str, Any]] = None,
+        where: Optional[List[Any]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        columns: Optional[List[parser.SelectItem]] = None,
+        group_by: Optional[List[str]] = None,
+    ) -> None:
+        self.command = command
+        self.table = table
+        self.values = values
+        self.set_clause = set_clause
+        self.where = where if where is not None else []
+        self.limit = limit
+        self.offset = offset
+        self.columns = columns
+        self.group_by = group_by if group_by is not None else []
+
+    def bind(self, params: List[Any]) -> "Statement":
+        """Подставляет значения параметров в шаблон.
+
+        Args:
+            params: Значения параметров по номерам меток
+
+        Returns:
+            Новая команда без Placeholder
+        """
+        values = None
+        if self.values is not None:
+            values = [_bind_value(value, params) for value in self.values]
+        set_clause = None
+        if self.set_clause is not None:
+            set_clause = {
+                column: _bind_value(value, params)
+                for column, value in self.set_clause.items()
+            }
+        where = [_bind_node(node, params) for node in self.where]
+        return Statement(
+            self.command, self.table, values, set_clause, where, self.limit,
+            self.offset, self.columns, self.group_by,
+        )
+
+    def __repr__(self) -> str:
+        parts = [f"{name}={getattr(self, name)!r}" for name in self.__slots__]
+        return f"Statement({', '.join(parts)})"
+
+
+def _bind_value(value: Any, params: List[Any]) -> Any:
+    return params[value.index] if isinstance(value, Placeholder) else value
+
+
+def _bind_node(node: Any, params: List[Any]) -> Any:
+    if len(node) == 3:
+        column, op, value = node
+        return column, op, _bind_value(value, params)
+    if node[0] == parser.LOGICAL_NOT:
+        return node[0], _bind_node(node[1], params)
+    return node[0], tuple(_bind_node(child, params) for child in node[1])
+
+
+def _parse_insert(tokens: List[str]) -> Statement:
+    usage = "Ошибка: Используйте: insert into <таблица> values (<значение1>, ...)"
+    if len(tokens) < 6 or tokens[1].lower() != "into":
+        raise ValueError(usage)
+    if tokens[3].lower() != "values":
+        raise ValueError(usage)
+
+    values_str = " ".join(tokens[4:])
+    try:
+        values = parser.parse_values(values_str)
+    except ValueError as e:
+        raise ValueError(f"Ошибка парсинга значений: {e}")
+    return Statement(COMMAND_INSERT, tokens[2], values=values)
+
+
+def _parse_select(tokens: List[str]) -> Statement:
+    usage = "Ошибка: Используйте: select [<выражения>] from <таблица>"
+    usage += " [where <условие>] [group by <столбцы>] [limit N] [offset M]"
+    lowered = [token.lower() for token in tokens]
+    if "from" not in lowered[1:]:
+        raise ValueError(usage)
+
+    # Выражения между select и from: count(*), avg(price), ...
+    columns = None
+    from_index = lowered.index("from", 1)
+    if from_index > 1:
+        try:
+            columns = parser.parse_select_list(" ".join(tokens[1:from_index]))
+        except ValueError as e:
+            raise ValueError(f"Ошибка: {e}")
+        tokens = tokens[:1] + tokens[from_index:]
+    if len(tokens) < 3:
+        raise ValueError(usage)
+
+    # Отделяем LIMIT и OFFSET от условия
+    try:
+        tokens, limit, offset = parser.parse_limit_offset(tokens)
+    except ValueError as e:
+        raise ValueError(f"Ошибка: {e}")
+
+    # GROUP BY идет после условия
+    group_by: List[str] = []
+    for i in range(len(tokens) - 2, 2, -1):
+        if tokens[i].lower() == "group" and tokens[i + 1].lower() == "by":
+            try:
+                group_by = parser.parse_group_by(" ".join(tokens[i + 2 :]))
+            except ValueError as e:
+                raise ValueError(f"Ошибка: {e}")
+            tokens = tokens[:i]
+            break
+    if group_by and columns is None:
+        raise ValueError("Ошибка: Для group by укажите выражения select")
+
+    where: List[Any] = []
+    if len(tokens) > 4 and tokens[3].lower() == "where":
+        where_str = " ".join(tokens[4:])
+        try:
+            where = parser.parse_where_clause(where_str)
+        except ValueError as e:
+            raise ValueError(f"Ошибка парсинга условия WHERE: {e}")
+    elif len(tokens) > 3:
+        raise ValueError(usage)
+    return Statement(
+        COMMAND_SELECT, tokens[2], where=where, limit=limit, offset=offset,
+        columns=columns, group_by=group_by,
+    )
+
+
+def _parse_update(tokens: List[str]) -> Statement:
+    usage = "Ошибка: Используйте: update <таблица>"
+    usage += " set <столбец> = <значение> where <условие>"
+    if len(tokens) < 7:
+        raise ValueError(usage)
+
+    # Ищем SET и WHERE
+    set_index = -1
+    where_index = -1
+    for i in range(len(tokens)):
+        if tokens[i].lower() == "set":
+            set_index = i
+        elif tokens[i].lower() == "where":
+            where_index = i
+    if set_index == -1 or where_index == -1:
+        raise ValueError(usage)
+
+    set_str = " ".join(tokens[set_index + 1 : where_index])
+    where_str = " ".join(tokens[where_index + 1 :])
+    try:
+        set_clause = parser.parse_set_clause(set_str)
+        where = parser.parse_where_clause(where_str)
+    except ValueError as e:
+        raise ValueError(f"Ошибка парсинга: {e}")
+    return Statement(COMMAND_UPDATE, tokens[1], set_clause=set_clause, where=where)
+
+
+def _parse_delete(tokens: List[str]) -> Statement:
+    usage = "Ошибка: Используйте: delete from <таблица> where <условие>"
+    if len(tokens) < 5:
+        raise ValueError(usage)
+    if tokens[1].lower() != "from" or tokens[3].lower() != "where":
+        raise ValueError(usage)
+
+    where_str = " ".join(tokens[4:])
+    try:
+        where = parser.parse_where_clause(where_str)
+    except ValueError as e:
+        raise ValueError(f"Ошибка парсинга условия WHERE: {e}")
+    return Statement(COMMAND_DELETE, tokens[2], where=where)
+
+
+_PARSERS = {
+    COMMAND_INSERT: _parse_insert,
+    COMMAND_SELECT: _parse_select,
+    COMMAND_UPDATE: _parse_update,
+    COMMAND_DELETE: _parse_delete,
+}
+
+
+def parse_statement(text: str) -> Statement:
+    """Разбирает команду insert/select/update/delete.
+
+    Args:
+        text: Текст команды
+
+    Returns:
+        Разобранная команда
+
+    Raises:
+        ValueError: Если команда некорректна (сообщение готово к выводу)
+    """
+    try:
+        tokens = shlex.split(text)
+    except ValueError as e:
+        raise ValueError(f"Ошибка разбора команды: {e}")
+    if not tokens or tokens[0].lower() not in _PARSERS:
+        raise ValueError(f"Функции '{tokens[0] if tokens else ''}' нет.")
+    return _PARSERS[tokens[0].lower()](tokens)
+
+
+def extract_parameters(text: str) -> Tuple[str, List[Any]]:
+    """Заменяет литералы команды метками параметров.
+
+    Параметрами становятся только литералы, которые без кавычек разбираются
+    так же, как с ними, поэтому подстановка в шаблон дает тот же результат,
+    что и полный разбор команды. Числа после LIMIT/OFFSET остаются в тексте:
+    они задают форму команды.
+
+    Args:
+        text: Текст команды
+
+    Returns:
+        Кортеж (текст с метками, значения параметров)
+    """
+    params: List[Any] = []
+
+    def replace(match: "re.Match[str]") -> str:
+        literal = match.group(0)
+        if match.group("bare") is not None:
+            previous = text[: match.start()].split()[-1:]
+            if previous and previous[0].lower() in ("limit", "offset"):
+                return literal
+            raw = literal
+        else:
+            raw = match.group("double")
+            if raw is None:
+                raw = match.group("single")
+            if not _PLAIN_STRING.fullmatch(raw) or _KEYWORDS & set(
+                raw.lower().split()
+            ):
+                return literal
+        params.append(parser.parse_value(raw))
+        return f"{_MARKER}{len(params) - 1}{_MARKER}"
+
+    if _MARKER in text:
+        return text, []
+    return _LITERAL.sub(replace, text), params
+
+
+def _to_placeholder(value: Any, used: List[int]) -> Any:
+    """Превращает метку в Placeholder; метка внутри значения - ошибка."""
+    if not isinstance(value, str) or _MARKER not in value:
+        return value
+    match = _MARKER_VALUE.fullmatch(value)
+    if match is None:
+        raise ValueError("Параметр является частью значения")
+    used.append(int(match.group(1)))
+    return Placeholder(int(match.group(1)))
+
+
+def _template_node(node: Any, used: List[int]) -> Any:
+    if len(node) == 3:
+        column, op, value = node
+        if _MARKER in column:
+            raise ValueError("Параметр в имени столбца")
+        return column, op, _to_placeholder(value, used)
+    if node[0] == parser.LOGICAL_NOT:
+        return node[0], _template_node(node[1], used)
+    return node[0], tuple(_template_node(child, used) for child in node[1])
+
+
+def make_template(statement: Statement, param_count: int) -> Statement:
+    """Заменяет метки в разобранной команде на Placeholder.
+
+    Args:
+        statement: Команда, разобранная из текста с метками
+        param_count: Количество параметров
+
+    Returns:
+        Шаблон команды
+
+    Raises:
+        ValueError: Если метка попала не на место значения (например,
+            в имя таблицы) и команду нельзя параметризовать
+    """
+    if _MARKER in statement.table:
+        raise ValueError("Параметр в имени таблицы")
+    names = [column for _, column in statement.columns or []] + statement.group_by
+    if any(_MARKER in column for column in names):
+        raise ValueError("Параметр в имени столбца")
+
+    used: List[int] = []
+    if statement.values is not None:
+        statement.values = [_to_placeholder(v, used) for v in statement.values]
+    if statement.set_clause is not None:
+        if any(_MARKER in column for column in statement.set_clause):
+            raise ValueError("Параметр в имени столбца")
+        statement.set_clause = {
+            column: _to_placeholder(value, used)
+            for column, value in statement.set_clause.items()
+        }
+    statement.where = [_template_node(node, used) for node in statement.where]
+
+    if sorted(used) != list(range(param_count)):
+        raise ValueError("Параметры не совпадают с литералами команды")
+    return statement
+
+
+class StatementCache:
+    """LRU-кэш шаблонов разобранных команд.
+
+    Ключ - текст команды с метками вместо литералов, поэтому команды одной
+    формы с разными значениями используют один шаблон. Обращения к словарю
+    шаблонов защищены блокировкой: кэш общий для потоков сервера.
+    """
+
+    def __init__(self, max_entries: int = STATEMENT_CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Statement]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text: str) -> Statement:
+        """Возвращает разобранную команду, разбирая ее только при промахе.
+
+        Args:
+            text: Текст команды
+
+        Returns:
+            Команда с подставленными значениями
+
+        Raises:
+            ValueError: Если команда некорректна (некорректные команды
+                не кэшируются)
+        """
+        shape, params = extract_parameters(text)
+        with self._lock:
+            template = self._entries.get(shape)
+            if template is not None:
+                self._entries.move_to_end(shape)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if template is not None:
+            return template.bind(params)
+
+        try:
+            template = make_template(parse_statement(shape), len(params))
+        except ValueError:
+            # Метки изменили разбор (или команда некорректна): разбираем
+            # исходный текст, ошибка тогда описывает именно его
+            template = parse_statement(text)
+            shape, params = text, []
+
+        with self._lock:
+            self._entries[shape] = template
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return template.bind(params)
+
+    def clear(self) -> None:
+        """Очищает кэш (счетчики сохраняются)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Возвращает счетчики кэша.
+
+        Returns:
+            Словарь с числом попаданий, промахов, вытеснений и записей
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+# Общий кэш разобранных команд для текущей сессии
+statement_cache = StatementCache()
+
+
+if __name__ == "__main__":
+    cache = StatementCache()
+    commands = [
+        'insert into books values ("Dune", 412, true)',
+        'insert into books values ("Solaris", 204, false)',
+        'select from books where pages > 300 and not title = "Dune" limit 5',
+        'select from books where pages > 100 and not title = "Emma" limit 5',
+        'update books set pages = 500 where title = "Dune"',
+        "delete from books where ID = 3",
+        'select from "books" where title = "a, b"',
+    ]
+    for command in commands:
+        print(f"{command}\n  -> {cache.get(command)}")
+    print(f"Статистика: {cache.stats()}")
@@ -0,0 +1,157 @@
+"""Удаленные записи таблиц в памяти (tombstones).
+
+Удаление не переписывает таблицу в памяти: позиции удаленных записей
+добавляются в набор deleted таблицы и убираются из индексов по одной, а
+поиск записей (см. skip_deleted) их пропускает. Позиции остальных
+записей не сдвигаются, поэтому индексы и карты зон остаются верными без
+перестройки, а удаленные записи читаются при просмотре как обычно и
+отбрасываются уже из найденных позиций.
+
+Таблица сжимается (удаленные записи выбрасываются, индексы строятся
+заново) перед записью на диск, поэтому в файлы удаленные записи не
+попадают, и сразу при удалении, если одна команда удаляет больше
+TOMBSTONE_INDEX_ROWS записей или удаленные составят не меньше
+TOMBSTONE_COMPACT_RATIO таблицы. Бинарная таблица сжимается только
+при записи: ее файлы переписываются потоком оставшихся записей, а таблица
+остается открытой через mmap и в память не загружается.
+"""
+
+from itertools import filterfalse
+from typing import Any, Dict, Iterable, List, Sequence, Set
+
+from .binary import BinaryTable
+from .columnar import ColumnarTable
+from .constants import TOMBSTONE_COMPACT_RATIO, TOMBSTONE_INDEX_ROWS
+
+# Набор удаленных позиций таблиц, которые удалений не отмечают
+_NO_DELETED: Set[int] = frozenset()
+
+
+class RowTable(list):
+    """Список записей таблицы вместе с позициями удаленных записей."""
+
+    __slots__ = ("deleted",)
+
+    def __init__(self, records: Iterable[Any] = ()) -> None:
+        super().__init__(records)
+        self.deleted: Set[int] = set()
+
+
+def deleted_positions(table_data: Any) -> Set[int]:
+    """Возвращает позиции удаленных записей таблицы (пустой набор, если их нет)."""
+    return getattr(table_data, "deleted", _NO_DELETED)
+
+
+def live_count(table_data: Any) -> int:
+    """Возвращает количество записей таблицы без удаленных."""
+    return len(table_data) - len(deleted_positions(table_data))
+
+
+def skip_deleted(table_data: Any, positions: Sequence[int]) -> Sequence[int]:
+    """Убирает из позиций-кандидатов удаленные записи.
+
+    Args:
+        table_data: Данные таблицы
+        positions: Позиции по возрастанию
+
+    Returns:
+        Те же позиции, если удаленных записей нет, иначе новый список
+    """
+    if not deleted_positions(table_data):
+        return positions
+    return list(iter_live(table_data, positions))
+
+
+def iter_live(table_data: Any, positions: Iterable[int]) -> Iterable[int]:
+    """Лениво убирает удаленные записи из позиций (те же позиции, если их нет)."""
+    deleted = deleted_positions(table_data)
+    if not deleted:
+        return positions
+    return filterfalse(deleted.__contains__, positions)
+
+
+def live_positions(table_data: Any) -> Sequence[int]:
+    """Возвращает позиции всех неудаленных записей таблицы."""
+    return skip_deleted(table_data, range(len(table_data)))
+
+
+def _without(table_data: Any, deleted: Set[int]) -> Any:
+    """Возвращает копию таблицы без записей на позициях deleted."""
+    if isinstance(table_data, ColumnarTable):
+        return table_data.without_positions(deleted)
+    return RowTable(
+        record for position, record in enumerate(table_data) if position not in deleted
+    )
+
+
+def _rebuild(table_data: Any, indexes: Dict[str, Any]) -> Any:
+    for idx in indexes.values():
+        idx.build(table_data)
+    return table_data
+
+
+def compact_table(table_data: Any, indexes: Dict[str, Any]) -> Any:
+    """Выбрасывает удаленные записи и перестраивает индексы таблицы.
+
+    Колоночная таблица остается колоночной, строковая становится списком
+    записей. Файлы бинарной таблицы сразу переписываются потоком
+    оставшихся записей (см. BinaryTable.rewrite), и таблица открывается
+    по ним заново.
+
+    Args:
+        table_data: Данные таблицы
+        indexes: Индексы таблицы, перестраиваемые по новым позициям
+
+    Returns:
+        Таблица без удаленных записей (та же, если удаленных нет)
+
+    Raises:
+        OSError: Если файлы бинарной таблицы не удалось переписать
+    """
+    deleted = deleted_positions(table_data)
+    if not deleted:
+        return table_data
+    if isinstance(table_data, BinaryTable):
+        live = iter_live(table_data, range(len(table_data)))
+        return _rebuild(table_data.rewrite(live), indexes)
+    return _rebuild(_without(table_data, deleted), indexes)
+
+
+def mark_deleted(
+    table_data: Any, positions: List[int], indexes: Dict[str, Any]
+) -> Any:
+    """Отмечает записи удаленными и убирает их из индексов.
+
+    Args:
+        table_data: Данные таблицы
+        positions: Позиции удаляемых записей
+        indexes: Индексы таблицы
+
+    Returns:
+        Таблица с отмеченными удалениями (обычный список заменяется
+        RowTable) или новая сжатая таблица (см. compact_table)
+    """
+    if not positions:
+        return table_data
+    deleted = deleted_positions(table_data)
+    if isinstance(table_data, BinaryTable):
+        # Бинарная таблица сжимается только при записи (см. compact_table),
+        # много записей проще убрать из индексов, построив их заново
+        if len(positions) > TOMBSTONE_INDEX_ROWS:
+            table_data.deleted.update(positions)
+            return _rebuild(table_data, indexes)
+    elif (
+        len(positions) > TOMBSTONE_INDEX_ROWS
+        or len(deleted) + len(positions) >= TOMBSTONE_COMPACT_RATIO * len(table_data)
+    ):
+        return _rebuild(_without(table_data, deleted.union(positions)), indexes)
+
+    if type(table_data) is list:
+        table_data = RowTable(table_data)
+    # Записи отмечаются после индексов: при ошибке они остаются в таблице
+    for position in positions:
+        record = table_data[position]
+        for idx in indexes.values():
+            idx.remove(record.get(idx.column), position)
+    table_data.deleted.update(positions)
+    return table_data
@@ -1,10 +1,21 @@
 """Вспомогательные функции для работы с файлами."""
 
+import csv
 import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from .binary import BinaryTable, write_binary_table
+from .codec import detect_codec, get_codec
+from .constants import TABLE_CODEC
 from .decorators import handle_db_errors, log_time
+from .metrics import metrics
+from .segments import (
+    MANIFEST_FILE,
+    get_segment_dir,
+    iter_segments,
+    write_segments,
+)
 
 
 @handle_db_errors
@@ -35,14 +46,23 @@ def save_metadata(data: Dict[str, Any], filepath: str = "db_meta.json") -> None:
         data: Словарь для сохранения
         filepath: Путь к JSON-файлу
     """
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Пишем во временный файл и атомарно подменяем им старый, чтобы
+    # счетчики ID и схема не терялись при сбое посреди записи
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, ensure_ascii=False, indent=2))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
 
 
 @handle_db_errors
 @log_time
 def load_table_data(table_name: str, data_dir: str = "data") -> List[Dict[str, Any]]:
-    """Загружает данные таблицы из JSON-файла.
+    """Загружает данные таблицы из файла данных.
+
+    Формат файла (кодек) определяется по его содержимому, поэтому файлы,
+    записанные до смены кодека таблицы, читаются как прежде.
 
     Args:
         table_name: Имя таблицы
@@ -53,33 +73,435 @@ def load_table_data(table_name: str, data_dir: str = "data") -> List[Dict[str, A
     """
     filepath = os.path.join(data_dir, f"{table_name}.json")
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(filepath, "rb") as f:
+            raw = f.read()
+        data = []
+        if raw:
+            codec = detect_codec(raw)
+            data = codec.decode(raw)
+            if metrics.enabled:
+                metrics.inc(
+                    "bytes_read_total", len(raw), table=table_name, file=codec.name
+                )
     except FileNotFoundError:
-        return []
-    except json.JSONDecodeError:
-        print(f"Ошибка: Файл {filepath} содержит некорректный JSON")
-        return []
+        data = []
+    except ValueError:
+        print(f"Ошибка: Файл {filepath} содержит некорректные данные")
+        data = []
+
+    # Доигрываем журнал операций поверх базового файла
+    log_path = get_log_path(table_name, data_dir)
+    if os.path.exists(log_path):
+        data = replay_table_log(data, log_path)
+        if metrics.enabled:
+            size = os.path.getsize(log_path)
+            metrics.inc("bytes_read_total", size, table=table_name, file="log")
+    return data
 
 
-@handle_db_errors
 @log_time
 def save_table_data(
-    table_name: str, data: List[Dict[str, Any]], data_dir: str = "data"
+    table_name: str,
+    data: List[Dict[str, Any]],
+    data_dir: str = "data",
+    codec: str = TABLE_CODEC,
 ) -> None:
-    """Сохраняет данные таблицы в JSON-файл.
+    """Сохраняет данные таблицы в файл данных.
 
     Args:
         table_name: Имя таблицы
         data: Список записей для сохранения
         data_dir: Директория для файлов данных
+        codec: Формат файла (см. codec.py)
+
+    Raises:
+        OSError: Если файл не удалось записать
     """
     # Создаем директорию, если она не существует
     os.makedirs(data_dir, exist_ok=True)
 
+    # Колоночная таблица сохраняется в том же формате, что и список записей
+    if hasattr(data, "to_records"):
+        data = data.to_records()
+
+    # Файл кодируется целиком, пишется рядом и атомарно подменяет старый:
+    # сбой посреди записи не обрезает таблицу
+    table_codec = get_codec(codec)
+    payload = table_codec.encode(data)
     filepath = os.path.join(data_dir, f"{table_name}.json")
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+    if metrics.enabled:
+        metrics.inc("bytes_written_total", len(payload), table=table_name, file=codec)
+
+
+def get_log_path(table_name: str, data_dir: str = "data") -> str:
+    """Возвращает путь к журналу операций таблицы.
+
+    Args:
+        table_name: Имя таблицы
+        data_dir: Директория с файлами данных
+
+    Returns:
+        Путь к файлу журнала
+    """
+    return os.path.join(data_dir, f"{table_name}.log")
+
+
+def get_binary_paths(table_name: str, data_dir: str = "data") -> Tuple[str, str]:
+    """Возвращает пути к файлу строк и куче строк бинарной таблицы.
+
+    Args:
+        table_name: Имя таблицы
+        data_dir: Директория с файлами данных
+
+    Returns:
+        Кортеж (путь_к_файлу_строк, путь_к_куче)
+    """
+    return (
+        os.path.join(data_dir, f"{table_name}.bin"),
+        os.path.join(data_dir, f"{table_name}.heap"),
+    )
+
+
+@handle_db_errors
+@log_time
+def load_binary_table(
+    table_name: str, columns: List[str], data_dir: str = "data"
+) -> BinaryTable:
+    """Открывает бинарную таблицу через mmap без чтения строк.
+
+    Args:
+        table_name: Имя таблицы
+        columns: Столбцы таблицы в формате "имя:тип"
+        data_dir: Директория с файлами данных
+
+    Returns:
+        Бинарная таблица (пустая, если файлов еще нет)
+    """
+    return BinaryTable(columns, *get_binary_paths(table_name, data_dir))
+
+
+@log_time
+def save_binary_table(
+    table_name: str, columns: List[str], data: Any, data_dir: str = "data"
+) -> None:
+    """Сохраняет таблицу в бинарном формате.
+
+    Изменения открытой бинарной таблицы дописываются в ее файлы, другие
+    данные (например, после удаления записей) записываются целиком.
+
+    Args:
+        table_name: Имя таблицы
+        columns: Столбцы таблицы в формате "имя:тип"
+        data: Бинарная таблица, список записей или колоночная таблица
+        data_dir: Директория для файлов данных
+
+    Raises:
+        OSError: Если файлы не удалось записать
+        ValueError: Если значение не соответствует типу столбца
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    if isinstance(data, BinaryTable):
+        written = data.flush()
+    else:
+        if hasattr(data, "to_records"):
+            data = data.to_records()
+        paths = get_binary_paths(table_name, data_dir)
+        write_binary_table(columns, data, *paths)
+        written = sum(os.path.getsize(path) for path in paths)
+
+    if metrics.enabled:
+        metrics.inc("bytes_written_total", written, table=table_name, file="binary")
+
+
+@handle_db_errors
+@log_time
+def load_segmented_table(
+    table_name: str, data_dir: str = "data"
+) -> List[Dict[str, Any]]:
+    """Загружает таблицу, хранящуюся сегментами, читая их по одному.
+
+    Args:
+        table_name: Имя таблицы
+        data_dir: Директория с файлами данных
+
+    Returns:
+        Список записей таблицы (пустой, если таблица еще не записана)
+    """
+    segment_dir = get_segment_dir(table_name, data_dir)
+    data: List[Dict[str, Any]] = []
+    for segment in iter_segments(segment_dir):
+        data.extend(segment)
+    if metrics.enabled and data:
+        read = sum(entry.stat().st_size for entry in os.scandir(segment_dir))
+        metrics.inc("bytes_read_total", read, table=table_name, file="segment")
+    return data
+
+
+@log_time
+def save_segmented_table(
+    table_name: str,
+    data: Any,
+    operations: List[Dict[str, Any]],
+    data_dir: str = "data",
+    codec: str = TABLE_CODEC,
+) -> None:
+    """Сохраняет таблицу сегментами, переписывая только затронутые.
+
+    Args:
+        table_name: Имя таблицы
+        data: Список записей или колоночная таблица
+        operations: Операции с момента прошлого сохранения
+        data_dir: Директория для файлов данных
+        codec: Формат файлов сегментов
+
+    Raises:
+        OSError: Если сегменты не удалось записать
+    """
+    segment_dir = get_segment_dir(table_name, data_dir)
+    written = write_segments(segment_dir, data, operations, codec)
+    if metrics.enabled:
+        metrics.inc("bytes_written_total", written, table=table_name, file="segment")
+
+
+def get_file_signature(filepath: str) -> Optional[Tuple[int, int, int]]:
+    """Возвращает подпись файла: время изменения, размер и номер inode.
+
+    Файлы записываются через замену, поэтому inode меняется при каждой
+    записи, даже если время изменения не успело сдвинуться.
+
+    Args:
+        filepath: Путь к файлу
+
+    Returns:
+        Кортеж (mtime_ns, размер, inode) или None, если файла нет
+    """
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def get_table_signature(table_name: str, data_dir: str = "data") -> tuple:
+    """Возвращает подпись файлов таблицы (время изменения и размер).
+
+    Подпись меняется при любой записи в файл данных или журнал таблицы,
+    поэтому по ней можно проверять актуальность построенных в памяти структур.
+
+    Args:
+        table_name: Имя таблицы
+        data_dir: Директория с файлами данных
+
+    Returns:
+        Кортеж с временем изменения и размером каждого файла таблицы
+    """
+    paths = (
+        os.path.join(data_dir, f"{table_name}.json"),
+        get_log_path(table_name, data_dir),
+        *get_binary_paths(table_name, data_dir),
+        # Манифест сегментов заменяется при каждой записи сегментов
+        os.path.join(get_segment_dir(table_name, data_dir), MANIFEST_FILE),
+    )
+    return tuple(get_file_signature(path) for path in paths)
+
+
+def get_table_size(table_name: str, data_dir: str = "data") -> int:
+    """Возвращает размер файлов таблицы на диске.
+
+    Args:
+        table_name: Имя таблицы
+        data_dir: Директория с файлами данных
+
+    Returns:
+        Суммарный размер файла данных, журнала, бинарных файлов
+        и каталога сегментов в байтах
+    """
+    paths = [
+        os.path.join(data_dir, f"{table_name}.json"),
+        get_log_path(table_name, data_dir),
+        *get_binary_paths(table_name, data_dir),
+    ]
+    segment_dir = get_segment_dir(table_name, data_dir)
+    if os.path.isdir(segment_dir):
+        paths.extend(entry.path for entry in os.scandir(segment_dir))
+
+    size = 0
+    for path in paths:
+        try:
+            size += os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+    return size
+
+
+def replay_table_log(
+    data: List[Dict[str, Any]], log_path: str
+) -> List[Dict[str, Any]]:
+    """Применяет операции из журнала к базовым данным таблицы.
+
+    Журнал хранится в формате JSON Lines, каждая строка - одна операция:
+    {"op": "insert", "record": {...}}, {"op": "update", "ids": [...], "set": {...}}
+    или {"op": "delete", "ids": [...]}.
+
+    Args:
+        data: Записи из базового файла
+        log_path: Путь к журналу
+
+    Returns:
+        Список записей после применения журнала
+    """
+    operations = []
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                operations.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Недописанная строка после сбоя - дальше журнал не читаем
+                print(f"Ошибка: Журнал {log_path} поврежден, чтение остановлено")
+                break
+
+    return apply_operations(data, operations)
+
+
+def apply_operations(
+    data: Iterable[Dict[str, Any]], operations: Iterable[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Применяет операции журнала к записям таблицы.
+
+    Операции идемпотентны: вставка записи с существующим ID заменяет ее,
+    поэтому повторное применение уже учтенных операций ничего не меняет.
+
+    Args:
+        data: Записи таблицы
+        operations: Операции {"op": "insert" | "update" | "delete", ...}
+
+    Returns:
+        Список записей после применения операций
+    """
+    records = {record.get("ID"): record for record in data}
+
+    for operation in operations:
+        op = operation.get("op")
+        if op == "insert":
+            record = operation["record"]
+            records[record.get("ID")] = record
+        elif op == "update":
+            for record_id in operation["ids"]:
+                if record_id in records:
+                    records[record_id].update(operation["set"])
+        elif op == "delete":
+            for record_id in operation["ids"]:
+                records.pop(record_id, None)
+
+    return list(records.values())
+
+
+def append_table_log(
+    table_name: str, operations: List[Dict[str, Any]], data_dir: str = "data"
+) -> int:
+    """Дописывает операции в конец журнала таблицы.
+
+    Args:
+        table_name: Имя таблицы
+        operations: Список операций для записи
+        data_dir: Директория для файлов данных
+
+    Returns:
+        Размер журнала в байтах после записи
+
+    Raises:
+        OSError: Если журнал не удалось дописать
+    """
+    os.makedirs(data_dir, exist_ok=True)
+
+    log_path = get_log_path(table_name, data_dir)
+    lines = "".join(
+        json.dumps(operation, ensure_ascii=False) + "\n" for operation in operations
+    )
+    data = lines.encode("utf-8")
+    with open(log_path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if metrics.enabled:
+        metrics.inc("bytes_written_total", len(data), table=table_name, file="log")
+    return os.path.getsize(log_path)
+
+
+@handle_db_errors
+def compact_table_log(
+    table_name: str, data_dir: str = "data", codec: str = TABLE_CODEC
+) -> None:
+    """Сворачивает журнал операций в базовый файл таблицы.
+
+    Базовый файл перезаписывается до удаления журнала, а все операции
+    журнала идемпотентны, поэтому сбой между шагами не теряет данные.
+
+    Args:
+        table_name: Имя таблицы
+        data_dir: Директория с файлами данных
+        codec: Формат базового файла
+    """
+    log_path = get_log_path(table_name, data_dir)
+    if not os.path.exists(log_path):
+        return
+
+    data = load_table_data(table_name, data_dir)
+    save_table_data(table_name, data, data_dir, codec)
+    os.remove(log_path)
+
+
+def iter_import_batches(
+    filepath: str, batch_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """Потоково читает файл импорта и отдает строки пачками.
+
+    Поддерживаются CSV (первая строка - имена столбцов, значения - строки)
+    и JSON Lines (.jsonl, .ndjson; одна запись-объект на строку).
+
+    Args:
+        filepath: Путь к файлу импорта
+        batch_size: Количество строк в пачке
+
+    Returns:
+        Итератор пачек строк (столбец -> значение)
+
+    Raises:
+        ValueError: Если формат файла не поддерживается или строка некорректна
+    """
+    extension = os.path.splitext(filepath)[1].lower()
+    if extension not in (".csv", ".jsonl", ".ndjson"):
+        raise ValueError(
+            f"Неподдерживаемый формат файла: {filepath}. Ожидается .csv или .jsonl"
+        )
+
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        if extension == ".csv":
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader, [])]
+            rows = (dict(zip(header, values)) for values in reader if values)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+
+        batch = []
+        for row in rows:
+            if not isinstance(row, dict):
+                raise ValueError(f"Ожидается объект JSON, получено: {row!r}")
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
 
 
 if __name__ == "__main__":
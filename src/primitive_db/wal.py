@@ -0,0 +1,217 @@
+"""Журнал предзаписи (WAL) с групповой фиксацией.
+
+Каждое изменение таблиц сначала дописывается в один последовательный
+журнал и фиксируется fsync, а файлы таблиц становятся контрольными точками:
+они записываются на диск по политике сброса, после чего журнал очищается.
+При запуске операции из журнала доигрываются поверх файлов таблиц.
+
+Журнал хранится в формате JSON Lines, каждая строка - одна операция:
+{"table": ..., "meta": {"next_id": ..., "version": ...}, "operation": {...}}.
+Операции те же, что и в журнале таблицы режима "log", и идемпотентны,
+поэтому повторное применение уже записанных в таблицу операций безопасно.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from .constants import WAL_FILE
+from .metrics import metrics
+
+
+class WriteAheadLog:
+    """Журнал предзаписи с групповой фиксацией.
+
+    Номер записи (LSN) - смещение конца записи среди байтов, дописанных
+    этим процессом (в общий журнал пишут и другие процессы). fsync выполняет
+    один из ожидающих фиксации (лидер) сразу для всех уже дописанных
+    записей, остальные ждут его завершения, поэтому несколько команд
+    разделяют один fsync.
+    """
+
+    def __init__(self, path: str = WAL_FILE) -> None:
+        self.path = path
+        self._file: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._synced_cond = threading.Condition(self._lock)
+        self._syncing = False
+        self.written_lsn = 0
+        self.synced_lsn = 0
+        self.commits = 0
+        self.syncs = 0
+
+    def _open(self) -> Any:
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            self.written_lsn = self.synced_lsn = self._file.tell()
+        return self._file
+
+    def append(self, records: List[Dict[str, Any]]) -> int:
+        """Дописывает записи в журнал без fsync.
+
+        Args:
+            records: Записи журнала
+
+        Returns:
+            LSN последней записи для передачи в commit
+        """
+        data = "".join(
+            json.dumps(record, ensure_ascii=False) + "\n" for record in records
+        ).encode("utf-8")
+        with self._lock:
+            f = self._open()
+            f.write(data)
+            f.flush()
+            self.written_lsn += len(data)
+            lsn = self.written_lsn
+        if metrics.enabled:
+            metrics.inc("bytes_written_total", len(data), table="", file="wal")
+        return lsn
+
+    def commit(self, lsn: int) -> None:
+        """Ждет, пока записи журнала до lsn не будут сохранены на диск.
+
+        Args:
+            lsn: Номер записи, возвращенный append
+        """
+        with self._lock:
+            self.commits += 1
+            while self.synced_lsn < lsn:
+                if self._syncing:
+                    # fsync уже выполняется - ждем его, возможно он покроет lsn
+                    self._synced_cond.wait()
+                    continue
+
+                self._syncing = True
+                target = self.written_lsn
+                fileno = self._open().fileno()
+                self._lock.release()
+                synced = False
+                try:
+                    os.fsync(fileno)
+                    synced = True
+                finally:
+                    self._lock.acquire()
+                    self._syncing = False
+                    if synced:
+                        self.synced_lsn = max(self.synced_lsn, target)
+                        self.syncs += 1
+                    self._synced_cond.notify_all()
+
+    def sync(self) -> None:
+        """Сохраняет на диск все дописанные записи."""
+        self.commit(self.written_lsn)
+
+    def size(self) -> int:
+        """Возвращает размер журнала в байтах (с записями других процессов)."""
+        if self._file is not None:
+            return os.fstat(self._file.fileno()).st_size
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def read_records(self) -> Iterator[Dict[str, Any]]:
+        """Читает записи журнала по порядку.
+
+        Недописанная последняя строка (без перевода строки или с
+        некорректным JSON) означает сбой во время записи: чтение на ней
+        останавливается.
+
+        Returns:
+            Итератор записей журнала
+        """
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+
+        with f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Ошибка: Журнал {self.path} поврежден, чтение остановлено")
+                    break
+
+    def truncate(self) -> None:
+        """Очищает журнал после контрольной точки."""
+        with self._lock:
+            f = self._open()
+            f.truncate(0)
+            f.flush()
+            os.fsync(f.fileno())
+            self.written_lsn = self.synced_lsn = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает счетчики журнала.
+
+        Returns:
+            Словарь с числом фиксаций, вызовов fsync и размером журнала
+        """
+        return {"commits": self.commits, "syncs": self.syncs, "bytes": self.size()}
+
+    def close(self) -> None:
+        """Закрывает файл журнала."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def make_record(
+    table_name: str, table_meta: Dict[str, Any], operation: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Формирует запись журнала для операции над таблицей.
+
+    Вместе с операцией сохраняются счетчик ID и версия таблицы, чтобы
+    восстановить их вместе с данными, и метка создания таблицы, чтобы
+    не применить операцию к другой таблице с тем же именем.
+
+    Args:
+        table_name: Имя таблицы
+        table_meta: Метаданные таблицы после операции
+        operation: Операция ({"op": "insert" | "update" | "delete", ...})
+
+    Returns:
+        Запись журнала
+    """
+    meta = {key: table_meta[key] for key in ("next_id", "version") if key in table_meta}
+    record = {"table": table_name, "meta": meta, "operation": operation}
+    if "created" in table_meta:
+        record["created"] = table_meta["created"]
+    return record
+
+
+# Журнал предзаписи базы данных
+wal = WriteAheadLog()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    # Тестируем групповую фиксацию из нескольких потоков
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log = WriteAheadLog(os.path.join(tmp_dir, "wal.log"))
+
+        def writer(n: int) -> None:
+            for i in range(50):
+                op = {"op": "insert", "record": {"ID": n * 100 + i}}
+                log.commit(log.append([make_record("t", {"next_id": i}, op)]))
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        print(f"Записей: {len(list(log.read_records()))}, счетчики: {log.stats()}")
+        log.truncate()
+        print(f"После контрольной точки: {log.stats()}")
+        log.close()
@@ -0,0 +1,294 @@
+"""Карты зон: статистика блоков таблицы для пропуска при просмотре.
+
+Позиции таблицы делятся на блоки по ZONE_BLOCK_ROWS строк. Для каждого
+блока карта зон столбца int или bool хранит наименьшее и наибольшее
+значение, число None и число True. Если по статистике блок не может
+удовлетворять сравнению из WHERE (например, "price > 1000", а наибольшее
+значение блока 900), его строки не проверяются.
+
+Карты зон строятся автоматически для всех столбцов int и bool, лежат
+среди индексов таблицы под ключом "столбец:zone" (имя столбца не может
+содержать двоеточие) и обновляются вместе с индексами при вставке,
+обновлении и удалении (тот же интерфейс build/add/remove). При удалении
+значения из блока границы не сужаются: карта остается верной, но менее
+точной до следующей перестройки; число None и True всегда точное.
+"""
+
+from itertools import chain
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from .columnar import ColumnarTable
+from .constants import ZONE_BLOCK_ROWS
+from .metrics import metrics
+from .predicate import is_comparison
+
+# Тип индекса для карт зон (пользователь их не создает)
+INDEX_ZONE = "zone"
+
+# Операторы, по которым блок можно пропустить
+ZONE_OPERATORS = {"=", "!=", ">", "<", ">=", "<="}
+
+# Границы блока с значениями, которые не сравниваются с числами
+_UNBOUNDED = (float("-inf"), float("inf"))
+
+
+class ZoneMap:
+    """Карта зон одного столбца: min, max, число None и True по блокам."""
+
+    kind = INDEX_ZONE
+
+    def __init__(self, column: str, block_rows: int = ZONE_BLOCK_ROWS) -> None:
+        self.column = column
+        self.block_rows = block_rows
+        self.size = 0
+        self.mins: List[Any] = []
+        self.maxs: List[Any] = []
+        self.nulls: List[int] = []
+        self.trues: List[int] = []
+
+    def build(self, table_data: Any) -> "ZoneMap":
+        """Строит карту заново по данным таблицы.
+
+        Args:
+            table_data: Данные таблицы
+
+        Returns:
+            Эта же карта
+        """
+        column = self.column
+        if isinstance(table_data, ColumnarTable) and column in table_data.columns:
+            # Колоночная таблица отдает значения столбца целиком
+            values = list(table_data.columns[column].scan())
+        else:
+            values = [record.get(column) for record in table_data]
+        self.size = len(values)
+        self.mins, self.maxs, self.nulls, self.trues = [], [], [], []
+        for start in range(0, len(values), self.block_rows):
+            block = values[start : start + self.block_rows]
+            present = block
+            if None in block:
+                present = [value for value in block if value is not None]
+            try:
+                bounds = (min(present), max(present)) if present else (None, None)
+            except TypeError:
+                bounds = _UNBOUNDED
+            self.mins.append(bounds[0])
+            self.maxs.append(bounds[1])
+            self.nulls.append(len(block) - len(present))
+            # True считаются только в столбцах bool (в int равенство 1 == True
+            # исказило бы счет)
+            self.trues.append(present.count(True) if type(bounds[0]) is bool else 0)
+        return self
+
+    def fork(self) -> "ZoneMap":
+        """Возвращает копию карты, которую можно изменять."""
+        forked = ZoneMap(self.column, self.block_rows)
+        forked.size = self.size
+        forked.mins = list(self.mins)
+        forked.maxs = list(self.maxs)
+        forked.nulls = list(self.nulls)
+        forked.trues = list(self.trues)
+        return forked
+
+    def add(self, value: Any, position: int) -> None:
+        """Учитывает значение записи в позиции (новой или обновленной)."""
+        block = position // self.block_rows
+        while block >= len(self.mins):
+            self.mins.append(None)
+            self.maxs.append(None)
+            self.nulls.append(0)
+            self.trues.append(0)
+        if position >= self.size:
+            self.size = position + 1
+
+        if value is None:
+            self.nulls[block] += 1
+            return
+        if value is True:
+            self.trues[block] += 1
+        low, high = self.mins[block], self.maxs[block]
+        try:
+            if low is None or value < low:
+                self.mins[block] = value
+            if high is None or value > high:
+                self.maxs[block] = value
+        except TypeError:
+            self.mins[block], self.maxs[block] = _UNBOUNDED
+
+    def remove(self, value: Any, position: int) -> None:
+        """Убирает значение записи в позиции (перед обновлением)."""
+        block = position // self.block_rows
+        if value is None:
+            self.nulls[block] -= 1
+        elif value is True:
+            self.trues[block] -= 1
+
+    def supports(self, operator: str, value: Any) -> bool:
+        """Проверяет, можно ли пропускать блоки по условию."""
+        return operator in ZONE_OPERATORS and isinstance(value, int)
+
+    def block_count(self) -> int:
+        """Возвращает количество блоков."""
+        return len(self.mins)
+
+    def may_match(self, block: int, operator: str, value: Any) -> bool:
+        """Проверяет, может ли хоть одна строка блока удовлетворять условию.
+
+        None не удовлетворяет ни одному сравнению, кроме "!=".
+
+        Args:
+            block: Номер блока
+            operator: Оператор сравнения
+            value: Значение из условия (int или bool)
+
+        Returns:
+            False, если блок можно пропустить
+        """
+        nulls = self.nulls[block]
+        if operator == "!=" and nulls:
+            return True
+        low, high = self.mins[block], self.maxs[block]
+        if low is None:
+            return False
+
+        if type(low) is bool and type(high) is bool:
+            # Столбец bool: точное число True уточняет границы, которые
+            # при обновлениях только расширяются
+            rows = min(self.block_rows, self.size - block * self.block_rows)
+            trues = self.trues[block]
+            low = trues == rows - nulls
+            high = trues > 0
+
+        if operator == "=":
+            return low <= value <= high
+        if operator == "!=":
+            return not low == high == value
+        if operator == ">":
+            return high > value
+        if operator == ">=":
+            return high >= value
+        if operator == "<":
+            return low < value
+        return low <= value
+
+
+def zone_key(column: str) -> str:
+    """Возвращает ключ карты зон столбца в словаре индексов таблицы."""
+    return f"{column}:{INDEX_ZONE}"
+
+
+def zone_block_mask(
+    table_size: int,
+    conditions: List[Any],
+    indexes: Mapping[str, Any],
+) -> Optional[Tuple[List[bool], int]]:
+    """Отмечает блоки, которые нельзя пропустить по картам зон.
+
+    Используются сравнения верхнего уровня (под AND): блок пропускается,
+    если хотя бы одно из них заведомо не выполняется ни для одной строки.
+
+    Args:
+        table_size: Количество записей в таблице
+        conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+        indexes: Индексы таблицы вместе с картами зон (см. zone_key)
+
+    Returns:
+        Кортеж (отметки блоков, строк в блоке) или None, если ни одна
+        карта зон к условию не подходит
+    """
+    keep: Optional[List[bool]] = None
+    block_rows = ZONE_BLOCK_ROWS
+    for node in conditions:
+        if not is_comparison(node):
+            continue
+        column, operator, value = node
+        zone_map = indexes.get(zone_key(column))
+        if zone_map is None or not zone_map.supports(operator, value):
+            continue
+        # Карта, отставшая от таблицы, не используется
+        if zone_map.size != table_size:
+            continue
+        block_rows = zone_map.block_rows
+        matches = [
+            zone_map.may_match(block, operator, value)
+            for block in range(zone_map.block_count())
+        ]
+        keep = matches if keep is None else [a and b for a, b in zip(keep, matches)]
+
+    if keep is None:
+        return None
+    return keep, block_rows
+
+
+def zone_candidates(
+    table_size: int,
+    conditions: List[Any],
+    indexes: Mapping[str, Any],
+) -> Optional[List[int]]:
+    """Возвращает позиции блоков, которые нельзя пропустить по картам зон.
+
+    Блоки отбираются zone_block_mask. Количество пропущенных блоков
+    добавляется в метрику zone_blocks_skipped_total.
+
+    Args:
+        table_size: Количество записей в таблице
+        conditions: Условия WHERE (сравнения и узлы AND/OR/NOT)
+        indexes: Индексы таблицы вместе с картами зон (см. zone_key)
+
+    Returns:
+        Позиции-кандидаты в порядке возрастания или None, если ни один
+        блок пропустить нельзя
+    """
+    mask = zone_block_mask(table_size, conditions, indexes)
+    if mask is None:
+        return None
+    keep, block_rows = mask
+    skipped = keep.count(False)
+    if metrics.enabled:
+        metrics.inc("zone_blocks_total", len(keep))
+        metrics.inc("zone_blocks_skipped_total", skipped)
+    if not skipped:
+        return None
+    return list(chain.from_iterable(
+        range(block * block_rows, min((block + 1) * block_rows, table_size))
+        for block, kept in enumerate(keep)
+        if kept
+    ))
+
+
+def zone_columns(table_meta: Mapping[str, Any]) -> Dict[str, str]:
+    """Возвращает описание карт зон таблицы.
+
+    Args:
+        table_meta: Метаданные таблицы
+
+    Returns:
+        Словарь ключ карты (см. zone_key) -> INDEX_ZONE для столбцов int и bool
+    """
+    specs = {}
+    for column in table_meta.get("columns", []):
+        name, col_type = column.split(":", 1)
+        if col_type in ("int", "bool"):
+            specs[zone_key(name)] = INDEX_ZONE
+    return specs
+
+
+if __name__ == "__main__":
+    import random
+
+    records = [
+        {"ID": i, "price": i * 10 + random.randrange(10), "sale": i > 95000}
+        for i in range(1, 100001)
+    ]
+    zones = {
+        zone_key(column): ZoneMap(column).build(records)
+        for column in ("ID", "price", "sale")
+    }
+    for where in (
+        [("price", ">", 990000)],
+        [("ID", ">=", 50000), ("ID", "<", 52000)],
+        [("sale", "=", True)],
+    ):
+        positions = zone_candidates(len(records), where, zones)
+        checked = len(records) if positions is None else len(positions)
+        print(f"{where}: проверяется строк {checked} из {len(records)}")
@@ -0,0 +1,52 @@
+"""Общая подготовка тестов: пустая база во временном каталоге."""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from src.primitive_db import engine, index
+from src.primitive_db.cache import query_cache
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.metrics import metrics
+from src.primitive_db.session import session
+from src.primitive_db.wal import wal
+
+
+def reset_session() -> None:
+    """Забывает метаданные, таблицы и индексы сессии (как новый процесс)."""
+    wal.close()
+    session.metadata = None
+    session.metadata_signature = None
+    session.base_versions = {}
+    session.tables.clear()
+    session.pending_operations = 0
+    index._registry.clear()
+    query_cache.clear()
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Тест над пустой базой в собственном временном каталоге."""
+
+    def setUp(self) -> None:
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        reset_session()
+        metrics.reset()
+        set_auto_confirm(True)
+
+    def tearDown(self) -> None:
+        set_auto_confirm(False)
+        reset_session()
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def run_commands(self, *commands: str) -> str:
+        """Выполняет команды движка и возвращает их вывод."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            for command in commands:
+                engine.execute_command(command)
+        return output.getvalue()
@@ -0,0 +1,34 @@
+import unittest
+
+from src.primitive_db.metrics import metrics
+from tests.helpers import DatabaseTestCase
+
+
+class TableLabelTest(DatabaseTestCase):
+    """Метрики команд с данными получают метку table их таблицы."""
+
+    def tables(self, name: str) -> set:
+        return {
+            dict(labels).get("table")
+            for (counter, labels) in metrics.counters
+            if counter == name
+        }
+
+    def test_insert_and_select_are_labelled(self) -> None:
+        self.run_commands(
+            "create_table books title:str pages:int",
+            'insert into books values ("a", 10)',
+            'insert into books values ("b", 20)',
+        )
+        metrics.reset()
+        self.run_commands("select from books where pages > 5")
+        self.assertEqual(self.tables("rows_scanned_total"), {"books"})
+        self.assertEqual(self.tables("rows_returned_total"), {"books"})
+
+        metrics.reset()
+        self.run_commands('insert into books values ("c", 30)')
+        self.assertEqual(self.tables("commands_total"), {"books"})
+
+
+if __name__ == "__main__":
+    unittest.main()
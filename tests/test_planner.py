@@ -0,0 +1,67 @@
+import unittest
+
+from src.primitive_db import engine, planner
+from src.primitive_db.session import session
+from tests.helpers import DatabaseTestCase
+
+
+class StatsRefreshTest(DatabaseTestCase):
+    """Статистика собирается заново, когда изменено много строк."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.run_commands("create_table books title:str pages:int")
+        self.run_commands(
+            *(f'insert into books values ("t{i}", {i})' for i in range(1, 21))
+        )
+        self.run_commands("flush")
+
+    def pages_stats(self) -> dict:
+        metadata = session.load_metadata(engine.META_FILE)
+        return metadata["books"]["stats"]["columns"]["pages"]
+
+    def test_updates_refresh_stats(self) -> None:
+        self.assertEqual(self.pages_stats()["max"], 20)
+        # 3 строки из 20: количество строк не меняется, версий мало
+        self.run_commands("update books set pages = 100 where pages < 4", "flush")
+        self.assertEqual(self.pages_stats()["max"], 100)
+
+    def test_modified_rows_are_counted(self) -> None:
+        meta = session.load_metadata(engine.META_FILE)["books"]
+        table_data, _ = engine.load_table({"books": meta}, "books")
+        operations = [{"op": "update", "ids": [1]}, {"op": "delete", "ids": [2]}]
+        self.assertFalse(planner.refresh_stats(meta, table_data, operations))
+        self.assertEqual(meta["stats"]["modified"], 2)
+        # Еще одна измененная строка: 3 из 20 больше STATS_REFRESH_RATIO
+        operations = [{"op": "update", "ids": [3]}]
+        self.assertTrue(planner.refresh_stats(meta, table_data, operations))
+        self.assertNotIn("modified", meta["stats"])
+
+
+class ComparisonSelectivityTest(unittest.TestCase):
+    """Доля равных строк учитывается только для значений из столбца."""
+
+    def setUp(self) -> None:
+        # Четные значения 0..198, граница гистограммы 98 - значение столбца
+        records = [{"ID": i + 1, "v": 2 * i} for i in range(100)]
+        meta = {"columns": ["ID:int", "v:int"], "version": 1}
+        self.stats = planner.collect_stats(records, meta)
+
+    def selectivity(self, operator: str, value: int) -> float:
+        return planner.comparison_selectivity(self.stats, "v", operator, value)
+
+    def test_strict_comparison_with_absent_value(self) -> None:
+        self.assertEqual(self.selectivity(">", 101), self.selectivity(">=", 101))
+        self.assertEqual(self.selectivity("<", 101), self.selectivity("<=", 101))
+        self.assertAlmostEqual(self.selectivity(">", 101), 0.49, delta=0.01)
+
+    def test_strict_comparison_with_boundary_value(self) -> None:
+        equal = self.selectivity("=", 98)
+        self.assertGreater(equal, 0)
+        self.assertAlmostEqual(
+            self.selectivity(">", 98), self.selectivity(">=", 98) - equal
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
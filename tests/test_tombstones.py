@@ -0,0 +1,49 @@
+import unittest
+
+from src.primitive_db import engine
+from src.primitive_db.binary import BinaryTable
+from src.primitive_db.session import session
+from tests.helpers import DatabaseTestCase, reset_session
+
+
+class BinaryCompactionTest(DatabaseTestCase):
+    """Удаление из таблицы storage=binary не загружает ее в память."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.run_commands("create_table b title:str pages:int storage=binary")
+        with open("b.csv", "w", encoding="utf-8") as f:
+            f.write("title,pages\n")
+            f.writelines(f"t{i},{i % 10}\n" for i in range(1, 1001))
+        self.run_commands("import b b.csv", "create_index b pages hash")
+
+    def session_table(self) -> object:
+        return session.tables["b"].table_data
+
+    def test_binary_table_stays_binary_after_delete_and_flush(self) -> None:
+        # 300 записей: больше TOMBSTONE_INDEX_ROWS, индексы строятся заново
+        self.run_commands("delete from b where ID = 5", "delete from b where pages < 3")
+        table_data = self.session_table()
+        self.assertIsInstance(table_data, BinaryTable)
+        self.assertEqual(len(table_data.deleted), 301)
+
+        self.run_commands("flush")
+        table_data = self.session_table()
+        self.assertIsInstance(table_data, BinaryTable)
+        self.assertEqual(len(table_data), 699)
+        self.assertFalse(table_data.deleted)
+        output = self.run_commands("select count(*) from b where pages = 5")
+        self.assertIn("|    99    |", output)
+
+        reset_session()
+        table_data, _ = engine.load_table(session.load_metadata(engine.META_FILE), "b")
+        self.assertIsInstance(table_data, BinaryTable)
+        ids = {table_data.get_value(p, "ID") for p in range(len(table_data))}
+        self.assertEqual(len(ids), 699)
+        self.assertNotIn(5, ids)
+        self.assertNotIn(10, ids)
+        self.assertIn(4, ids)
+
+
+if __name__ == "__main__":
+    unittest.main()